@@ -0,0 +1,22 @@
+# benchmarks/common.py
+import os, shutil, tempfile, contextlib
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def bench_env():
+    """Environment for benchmark subprocesses: headless Qt, repo on the path."""
+    env = dict(os.environ)
+    env["QT_QPA_PLATFORM"] = "offscreen"
+    env["PYTHONPATH"] = ROOT_DIR + os.pathsep + env.get("PYTHONPATH", "")
+    return env
+
+
+@contextlib.contextmanager
+def fresh_dir():
+    """Empty working directory, so config/, caches and history start cold."""
+    path = tempfile.mkdtemp(prefix="nova-bench-")
+    try:
+        yield path
+    finally:
+        shutil.rmtree(path, ignore_errors=True)
@@ -0,0 +1,205 @@
+# benchmarks/load.py
+"""
+Load driver for the Pilot request path. Runs N ChatBox sessions concurrently
+against the mock Gemini server (or --url), each sending --prompts messages
+one after another through the real client code: ChatBox, scheduler, request
+engine, router, provider adapter and HTTP transport.
+
+    python -m benchmarks.load --sessions 20 --prompts 10 --latency lognormal:300,0.5 --rate-429 0.05
+
+Reports request latency (send to reply shown) p50/p99, time to first chunk,
+throughput, errors, and per session the time its handlers spent on the UI
+thread. Event-loop lag is sampled with a 10ms timer.
+"""
+import os, sys, json, time, argparse, tempfile, functools
+from PyQt6.QtWidgets import QApplication
+from PyQt6.QtCore import QTimer, Qt
+from benchmarks.mock_gemini import MockGeminiServer, add_options, options_from_args
+
+UI_HANDLERS = ("handle_ai_chunk", "flush_stream_buffer", "handle_ai_response", "handle_ai_error", "display_message")
+LAG_INTERVAL_MS = 10
+FRAME_MS = 1000 / 60
+
+
+def percentile(values, p):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * p / 100), len(ordered) - 1)]
+
+
+class Session:
+    """One simulated user: sends the next prompt as soon as the previous reply is shown."""
+
+    def __init__(self, index, chat, prompts, on_done):
+        self.index = index
+        self.chat = chat
+        self.remaining = prompts
+        self.on_done = on_done
+        self.latencies = []
+        self.first_chunk = []
+        self.errors = 0
+        self.ui_time = 0.0
+        self.ui_max = 0.0
+        self.depth = 0
+        self.sent_at = 0.0
+        self._instrument()
+
+    def _instrument(self):
+        # Time spent in ChatBox handlers on the UI thread (outermost call only)
+        for name in UI_HANDLERS:
+            setattr(self.chat, name, self._timed(getattr(self.chat, name)))
+        self.chat.stream_timer.timeout.disconnect()
+        self.chat.stream_timer.timeout.connect(self.chat.flush_stream_buffer)
+
+    def _timed(self, method):
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            self.depth += 1
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self.depth -= 1
+                if self.depth == 0:
+                    elapsed = time.perf_counter() - start
+                    self.ui_time += elapsed
+                    self.ui_max = max(self.ui_max, elapsed)
+        return wrapper
+
+    def send_next(self):
+        if self.remaining == 0:
+            self.on_done(self)
+            return
+        self.remaining -= 1
+        self.chat.user_input.setText(f"Session {self.index}: question {self.remaining}")
+        self.sent_at = time.perf_counter()
+        self.chat.send_message()
+        handle = self.chat.pending_request
+        handle.finished.connect(lambda *_: self._done(ok=True))
+        handle.failed.connect(lambda *_: self._done(ok=False))
+        handle.cancelled.connect(lambda: self._done(ok=False))
+
+    def _done(self, ok):
+        self.latencies.append(time.perf_counter() - self.sent_at)
+        if not ok:
+            self.errors += 1
+        elif self.chat.first_token_latency is not None:
+            self.first_chunk.append(self.chat.first_token_latency)
+        QTimer.singleShot(0, self.send_next)
+
+
+def run(args, base_url):
+    app = QApplication(sys.argv[:1])
+
+    from core.config import ConfigManager
+    from core.request_engine import get_engine
+    from plugins.pilot import ChatBox
+
+    config = ConfigManager()
+    config.config.update({
+        "llm": "gemini", "api_key": "mock-key", "stream": args.stream, "cache_enabled": False,
+        "base_urls": {"gemini": base_url}, "stall_watchdog": False,
+        "transport": {"pool_maxsize": max(args.sessions, 8)},
+    })
+    if not args.respect_rate_limits:
+        config.config["rate_limits"] = {"gemini": {"rate": 1e6, "burst": 1e6}}
+        config.config["max_concurrency"] = {"gemini": args.sessions}
+    config.save()
+    get_engine().pool.setMaxThreadCount(max(args.sessions, 8))
+
+    lag = {"max": 0.0, "late_ticks": 0, "ticks": 0, "expected": time.perf_counter()}
+    def tick():
+        now = time.perf_counter()
+        late = (now - lag["expected"]) * 1000
+        lag["ticks"] += 1
+        lag["max"] = max(lag["max"], late)
+        lag["late_ticks"] += late > FRAME_MS
+        lag["expected"] = now + LAG_INTERVAL_MS / 1000
+    lag_timer = QTimer()
+    lag_timer.setTimerType(Qt.TimerType.PreciseTimer)
+    lag_timer.timeout.connect(tick)
+
+    done = []
+    def on_done(session):
+        done.append(session)
+        if len(done) == len(sessions):
+            app.quit()
+
+    sessions = [Session(i, ChatBox(config), args.prompts, on_done) for i in range(args.sessions)]
+    app.processEvents()
+    start = time.perf_counter()
+    lag["expected"] = start + LAG_INTERVAL_MS / 1000
+    lag_timer.start(LAG_INTERVAL_MS)
+    for session in sessions:
+        QTimer.singleShot(0, session.send_next)
+    QTimer.singleShot(int(args.timeout * 1000), app.quit)
+    app.exec()
+    elapsed = time.perf_counter() - start
+    return sessions, elapsed, lag
+
+
+def report(sessions, elapsed, lag, server_stats):
+    latencies = [v for s in sessions for v in s.latencies]
+    first = [v for s in sessions for v in s.first_chunk]
+    ms = lambda v: None if v is None else round(v * 1000, 1)
+    result = {
+        "sessions": len(sessions),
+        "requests": len(latencies),
+        "errors": sum(s.errors for s in sessions),
+        "elapsed_s": round(elapsed, 2),
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else None,
+        "latency_ms": {"p50": ms(percentile(latencies, 50)), "p99": ms(percentile(latencies, 99)),
+                       "max": ms(max(latencies, default=None))},
+        "first_chunk_ms": {"p50": ms(percentile(first, 50)), "p99": ms(percentile(first, 99))},
+        "event_loop": {"max_lag_ms": round(lag["max"], 1), "late_ticks": lag["late_ticks"], "ticks": lag["ticks"]},
+        "ui_time_per_session_ms": [{"session": s.index, "total": ms(s.ui_time), "max": ms(s.ui_max)}
+                                   for s in sessions],
+        "server": server_stats,
+    }
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=10)
+    parser.add_argument("--prompts", type=int, default=5, help="prompts per session")
+    parser.add_argument("--no-stream", dest="stream", action="store_false")
+    parser.add_argument("--url", help="existing Gemini-compatible base URL (skips the mock server)")
+    parser.add_argument("--respect-rate-limits", action="store_true",
+                        help="keep the client-side scheduler limits instead of lifting them")
+    parser.add_argument("--timeout", type=float, default=300.0)
+    parser.add_argument("--json", help="write the report to this file")
+    add_options(parser)
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    server = None
+    if args.url:
+        base_url = args.url
+    else:
+        server = MockGeminiServer(options_from_args(args)).start()
+        base_url = server.base_url
+
+    # Config, caches and history go to a throwaway directory
+    json_path = os.path.abspath(args.json) if args.json else None
+    os.chdir(tempfile.mkdtemp(prefix="nova-load-"))
+    sessions, elapsed, lag = run(args, base_url)
+    result = report(sessions, elapsed, lag, dict(server.stats) if server else None)
+    if server:
+        server.shutdown()
+
+    ui = result.pop("ui_time_per_session_ms")
+    print(json.dumps(result, indent=2))
+    worst = max(ui, key=lambda s: s["total"])
+    print(f"UI thread time per session: max total {worst['total']} ms (session {worst['session']}), "
+          f"longest handler {max(s['max'] for s in ui)} ms")
+    if json_path:
+        result["ui_time_per_session_ms"] = ui
+        with open(json_path, "w") as f:
+            json.dump(result, f, indent=2)
+    return 0 if result["requests"] == args.sessions * args.prompts else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
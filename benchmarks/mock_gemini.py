@@ -0,0 +1,215 @@
+# benchmarks/mock_gemini.py
+"""
+Local stand-in for the Gemini API (generateContent and streamGenerateContent
+with alt=sse), with configurable latency, throughput, errors and response
+sizes. Point Pilot at it with
+
+    "base_urls": {"gemini": "http://127.0.0.1:8089/v1beta"}
+
+    python -m benchmarks.mock_gemini --port 8089 --latency lognormal:300,0.5 --rate-429 0.05
+
+Distributions are written kind:params in milliseconds (or characters for
+--size): fixed:100, uniform:50,300, normal:200,40, lognormal:200,0.5 (median,
+sigma), exp:150 (mean).
+"""
+import re, json, math, time, random, argparse, threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+PATH_RE = re.compile(r"^/v1beta/models/([^/:]+):(generateContent|streamGenerateContent)$")
+WORDS = ("lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod tempor "
+         "incididunt ut labore et dolore magna aliqua").split()
+
+
+def parse_dist(spec):
+    """Return a sampler for a distribution spec such as 'uniform:50,300'."""
+    kind, _, params = str(spec).partition(":")
+    if not params:
+        kind, params = "fixed", kind
+    values = [float(v) for v in params.split(",")]
+    samplers = {
+        "fixed": lambda rng: values[0],
+        "uniform": lambda rng: rng.uniform(values[0], values[1]),
+        "normal": lambda rng: rng.gauss(values[0], values[1]),
+        "lognormal": lambda rng: values[0] * math.exp(rng.gauss(0, values[1])),
+        "exp": lambda rng: rng.expovariate(1 / values[0]) if values[0] else 0.0,
+    }
+    if kind not in samplers:
+        raise ValueError(f"unknown distribution {kind!r}")
+    sampler = samplers[kind]
+    return lambda rng: max(sampler(rng), 0.0)
+
+
+def make_text(chars, rng):
+    words = []
+    size = 0
+    while size < chars:
+        word = rng.choice(WORDS)
+        words.append(word)
+        size += len(word) + 1
+    return " ".join(words)[:max(int(chars), 1)]
+
+
+class MockOptions:
+    def __init__(self, latency="fixed:0", size="fixed:400", throughput=0.0, chunk_chars=40,
+                 error_rate=0.0, rate_429=0.0, retry_after=1.0, seed=None):
+        self.latency = parse_dist(latency)       # ms until the response starts
+        self.size = parse_dist(size)             # characters of reply text
+        self.throughput = throughput             # characters per second, 0 = unlimited
+        self.chunk_chars = max(int(chunk_chars), 1)
+        self.error_rate = error_rate             # fraction answered with HTTP 500
+        self.rate_429 = rate_429                 # fraction answered with HTTP 429
+        self.retry_after = retry_after
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+
+    def draw(self):
+        """(outcome, latency seconds, reply chars) for one request."""
+        with self.lock:
+            roll = self.rng.random()
+            outcome = "429" if roll < self.rate_429 else "500" if roll < self.rate_429 + self.error_rate else "ok"
+            return outcome, self.latency(self.rng) / 1000, int(self.size(self.rng)), random.Random(self.rng.random())
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        server = self.server
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length)
+        path, _, query = self.path.partition("?")
+        match = PATH_RE.match(path)
+        if match is None:
+            return self._error(404, "NOT_FOUND", f"Unknown path {path}")
+        if not self.headers.get("X-goog-api-key") and "key=" not in query:
+            return self._error(403, "PERMISSION_DENIED", "API key missing")
+        try:
+            json.loads(body or b"{}")
+        except ValueError:
+            return self._error(400, "INVALID_ARGUMENT", "Invalid JSON payload")
+
+        outcome, latency, chars, rng = server.options.draw()
+        server.count("requests")
+        time.sleep(latency)
+        if outcome == "429":
+            server.count("rate_limited")
+            return self._error(429, "RESOURCE_EXHAUSTED", "Resource has been exhausted",
+                               {"Retry-After": f"{server.options.retry_after:g}"})
+        if outcome == "500":
+            server.count("errors")
+            return self._error(500, "INTERNAL", "Internal error")
+
+        text = make_text(chars, rng)
+        prompt_tokens = len(body) // 4
+        if match.group(2) == "streamGenerateContent":
+            self._stream(text, prompt_tokens)
+        else:
+            self._pace(len(text))
+            self._send_json(200, _reply(text, (prompt_tokens, len(text) // 4)))
+        server.count("completed")
+
+    def _stream(self, text, prompt_tokens):
+        options = self.server.options
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for start in range(0, len(text), options.chunk_chars):
+            piece = text[start:start + options.chunk_chars]
+            self._pace(len(piece))
+            usage = (prompt_tokens, (start + len(piece)) // 4)  # running totals, like Gemini
+            event = f"data: {json.dumps(_reply(piece, usage))}\r\n\r\n".encode("utf-8")
+            self.wfile.write(f"{len(event):x}\r\n".encode() + event + b"\r\n")
+            self.wfile.flush()
+            self.server.count("bytes", len(event))
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _pace(self, chars):
+        if self.server.options.throughput > 0:
+            time.sleep(chars / self.server.options.throughput)
+
+    def _send_json(self, status, payload, headers=None):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+        self.server.count("bytes", len(data))
+
+    def _error(self, status, code, message, headers=None):
+        self._send_json(status, {"error": {"code": status, "message": message, "status": code}}, headers)
+
+
+def _reply(text, usage=None):
+    reply = {"candidates": [{"content": {"role": "model", "parts": [{"text": text}]},
+                             "finishReason": "STOP"}]}
+    if usage is not None:
+        reply["usageMetadata"] = {"promptTokenCount": usage[0], "candidatesTokenCount": usage[1],
+                                  "totalTokenCount": sum(usage)}
+    return reply
+
+
+class MockGeminiServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, options=None, host="127.0.0.1", port=0):
+        super().__init__((host, port), _Handler)
+        self.options = options or MockOptions()
+        self.stats = {"requests": 0, "completed": 0, "rate_limited": 0, "errors": 0, "bytes": 0}
+        self.stats_lock = threading.Lock()
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1beta"
+
+    def count(self, name, amount=1):
+        with self.stats_lock:
+            self.stats[name] += amount
+
+    def start(self):
+        """Serve on a daemon thread; returns self."""
+        threading.Thread(target=self.serve_forever, name="mock-gemini", daemon=True).start()
+        return self
+
+
+def add_options(parser):
+    parser.add_argument("--latency", default="fixed:0", help="time to first byte (ms)")
+    parser.add_argument("--size", default="fixed:400", help="reply length (characters)")
+    parser.add_argument("--throughput", type=float, default=0.0, help="characters per second (0 = unlimited)")
+    parser.add_argument("--chunk-chars", type=int, default=40, help="characters per SSE event")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of HTTP 500 replies")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="fraction of HTTP 429 replies")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After seconds on 429")
+    parser.add_argument("--seed", type=int, default=None)
+
+
+def options_from_args(args):
+    return MockOptions(args.latency, args.size, args.throughput, args.chunk_chars,
+                       args.error_rate, args.rate_429, args.retry_after, args.seed)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    add_options(parser)
+    args = parser.parse_args(argv)
+    server = MockGeminiServer(options_from_args(args), args.host, args.port)
+    print(f"Mock Gemini API on {server.base_url}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(json.dumps(server.stats))
+
+
+if __name__ == "__main__":
+    main()
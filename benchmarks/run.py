@@ -0,0 +1,136 @@
+# benchmarks/run.py
+"""
+Headless benchmark suite (QT_QPA_PLATFORM=offscreen).
+
+    python -m benchmarks.run                  # run, write results, compare
+    python -m benchmarks.run --save-baseline  # also store the results as the baseline
+    python -m benchmarks.run --only ui --quick
+
+Each benchmark runs in a fresh interpreter and an empty working directory.
+Results (median of --repeat samples) go to benchmarks/results/latest.json;
+with a benchmarks/baseline.json present, metrics that are worse than the
+baseline by more than --tolerance are listed and the exit status is 1.
+Baselines are machine specific; record one on the machine you compare on.
+"""
+import os, sys, json, time, argparse, platform, subprocess, statistics
+from benchmarks.common import ROOT_DIR, bench_env, fresh_dir
+from benchmarks.startup import bench_startup, bench_plugin_load
+
+BENCH_DIR = os.path.join(ROOT_DIR, "benchmarks")
+RESULTS_FILE = os.path.join(BENCH_DIR, "results", "latest.json")
+BASELINE_FILE = os.path.join(BENCH_DIR, "baseline.json")
+DEFAULT_TOLERANCE = 0.25
+SUITES = ("startup", "plugins", "ui")
+
+
+class Recorder:
+    def __init__(self):
+        self.samples = {}   # name -> ([values], unit, better)
+
+    def __call__(self, name, value, unit, better="lower"):
+        values, _, _ = self.samples.setdefault(name, ([], unit, better))
+        values.append(value)
+
+    def results(self):
+        return {name: {"value": statistics.median(values), "min": min(values), "max": max(values),
+                       "samples": len(values), "unit": unit, "better": better}
+                for name, (values, unit, better) in sorted(self.samples.items())}
+
+
+def run_ui(record, repeat, sizes):
+    with fresh_dir() as cwd:
+        proc = subprocess.run([sys.executable, "-m", "benchmarks.ui", "--repeat", str(repeat),
+                               "--sizes", ",".join(map(str, sizes))],
+                              cwd=cwd, env=bench_env(), capture_output=True, text=True, timeout=1800)
+    if proc.returncode != 0:
+        raise RuntimeError(f"UI benchmarks failed:\n{proc.stderr}")
+    for name, value, unit, better in json.loads(proc.stdout.strip().splitlines()[-1])["samples"]:
+        record(name, value, unit, better)
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR,
+                              capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def compare(results, baseline, tolerance):
+    """Rows of (name, baseline, current, change, regressed) for metrics in both."""
+    rows = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if not base or not base["value"]:
+            continue
+        change = result["value"] / base["value"] - 1
+        worse = change if result["better"] == "lower" else -change
+        rows.append((name, base["value"], result["value"], change, worse > tolerance))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--only", action="append", choices=SUITES, help="run only these suites")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--quick", action="store_true", help="skip the 100k-message transcript")
+    parser.add_argument("--output", default=RESULTS_FILE)
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    args = parser.parse_args(argv)
+
+    suites = args.only or SUITES
+    sizes = [1000, 10000] if args.quick else [1000, 10000, 100000]
+    record = Recorder()
+    started = time.time()
+
+    if "startup" in suites:
+        print("Running startup benchmarks...", flush=True)
+        bench_startup(record, args.repeat)
+    if "plugins" in suites:
+        print("Running plugin load benchmarks...", flush=True)
+        from core.plugin_loader import DESIRED_ORDER
+        bench_plugin_load(record, args.repeat, DESIRED_ORDER)
+    if "ui" in suites:
+        print("Running UI benchmarks...", flush=True)
+        run_ui(record, args.repeat, sizes)
+
+    results = record.results()
+    report = {
+        "meta": {"timestamp": started, "revision": git_revision(), "python": platform.python_version(),
+                 "platform": platform.platform(), "repeat": args.repeat, "suites": list(suites)},
+        "results": results,
+    }
+    os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    regressions = []
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+        print(f"\n{'metric':48} {'baseline':>12} {'current':>12} {'change':>8}")
+        for name, base, current, change, regressed in compare(results, baseline, args.tolerance):
+            flag = "  REGRESSION" if regressed else ""
+            print(f"{name:48} {base:12.1f} {current:12.1f} {change:+8.1%}{flag}")
+            if regressed:
+                regressions.append(name)
+    else:
+        for name, result in results.items():
+            print(f"{name:48} {result['value']:12.1f} {result['unit']}")
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+
+    if regressions:
+        print(f"\n{len(regressions)} metric(s) regressed by more than {args.tolerance:.0%}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,54 @@
+# benchmarks/startup.py
+import os, re, sys, json, time, subprocess
+from benchmarks.common import ROOT_DIR, bench_env, fresh_dir
+
+VISIBLE_RE = re.compile(r"Time to sidebar visible: ([\d.]+) ms")
+IMPORT_SNIPPET = """
+import json, time
+from core.plugin_loader import load_plugins
+start = time.perf_counter()
+plugins = load_plugins()
+discovery = time.perf_counter() - start
+start = time.perf_counter()
+plugins[{name!r}].load()
+print(json.dumps({{"discovery": discovery, "import": time.perf_counter() - start}}))
+"""
+
+
+def run_main(cwd):
+    """Start main.py until the sidebar is first painted; returns (visible ms, wall ms)."""
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, os.path.join(ROOT_DIR, "main.py"), "--exit-after-startup"],
+                          cwd=cwd, env=bench_env(), capture_output=True, text=True, timeout=120)
+    wall = (time.perf_counter() - start) * 1000
+    match = VISIBLE_RE.search(proc.stdout)
+    if proc.returncode != 0 or match is None:
+        raise RuntimeError(f"main.py failed:\n{proc.stdout}\n{proc.stderr}")
+    return float(match.group(1)), wall
+
+
+def bench_startup(record, repeat):
+    """Cold start (empty config/cache) and warm start (manifest and icon cache present)."""
+    for _ in range(repeat):
+        with fresh_dir() as cwd:
+            visible, wall = run_main(cwd)
+            record("startup.cold.time_to_visible", visible, "ms")
+            record("startup.cold.process_wall", wall, "ms")
+            visible, wall = run_main(cwd)
+            record("startup.warm.time_to_visible", visible, "ms")
+            record("startup.warm.process_wall", wall, "ms")
+
+
+def bench_plugin_load(record, repeat, names):
+    """Discovery plus the import of each plugin, in a fresh interpreter per sample."""
+    for _ in range(repeat):
+        with fresh_dir() as cwd:
+            for i, name in enumerate(names):
+                proc = subprocess.run([sys.executable, "-c", IMPORT_SNIPPET.format(name=name)],
+                                      cwd=cwd, env=bench_env(), capture_output=True, text=True, timeout=120)
+                if proc.returncode != 0:
+                    raise RuntimeError(f"importing {name} failed:\n{proc.stderr}")
+                result = json.loads(proc.stdout.strip().splitlines()[-1])
+                # The first process in a fresh directory has to build the manifest
+                record(f"plugins.discovery.{'cold' if i == 0 else 'warm'}", result["discovery"] * 1000, "ms")
+                record(f"plugins.import.{name}", result["import"] * 1000, "ms")
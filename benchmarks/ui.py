@@ -0,0 +1,82 @@
+# benchmarks/ui.py
+"""
+In-process UI benchmarks; run by benchmarks/run.py in a fresh working
+directory (python -m benchmarks.ui --repeat N --sizes 1000,10000).
+Prints one JSON object with the samples on the last line of stdout.
+"""
+import sys, json, time, argparse
+from PyQt6.QtWidgets import QApplication
+
+SENDERS = ("You", "AI")
+TEXT = ("The quick brown fox jumps over the lazy dog. " * 3).strip()
+
+
+def settle(app):
+    """Let pending layout and paint events run."""
+    app.processEvents()
+    app.processEvents()
+
+
+def bench_open_window(app, record, repeat):
+    from core.config import ConfigManager
+    from core.plugin_loader import load_plugins
+    from core.sidebar import FloatingSidebar
+
+    config = ConfigManager()
+    sidebar = FloatingSidebar(load_plugins(), config)
+    sidebar.show()
+    settle(app)
+    for name, cls in sidebar.plugins.items():
+        if sidebar.supervisor.hosts(name):
+            continue  # its window lives in another process
+        # First open imports the plugin and builds the window; later opens reuse it
+        for attempt in range(repeat + 1):
+            start = time.perf_counter()
+            window = sidebar.open_window(cls, name)
+            settle(app)
+            elapsed = (time.perf_counter() - start) * 1000
+            record(f"open_window.{'first' if attempt == 0 else 'reopen'}.{name}", elapsed, "ms")
+            window.close()
+            settle(app)
+    sidebar.window_manager.dispose_all()
+
+
+def bench_display_message(app, record, repeat, sizes):
+    from core.config import ConfigManager
+    from plugins.pilot import ChatBox
+
+    config = ConfigManager()
+    for size in sizes:
+        for _ in range(repeat):
+            chat = ChatBox(config)
+            chat.show()
+            settle(app)
+            start = time.perf_counter()
+            for i in range(size):
+                chat.display_message(SENDERS[i % 2], f"{i}: {TEXT}")
+            chat.chat_area.scroll_to_bottom()
+            settle(app)
+            elapsed = time.perf_counter() - start
+            record(f"display_message.{size}.throughput", size / elapsed, "msg/s", "higher")
+            record(f"display_message.{size}.total", elapsed * 1000, "ms")
+            chat.close()
+            chat.deleteLater()
+            settle(app)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--sizes", default="1000,10000,100000")
+    args = parser.parse_args(argv)
+
+    app = QApplication(sys.argv[:1])
+    samples = []
+    record = lambda name, value, unit, better="lower": samples.append([name, value, unit, better])
+    bench_open_window(app, record, args.repeat)
+    bench_display_message(app, record, args.repeat, [int(s) for s in args.sizes.split(",") if s])
+    print(json.dumps({"samples": samples}))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,37 @@
 # core/base_plugin.py
 from abc import ABC, abstractmethod
 
-class BasePlugin(ABC):
+# Window policies a plugin module can declare with PLUGIN_POLICY
+POLICY_SINGLETON = "singleton"  # one window, hidden on close and re-shown on click
+POLICY_POOLED = "pooled"        # closed windows are recycled up to PLUGIN_POOL_SIZE
+POLICY_MULTI = "multi"          # a fresh window per click, destroyed on close
+
+# Where a plugin runs, declared with PLUGIN_HOSTING (or per plugin with the
+# "plugin_hosting" config key)
+HOSTING_IN_PROCESS = "inprocess"  # in the sidebar's interpreter and event loop
+HOSTING_PROCESS = "process"       # in a supervised worker process (core/plugin_host.py)
+
+
+class PluginLifecycle:
+    """
+    Optional lifecycle hooks called by the window manager. Plugin windows
+    can mix this in (or just define the methods); all hooks default to no-ops.
+    """
+
+    def on_prewarm(self):
+        """Called once after the window was built hidden, ahead of first use."""
+
+    def on_show(self):
+        """Called right before the window is shown (fresh, pooled or singleton)."""
+
+    def on_hide(self):
+        """Called when the window is closed but kept alive for reuse."""
+
+    def dispose(self):
+        """Called before the window is destroyed; release external resources."""
+
+
+class BasePlugin(PluginLifecycle, ABC):
     """
     Base plugin class. Plugins must subclass this class.
     Each plugin should accept a ConfigManager in its constructor.
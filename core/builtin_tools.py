@@ -0,0 +1,132 @@
+# core/builtin_tools.py
+"""
+Local tools offered to the LLM. They run in tool engine worker processes,
+so they take and return plain JSON values and import nothing from Qt.
+"""
+import os, re, ast, math, fnmatch, operator
+
+MAX_MATCHES = 50
+MAX_FILE_BYTES = 2 * 1024 * 1024   # larger files are skipped by file_search
+
+
+_OPERATORS = {
+    ast.Add: operator.add, ast.Sub: operator.sub, ast.Mult: operator.mul, ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv, ast.Mod: operator.mod, ast.Pow: operator.pow,
+    ast.USub: operator.neg, ast.UAdd: operator.pos,
+}
+_FUNCTIONS = {name: getattr(math, name) for name in (
+    "sqrt", "log", "log10", "log2", "exp", "sin", "cos", "tan", "asin", "acos", "atan",
+    "floor", "ceil", "factorial", "gcd")}
+_FUNCTIONS.update(abs=abs, round=round, min=min, max=max)
+_CONSTANTS = {"pi": math.pi, "e": math.e, "tau": math.tau}
+
+
+def _evaluate(node):
+    if isinstance(node, ast.Expression):
+        return _evaluate(node.body)
+    if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)):
+        return node.value
+    if isinstance(node, ast.BinOp) and type(node.op) in _OPERATORS:
+        left, right = _evaluate(node.left), _evaluate(node.right)
+        if isinstance(node.op, ast.Pow) and abs(right) > 10000:
+            raise ValueError("exponent too large")
+        return _OPERATORS[type(node.op)](left, right)
+    if isinstance(node, ast.UnaryOp) and type(node.op) in _OPERATORS:
+        return _OPERATORS[type(node.op)](_evaluate(node.operand))
+    if isinstance(node, ast.Name) and node.id in _CONSTANTS:
+        return _CONSTANTS[node.id]
+    if (isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id in _FUNCTIONS
+            and not node.keywords):
+        return _FUNCTIONS[node.func.id](*[_evaluate(arg) for arg in node.args])
+    raise ValueError(f"unsupported expression: {ast.dump(node)[:60]}")
+
+
+def calculator(expression):
+    """Evaluate an arithmetic expression (no names other than math functions)."""
+    return _evaluate(ast.parse(expression, mode="eval"))
+
+
+def file_search(folder, pattern="*", contains="", max_results=MAX_MATCHES):
+    """Files below folder whose name matches pattern and, optionally, contain a string."""
+    folder = os.path.expanduser(folder)
+    if not os.path.isdir(folder):
+        raise ValueError(f"not a folder: {folder}")
+    needle = contains.lower()
+    matches = []
+    for root, dirs, names in os.walk(folder):
+        dirs[:] = [d for d in dirs if not d.startswith(".")]
+        for name in fnmatch.filter(names, pattern):
+            path = os.path.join(root, name)
+            match = {"path": os.path.relpath(path, folder)}
+            if needle:
+                try:
+                    if os.path.getsize(path) > MAX_FILE_BYTES:
+                        continue
+                    with open(path, encoding="utf-8", errors="replace") as f:
+                        for number, line in enumerate(f, 1):
+                            if needle in line.lower():
+                                match.update(line=number, text=line.strip()[:200])
+                                break
+                        else:
+                            continue
+                except OSError:
+                    continue
+            matches.append(match)
+            if len(matches) >= int(max_results):
+                return {"matches": matches, "truncated": True}
+    return {"matches": matches, "truncated": False}
+
+
+def text_stats(text):
+    """Character, word, line and sentence counts."""
+    return {"characters": len(text), "words": len(text.split()), "lines": len(text.splitlines()),
+            "sentences": len(re.findall(r"[.!?]+(?:\s|$)", text))}
+
+
+TRANSFORMS = {
+    "upper": str.upper, "lower": str.lower, "title": str.title,
+    "reverse": lambda text: text[::-1],
+    "sort_lines": lambda text: "\n".join(sorted(text.splitlines())),
+    "unique_lines": lambda text: "\n".join(dict.fromkeys(text.splitlines())),
+    "strip_lines": lambda text: "\n".join(line.strip() for line in text.splitlines()),
+}
+
+
+def text_transform(text, operation):
+    """Apply one of TRANSFORMS to text."""
+    if operation not in TRANSFORMS:
+        raise ValueError(f"unknown operation {operation!r}, expected one of {', '.join(TRANSFORMS)}")
+    return TRANSFORMS[operation](text)
+
+
+def regex_find(pattern, text, max_results=MAX_MATCHES):
+    """All matches of a regular expression (with their groups)."""
+    found = []
+    for match in re.finditer(pattern, text):
+        found.append({"match": match.group(0), "start": match.start(), "groups": list(match.groups())})
+        if len(found) >= int(max_results):
+            break
+    return {"matches": found}
+
+
+def _string(description):
+    return {"type": "string", "description": description}
+
+
+# (name, function, description, parameters, required)
+BUILTIN_TOOLS = [
+    ("calculator", calculator, "Evaluate an arithmetic expression, e.g. 'sqrt(2) * (3 + 4) ** 2'.",
+     {"expression": _string("The expression to evaluate")}, ["expression"]),
+    ("file_search", file_search, "Find files by name pattern and optionally by contained text.",
+     {"folder": _string("Folder to search"), "pattern": _string("Glob for file names, e.g. '*.py'"),
+      "contains": _string("Only files containing this text (case-insensitive)"),
+      "max_results": {"type": "integer", "description": "Maximum number of files returned"}}, ["folder"]),
+    ("text_stats", text_stats, "Count characters, words, lines and sentences of a text.",
+     {"text": _string("The text to measure")}, ["text"]),
+    ("text_transform", text_transform, "Transform text: " + ", ".join(TRANSFORMS) + ".",
+     {"text": _string("The text to transform"), "operation": {"type": "string", "enum": list(TRANSFORMS)}},
+     ["text", "operation"]),
+    ("regex_find", regex_find, "Find all matches of a Python regular expression in a text.",
+     {"pattern": _string("Regular expression"), "text": _string("Text to search"),
+      "max_results": {"type": "integer", "description": "Maximum number of matches"}}, ["pattern", "text"]),
+]
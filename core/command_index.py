@@ -0,0 +1,156 @@
+# core/command_index.py
+import threading, itertools
+from array import array
+from collections import defaultdict
+
+INDEXED_CHARS = 96       # only the start of long titles (e.g. prompts) is indexed
+CANDIDATE_LIMIT = 1500   # newest entries checked for an exact match per query
+FUZZY_LIMIT = 500        # newest candidates scored when too few match exactly
+FUZZY_GRAMS = 12         # rarest query trigrams used for fuzzy matching
+MIN_OVERLAP = 0.5        # share of the query's trigrams a fuzzy match must contain
+
+
+def normalize(text):
+    return " ".join(text.casefold().split())
+
+
+def trigrams(text):
+    padded = f" {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class Entry:
+    __slots__ = ("kind", "title", "detail", "action", "weight", "text")
+
+    def __init__(self, kind, title, detail, action, weight):
+        self.kind = kind
+        self.title = title
+        self.detail = detail
+        self.action = action
+        self.weight = weight
+        self.text = normalize(title)[:INDEXED_CHARS]
+
+
+class CommandIndex:
+    """
+    Fuzzy search over palette entries. Titles are indexed by trigram (and
+    by 1-2 character word prefixes for short queries) in append-only
+    posting arrays, so adding an entry is cheap and a query only scores
+    entries that share one of its rarest trigrams. Pinned entries (the
+    fixed commands) are few and scored on every query, however old. Re-adding
+    a key replaces the older entry. Safe to fill from a worker thread while
+    searching.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.entries = []                   # id -> Entry, None once replaced
+        self.keys = {}                      # key -> id
+        self.pinned = []                    # ids scored on every query
+        self.grams = defaultdict(lambda: array("I"))
+        self.prefixes = defaultdict(lambda: array("I"))
+
+    def __len__(self):
+        return len(self.keys)
+
+    def add(self, kind, title, detail="", action=None, weight=0.0, key=None, pinned=False):
+        self.add_many([(kind, title, detail, action, weight, key)], pinned)
+
+    def add_many(self, items, pinned=False):
+        """Add (kind, title, detail, action, weight, key) tuples; a repeated key replaces its entry."""
+        with self.lock:
+            if pinned:
+                self.pinned = [i for i in self.pinned if self.entries[i] is not None]
+            for kind, title, detail, action, weight, key in items:
+                key = key if key is not None else (kind, title)
+                old = self.keys.get(key)
+                if old is not None:
+                    self.entries[old] = None
+                entry_id = self.keys[key] = len(self.entries)
+                entry = Entry(kind, title, detail, action, weight)
+                self.entries.append(entry)
+                if pinned:
+                    self.pinned.append(entry_id)
+                for gram in trigrams(entry.text):
+                    self.grams[gram].append(entry_id)
+                for prefix in {word[:n] for word in entry.text.split() for n in (1, 2)}:
+                    self.prefixes[prefix].append(entry_id)
+
+    def search(self, query, limit=20):
+        """Best matching entries, best first."""
+        query = normalize(query)
+        with self.lock:
+            entries = self.entries
+            if not query:
+                pinned = sorted((entries[i] for i in self.pinned if entries[i] is not None),
+                                key=lambda entry: -entry.weight)
+                ids = range(len(entries) - 1, -1, -1)
+                recent = (entry for entry in (entries[i] for i in ids) if entry is not None)
+                return [entry for _, entry in zip(range(limit), itertools.chain(
+                    pinned, (entry for entry in recent if entry not in pinned)))]
+            if len(query) < 3:
+                candidates = self._newest([self.prefixes.get(query, ())])
+                grams = ()
+            else:
+                postings = sorted(((self.grams.get(gram, ()), gram) for gram in trigrams(query)),
+                                  key=lambda item: len(item[0]))
+                candidates = [i for i in self._newest([postings[0][0]])
+                              if entries[i] is not None and query in entries[i].text]
+                grams = ()
+                # Exact matches always outrank fuzzy ones, so fuzzy matching is
+                # only needed when there are not enough of them
+                if len(candidates) < limit:
+                    postings = postings[:FUZZY_GRAMS]
+                    grams = [gram for _, gram in postings]
+                    # An entry holding MIN_OVERLAP of the grams holds one of the rarest n - needed + 1
+                    needed = max(1, int(len(grams) * MIN_OVERLAP + 0.999))
+                    candidates = self._newest([posting for posting, _ in postings[:len(grams) - needed + 1]],
+                                              FUZZY_LIMIT)
+            total = len(entries)
+            scored = []
+            seen = set()
+            # Pinned entries always get the full fuzzy match
+            pinned_grams = trigrams(query) if len(query) >= 3 else ()
+            for entry_id, entry_grams in itertools.chain(((i, grams) for i in candidates),
+                                                         ((i, pinned_grams) for i in self.pinned)):
+                entry = entries[entry_id]
+                if entry is None or entry_id in seen:
+                    continue
+                seen.add(entry_id)
+                score = self._score(entry, query, entry_grams)
+                if score is not None:
+                    # Ties go to the newer entry
+                    scored.append((score + entry.weight + entry_id / total, entry_id))
+        scored.sort(reverse=True)
+        return [entries[entry_id] for _, entry_id in scored[:limit]]
+
+    @staticmethod
+    def _newest(postings, limit=CANDIDATE_LIMIT):
+        """Union of the posting arrays, newest ids first, at most limit."""
+        if len(postings) == 1:
+            return postings[0][-limit:][::-1]
+        ids = set()
+        for posting in postings:
+            ids.update(posting[-limit:])
+        return sorted(ids, reverse=True)[:limit]
+
+    @staticmethod
+    def _score(entry, query, grams):
+        text = entry.text
+        position = text.find(query)
+        if position >= 0:
+            score = 100.0
+            if position == 0:
+                score += 30
+            elif text[position - 1] == " ":
+                score += 15
+        elif grams:
+            padded = f" {text} "
+            overlap = sum(gram in padded for gram in grams) / len(grams)
+            if overlap < MIN_OVERLAP:
+                return None
+            score = 80.0 * overlap
+        else:
+            return None
+        # Shorter titles are closer matches
+        return score - len(text) / 20
@@ -0,0 +1,226 @@
+# core/command_palette.py
+import time
+from PyQt6.QtWidgets import QWidget, QVBoxLayout, QLineEdit, QListWidget, QListWidgetItem, QApplication
+from PyQt6.QtCore import Qt, QTimer, QEvent
+from core.command_index import CommandIndex
+from core.conversation_store import get_store
+from core.request_engine import get_engine
+from core.metrics import get_metrics
+
+PILOT = "Pilot"
+RESULT_ROWS = 12
+HISTORY_BATCH = 250      # prompts added per index lock, so searches never wait long
+PLUGIN_WEIGHT = 40       # commands outrank prompts that merely start with the query
+SETTING_WEIGHT = 35
+# config key -> (what it switches, default)
+TOGGLES = {
+    "stream": ("streaming replies", True),
+    "cache_enabled": ("the response cache", True),
+    "hedge_requests": ("hedged requests", False),
+    "tools_enabled": ("tool calls", False),
+    "attach_docs": ("attaching docs passages", False),
+}
+
+PALETTE_STYLE = """
+    QWidget#commandPalette {
+        background-color: #f5f5f5;
+        border: 1px solid #dcdcdc;
+        border-radius: 8px;
+    }
+    QLineEdit {
+        padding: 8px;
+        font-size: 14px;
+        border: 1px solid #bdc3c7;
+        border-radius: 4px;
+    }
+    QListWidget {
+        border: none;
+        background: transparent;
+    }
+    QListWidget::item:selected {
+        background-color: #3498db;
+        color: white;
+    }
+"""
+
+
+class CommandPalette(QWidget):
+    """
+    Keyboard launcher over plugins, past Pilot prompts and settings actions.
+    Entries live in a CommandIndex; prompt history is loaded into it on a
+    worker thread, newest first and then incrementally on each show.
+    Searches run once per event-loop turn, so a burst of keystrokes costs
+    one search rather than one each. Provider actions are added on first
+    show: core.providers pulls in the HTTP stack, which stays off startup.
+    """
+
+    def __init__(self, sidebar):
+        super().__init__(None, Qt.WindowType.Popup | Qt.WindowType.FramelessWindowHint)
+        self.setObjectName("commandPalette")
+        self.setAttribute(Qt.WidgetAttribute.WA_StyledBackground)
+        self.setStyleSheet(PALETTE_STYLE)
+        self.setFixedWidth(560)
+        self.sidebar = sidebar
+        self.config_manager = sidebar.config_manager
+        self.index = CommandIndex()
+        self.results = []
+        self.last_prompt_id = 0
+        self.history_load = None
+        self.providers_added = False
+        self.search_seconds = get_metrics().histogram("palette_search_seconds", "Command palette search time")
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(8, 8, 8, 8)
+        self.input = QLineEdit()
+        self.input.setPlaceholderText("Open a plugin, reuse a prompt or change a setting…")
+        self.input.installEventFilter(self)
+        layout.addWidget(self.input)
+        self.list = QListWidget()
+        self.list.setFocusPolicy(Qt.FocusPolicy.NoFocus)
+        self.list.setUniformItemSizes(True)
+        self.list.itemActivated.connect(lambda item: self.activate(self.list.row(item)))
+        self.list.itemClicked.connect(lambda item: self.activate(self.list.row(item)))
+        layout.addWidget(self.list)
+
+        # Coalesces keystrokes: the search runs after pending input is handled
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(0)
+        self.search_timer.timeout.connect(self.update_results)
+        self.input.textChanged.connect(self.search_timer.start)
+
+        self.add_commands()
+
+    def add_commands(self):
+        items = []
+        for name, cls in self.sidebar.plugins.items():
+            items.append(("plugin", f"Open {name}", "Plugin",
+                          lambda c=cls, n=name: self.sidebar.open_window(c, n), PLUGIN_WEIGHT, None))
+        for key, (label, default) in TOGGLES.items():
+            items.append(("setting", f"Toggle {label}", "Settings",
+                          lambda k=key, d=default: self.config_manager.set(k, not self.config_manager.get(k, d)),
+                          SETTING_WEIGHT, None))
+        items.append(("setting", "Clear the response cache", "Settings",
+                      self.clear_cache, SETTING_WEIGHT, None))
+        items.append(("setting", "Collapse or expand the sidebar", "Settings",
+                      self.sidebar.toggle_sidebar, SETTING_WEIGHT, None))
+        # Pinned: scored on every query however many prompts are indexed after them
+        self.index.add_many(items, pinned=True)
+
+    def add_provider_commands(self):
+        from core.providers import PROVIDERS
+        self.providers_added = True
+        self.index.add_many([("setting", f"Use {name} as the provider", "Settings",
+                              lambda n=name: self.config_manager.set("llm", n), SETTING_WEIGHT, None)
+                             for name in PROVIDERS], pinned=True)
+
+    @staticmethod
+    def clear_cache():
+        from core.llm_cache import get_cache
+        get_cache().clear()
+
+    def refresh_history(self):
+        """Index Pilot prompts sent since the last load, on a worker thread."""
+        if self.history_load is not None:
+            return
+        after_id = self.last_prompt_id
+
+        def job(handle):
+            rows = get_store().recent_prompts(after_id=after_id)
+            # Oldest first: the index ranks later additions as newer
+            rows.reverse()
+            for start in range(0, len(rows), HISTORY_BATCH):
+                self.index.add_many([("prompt", text, time.strftime("%Y-%m-%d %H:%M", time.localtime(ts)),
+                                      None, 0.0, ("prompt", text))
+                                     for _, ts, text in rows[start:start + HISTORY_BATCH]])
+            return max((row[0] for row in rows), default=after_id)
+
+        handle = self.history_load = get_engine().submit(job, timeout=None)
+        handle.finished.connect(self.on_history_loaded)
+        handle.failed.connect(self.on_history_failed)
+
+    def on_history_loaded(self, last_id):
+        self.history_load = None
+        self.last_prompt_id = last_id
+        if self.isVisible():
+            self.update_results()
+
+    def on_history_failed(self, message):
+        self.history_load = None
+        print(f"⚠️ Command palette could not load prompt history: {message}")
+
+    def toggle(self):
+        if self.isVisible():
+            self.hide()
+            return
+        screen = QApplication.primaryScreen().availableGeometry()
+        self.move(screen.x() + (screen.width() - self.width()) // 2, screen.y() + screen.height() // 5)
+        if not self.providers_added:
+            self.add_provider_commands()
+        self.input.clear()
+        self.update_results()
+        self.show()
+        self.activateWindow()
+        self.input.setFocus()
+        self.refresh_history()
+
+    def update_results(self):
+        """Search and fill the list, reusing its rows."""
+        start = time.perf_counter()
+        self.results = self.index.search(self.input.text(), RESULT_ROWS)
+        self.search_seconds.observe(time.perf_counter() - start)
+        while self.list.count() > len(self.results):
+            self.list.takeItem(self.list.count() - 1)
+        for row, entry in enumerate(self.results):
+            title = entry.title.split("\n", 1)[0]
+            text = f"{title[:100]}…" if len(title) > 100 or "\n" in entry.title else title
+            if entry.detail:
+                text = f"{text}    ·  {entry.detail}"
+            item = self.list.item(row)
+            if item is None:
+                self.list.addItem(QListWidgetItem(text))
+            elif item.text() != text:
+                item.setText(text)
+        self.list.setCurrentRow(0 if self.results else -1)
+        self.list.setFixedHeight(self.list.sizeHintForRow(0) * len(self.results) + 4 if self.results else 0)
+        self.adjustSize()
+
+    def activate(self, row):
+        if not 0 <= row < len(self.results):
+            return
+        entry = self.results[row]
+        self.hide()
+        if entry.kind == "prompt":
+            self.use_prompt(entry.title)
+        else:
+            entry.action()
+
+    def use_prompt(self, text):
+        """Put a past prompt in Pilot's input, ready to edit or send."""
+        cls = self.sidebar.plugins.get(PILOT)
+        window = self.sidebar.open_window(cls, PILOT) if cls is not None else None
+        user_input = getattr(window, "user_input", None)
+        if user_input is None:
+            # Pilot runs out of process (or is not installed): hand it over via the clipboard
+            QApplication.clipboard().setText(text)
+            return
+        user_input.setText(text)
+        user_input.setFocus()
+
+    def eventFilter(self, obj, event):
+        if obj is self.input and event.type() == QEvent.Type.KeyPress:
+            key = event.key()
+            if key in (Qt.Key.Key_Down, Qt.Key.Key_Up) and self.results:
+                step = 1 if key == Qt.Key.Key_Down else -1
+                self.list.setCurrentRow((self.list.currentRow() + step) % len(self.results))
+                return True
+            if key in (Qt.Key.Key_Return, Qt.Key.Key_Enter):
+                if self.search_timer.isActive():
+                    self.search_timer.stop()
+                    self.update_results()
+                self.activate(self.list.currentRow())
+                return True
+            if key == Qt.Key.Key_Escape:
+                self.hide()
+                return True
+        return False
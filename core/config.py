@@ -1,25 +1,193 @@
-import os, json
+import os, json, copy, threading
+from types import MappingProxyType
+from PyQt6.QtCore import QObject, QTimer, QFileSystemWatcher, pyqtSignal
 
 CONFIG_DIR = "config"
 CONFIG_FILE = os.path.join(CONFIG_DIR, "config.json")
+CACHE_DIR = os.path.join(CONFIG_DIR, "cache")
+DATA_DIR = os.path.join(CONFIG_DIR, "data")
+
+DEFAULT_CONFIG = {"llm": "gemini", "api_key": ""}
+SAVE_DEBOUNCE = 0.3     # seconds; saves within this window are written once
+RELOAD_DEBOUNCE = 100   # ms; editors often write a file in several steps
+
+
+def freeze(value):
+    """Read-only deep view of a JSON value: dicts become mapping proxies, lists tuples."""
+    if isinstance(value, dict):
+        return MappingProxyType({key: freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+def write_atomic(path, text):
+    """Write text to path so that readers see either the old or the new file, never half."""
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+class ConfigManager(QObject):
+    """
+    The application config, kept in config/config.json.
+
+    Callers edit the `config` dict and call save(); the file is written
+    atomically on a background thread, coalescing bursts of saves. External
+    edits to the file are picked up by a watcher. Both paths emit `changed`
+    with the set of top-level keys that differ, and `valueChanged` per key.
+    Hot paths and worker threads should read snapshot(), an immutable view
+    of the last saved or loaded config.
+    """
+
+    changed = pyqtSignal(object)            # frozenset of changed top-level keys
+    valueChanged = pyqtSignal(str, object)  # key, new value (None if removed)
+    saveFailed = pyqtSignal(str)
+
+    def __init__(self, path=CONFIG_FILE):
+        super().__init__()
+        self.path = path
+        self.config = copy.deepcopy(DEFAULT_CONFIG)
+        self._committed = copy.deepcopy(self.config)
+        self._snapshot = freeze(self._committed)
+
+        # Background writer; only the newest pending text is ever written
+        self._lock = threading.Condition()
+        self._pending = None            # (version, text) waiting to be written
+        self._version = 0
+        self._write_lock = threading.Lock()
+        self._written = (0, None)       # (version, text) last on disk
+        self._writer = threading.Thread(target=self._write_loop, name="config-writer", daemon=True)
+        self._writer.start()
 
-class ConfigManager:
-    def __init__(self):
-        self.config = {"llm": "gemini", "api_key": ""}
         self.load()
 
+        self._reload_timer = QTimer(self)
+        self._reload_timer.setSingleShot(True)
+        self._reload_timer.timeout.connect(self.reload)
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.fileChanged.connect(self._on_file_event)
+        self.watcher.directoryChanged.connect(self._on_file_event)
+        self._watch()
+
+    # -- reading --------------------------------------------------------------
+
+    def snapshot(self):
+        """Immutable view of the committed config; safe to share across threads."""
+        return self._snapshot
+
+    def get(self, key, default=None):
+        return self._snapshot.get(key, default)
+
     def load(self):
-        if not os.path.exists(CONFIG_DIR):
-            os.makedirs(CONFIG_DIR)
-        if os.path.exists(CONFIG_FILE):
-            try:
-                with open(CONFIG_FILE, "r") as f:
-                    self.config = json.load(f)
-            except Exception:
-                pass
+        """Read the file if it exists; a corrupt file keeps the current config."""
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        if not os.path.exists(self.path):
+            return False
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                text = f.read()
+            data = json.loads(text)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Could not read {self.path}, keeping current settings: {e}")
+            return False
+        if not isinstance(data, dict):
+            print(f"⚠️ Ignoring {self.path}: expected a JSON object")
+            return False
+        with self._write_lock:
+            self._written = (self._written[0], text)
+        self.config = data
+        self._commit()
+        return True
+
+    def reload(self):
+        """Re-read the file after an external edit."""
+        self._watch()
+        with self._lock:
+            if self._pending is not None:
+                return  # our own save is about to overwrite it
+        self.load()
+
+    # -- writing --------------------------------------------------------------
 
     def save(self):
-        if not os.path.exists(CONFIG_DIR):
-            os.makedirs(CONFIG_DIR)
-        with open(CONFIG_FILE, "w") as f:
-            json.dump(self.config, f, indent=2)
+        """Commit the current `config` and schedule an atomic write."""
+        text = json.dumps(self.config, indent=2)
+        self._commit()
+        with self._lock:
+            self._version += 1
+            self._pending = (self._version, text)
+            self._lock.notify()
+
+    def set(self, key, value):
+        self.config[key] = value
+        self.save()
+
+    def flush(self):
+        """Write any pending save now (call before exiting)."""
+        with self._lock:
+            pending, self._pending = self._pending, None
+        if pending is not None:
+            self._write(*pending)
+
+    def _write_loop(self):
+        while True:
+            with self._lock:
+                while self._pending is None:
+                    self._lock.wait()
+                # Debounce: wait until saves stop arriving
+                pending = None
+                while pending is not self._pending and self._pending is not None:
+                    pending = self._pending
+                    self._lock.wait(SAVE_DEBOUNCE)
+                if pending is not self._pending:
+                    continue  # flushed meanwhile
+                self._pending = None
+            self._write(*pending)
+
+    def _write(self, version, text):
+        with self._write_lock:
+            if version <= self._written[0] or text == self._written[1]:
+                return
+            try:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                write_atomic(self.path, text)
+                self._written = (version, text)
+            except OSError as e:
+                print(f"⚠️ Failed to save settings: {e}")
+                self.saveFailed.emit(str(e))
+
+    # -- change tracking -------------------------------------------------------
+
+    def _commit(self):
+        old = self._committed
+        new = copy.deepcopy(self.config)
+        keys = frozenset(key for key in old.keys() | new.keys() if old.get(key) != new.get(key))
+        self._committed = new
+        self._snapshot = freeze(new)
+        if keys:
+            for key in sorted(keys):
+                self.valueChanged.emit(key, self._snapshot.get(key))
+            self.changed.emit(keys)
+
+    def _watch(self):
+        # An atomic replace drops the file from the watcher, so re-add it
+        directory = os.path.dirname(self.path) or "."
+        for path in (self.path, directory):
+            if os.path.exists(path) and path not in self.watcher.files() + self.watcher.directories():
+                self.watcher.addPath(path)
+
+    def _on_file_event(self, path):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                text = f.read()
+        except OSError:
+            return
+        with self._write_lock:
+            if text == self._written[1]:
+                self._watch()
+                return  # our own write (or an unrelated file in the directory)
+        self._reload_timer.start(RELOAD_DEBOUNCE)
@@ -0,0 +1,94 @@
+# core/context_builder.py
+
+DEFAULT_TOKEN_BUDGET = 8000
+CHARS_PER_TOKEN = 4      # rough average for English text with the Gemini tokenizer
+TURN_OVERHEAD = 4        # role / framing tokens per turn
+
+USER = "user"
+MODEL = "model"
+
+
+def estimate_tokens(text):
+    """Cheap token estimate; good enough for budgeting, never sent to the API."""
+    return TURN_OVERHEAD + (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+class Turn:
+    __slots__ = ("role", "text", "tokens")
+
+    def __init__(self, role, text):
+        self.role = role
+        self.text = text
+        self.tokens = estimate_tokens(text)  # computed once per turn
+
+
+class ConversationContext:
+    """
+    Structured turn history for one chat session. build_request() assembles
+    a Gemini payload that fits the token budget: the system prompt and the
+    first exchange are always kept, then as many of the newest turns as fit.
+    """
+
+    def __init__(self, system_prompt="", budget=DEFAULT_TOKEN_BUDGET):
+        self.system_prompt = system_prompt
+        self.budget = budget
+        self.turns = []
+        self.total_tokens = 0
+
+    def add_user(self, text):
+        return self._add(USER, text)
+
+    def add_model(self, text):
+        return self._add(MODEL, text)
+
+    def _add(self, role, text):
+        turn = Turn(role, text)
+        self.turns.append(turn)
+        self.total_tokens += turn.tokens
+        return turn
+
+    def clear(self):
+        self.turns = []
+        self.total_tokens = 0
+
+    def select_turns(self, budget=None):
+        """Return (turns, token count) that fit the budget, in conversation order."""
+        budget = self.budget if budget is None else budget
+        used = estimate_tokens(self.system_prompt) if self.system_prompt else 0
+
+        # Pin the first exchange (first user turn and the reply to it)
+        pinned = self.turns[:2] if len(self.turns) > 2 and self.turns[1].role == MODEL else self.turns[:1]
+        used += sum(turn.tokens for turn in pinned)
+
+        # Sliding window from the newest turn backwards; the newest turn is
+        # always sent even if it alone exceeds the budget
+        window = []
+        for turn in reversed(self.turns[len(pinned):]):
+            if window and used + turn.tokens > budget:
+                break
+            window.append(turn)
+            used += turn.tokens
+        window.reverse()
+
+        # A window must not open with a model reply to a dropped prompt
+        while window and window[0].role == MODEL and len(pinned) + len(window) < len(self.turns):
+            used -= window.pop(0).tokens
+
+        return pinned + window, used
+
+    def build_request(self, budget=None):
+        """Gemini generateContent payload for the current history."""
+        turns, _ = self.select_turns(budget)
+        contents = []
+        for turn in turns:
+            # Consecutive turns with the same role (e.g. after a failed
+            # request) are merged into one multi-part content
+            if contents and contents[-1]["role"] == turn.role:
+                contents[-1]["parts"].append({"text": turn.text})
+            else:
+                contents.append({"role": turn.role, "parts": [{"text": turn.text}]})
+
+        payload = {"contents": contents}
+        if self.system_prompt:
+            payload["systemInstruction"] = {"parts": [{"text": self.system_prompt}]}
+        return payload
@@ -0,0 +1,282 @@
+# core/conversation_store.py
+import os, sys, json, time, uuid, queue, sqlite3, argparse, threading
+from core.config import DATA_DIR
+
+HISTORY_FILE = os.path.join(DATA_DIR, "history.sqlite3")
+BATCH_SIZE = 500          # max messages per write transaction
+BATCH_WINDOW = 0.05       # seconds to wait for more messages before committing
+EXPORT_CHUNK = 1000       # rows fetched per round trip while exporting
+SEARCH_WINDOW = 20000     # newest matches considered when ranking a search
+RECENT_PROMPTS = 100000   # distinct past prompts offered by the command palette
+
+_STOP = object()
+
+
+class ConversationStore:
+    """
+    Append-only history of every Pilot exchange, stored in SQLite (WAL) with
+    an FTS5 index. Writes are queued and committed in batches on a
+    background thread; reads use a connection per calling thread.
+    """
+
+    def __init__(self, path=HISTORY_FILE):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.local = threading.local()
+        self.queue = queue.Queue()
+
+        db = self._connect()
+        db.executescript("""
+            CREATE TABLE IF NOT EXISTS sessions (
+                id TEXT PRIMARY KEY,
+                created REAL NOT NULL,
+                title TEXT
+            );
+            CREATE TABLE IF NOT EXISTS messages (
+                id INTEGER PRIMARY KEY,
+                session_id TEXT NOT NULL,
+                ts REAL NOT NULL,
+                sender TEXT NOT NULL,
+                text TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS messages_session ON messages(session_id, id);
+        """)
+        try:
+            db.executescript("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts
+                    USING fts5(text, content='messages', content_rowid='id');
+                CREATE TRIGGER IF NOT EXISTS messages_ai AFTER INSERT ON messages BEGIN
+                    INSERT INTO messages_fts(rowid, text) VALUES (new.id, new.text);
+                END;
+            """)
+            self.has_fts = True
+        except sqlite3.OperationalError:
+            print("⚠️ SQLite was built without FTS5; history search falls back to LIKE")
+            self.has_fts = False
+
+        self.writer = threading.Thread(target=self._write_loop, name="history-writer", daemon=True)
+        self.writer.start()
+
+    def _connect(self):
+        db = getattr(self.local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=10)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self.local.db = db
+        return db
+
+    # -- writes (never block the caller) --------------------------------------
+
+    def new_session(self, title=None):
+        """Start a session and return its id."""
+        session_id = uuid.uuid4().hex
+        self.queue.put(("session", (session_id, time.time(), title)))
+        return session_id
+
+    def record(self, session_id, sender, text):
+        """Queue one message for the background writer."""
+        self.queue.put(("message", (session_id, time.time(), sender, text)))
+
+    def flush(self):
+        """Block until every queued write has been committed."""
+        self.queue.join()
+
+    def close(self):
+        self.queue.put(_STOP)
+        self.writer.join(timeout=5)
+
+    def _write_loop(self):
+        db = self._connect()
+        while True:
+            item = self.queue.get()
+            batch = [item]
+            deadline = time.monotonic() + BATCH_WINDOW
+            while item is not _STOP and len(batch) < BATCH_SIZE:
+                try:
+                    item = self.queue.get(timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    break
+                batch.append(item)
+
+            try:
+                with db:
+                    for entry in batch:
+                        if entry is _STOP:
+                            continue
+                        kind, row = entry
+                        if kind == "session":
+                            db.execute("INSERT OR IGNORE INTO sessions (id, created, title) VALUES (?, ?, ?)", row)
+                        else:
+                            db.execute("INSERT INTO messages (session_id, ts, sender, text) VALUES (?, ?, ?, ?)", row)
+            except sqlite3.Error as e:
+                print(f"⚠️ Failed to write conversation history: {e}")
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+            if any(entry is _STOP for entry in batch):
+                db.close()
+                return
+
+    # -- reads ----------------------------------------------------------------
+
+    def search(self, query, limit=50, session_id=None):
+        """
+        Full-text search over all messages, best matches first. Returns dicts
+        with id, session_id, ts, sender, text and a highlighted snippet.
+        """
+        terms = query.split()
+        if not terms:
+            return []
+        db = self._connect()
+        where = "AND m.session_id = ?" if session_id else ""
+        if self.has_fts:
+            # Rank only the newest SEARCH_WINDOW matches (of the session, if
+            # given) so that very common terms cannot force a bm25 pass over
+            # the entire history
+            match = " ".join('"{}"'.format(term.replace('"', '""')) for term in terms)
+            if session_id:
+                window = """SELECT messages_fts.rowid FROM messages_fts JOIN messages w ON w.id = messages_fts.rowid
+                            WHERE messages_fts MATCH ? AND w.session_id = ?"""
+                window_params = [match, session_id]
+            else:
+                window = "SELECT rowid FROM messages_fts WHERE messages_fts MATCH ?"
+                window_params = [match]
+            params = [match] + window_params + [SEARCH_WINDOW] + ([session_id] if session_id else []) + [limit]
+            rows = db.execute(f"""
+                SELECT m.id, m.session_id, m.ts, m.sender, m.text,
+                       snippet(messages_fts, 0, '[', ']', '…', 12)
+                FROM messages_fts JOIN messages m ON m.id = messages_fts.rowid
+                WHERE messages_fts MATCH ? AND messages_fts.rowid >= (
+                    SELECT COALESCE(MIN(rowid), 0) FROM ({window} ORDER BY 1 DESC LIMIT ?))
+                {where}
+                ORDER BY bm25(messages_fts) LIMIT ?
+            """, params).fetchall()
+        else:
+            clauses = " AND ".join("m.text LIKE ?" for _ in terms)
+            params = [f"%{term}%" for term in terms] + ([session_id] if session_id else []) + [limit]
+            rows = db.execute(f"""
+                SELECT m.id, m.session_id, m.ts, m.sender, m.text, substr(m.text, 1, 120)
+                FROM messages m WHERE {clauses} {where}
+                ORDER BY m.id DESC LIMIT ?
+            """, params).fetchall()
+        keys = ("id", "session_id", "ts", "sender", "text", "snippet")
+        return [dict(zip(keys, row)) for row in rows]
+
+    def recent_prompts(self, limit=RECENT_PROMPTS, after_id=0):
+        """
+        (id, ts, text) of distinct user prompts newer than after_id, newest
+        first; id and ts are those of the prompt's latest use.
+        """
+        return self._connect().execute("""
+            SELECT MAX(id), MAX(ts), text FROM messages
+            WHERE sender = 'You' AND id > ?
+            GROUP BY text ORDER BY MAX(id) DESC LIMIT ?
+        """, (after_id, limit)).fetchall()
+
+    def session_messages(self, session_id):
+        """Yield (sender, text) for one session in order, without loading it all."""
+        for _, sender, text in self._session_rows(session_id):
+            yield sender, text
+
+    def export(self, out, fmt="jsonl", session_id=None):
+        """
+        Stream the history (or one session) to a text file object as JSONL
+        or Markdown, sessions in the order they were started. Each session is
+        read through the messages_session index in chunks, so memory use
+        stays flat; returns the number of messages written.
+        """
+        db = self._connect()
+        if session_id:
+            sessions = [session_id]
+        else:
+            # Messages whose session row is missing come first, as they sort before any created time
+            orphans = db.execute("""
+                SELECT DISTINCT session_id FROM messages
+                WHERE session_id NOT IN (SELECT id FROM sessions)""").fetchall()
+            created = db.execute("SELECT id FROM sessions ORDER BY created, id").fetchall()
+            sessions = [row[0] for row in orphans + created]
+
+        count = 0
+        for sid in sessions:
+            header = fmt != "jsonl"
+            for ts, sender, text in self._session_rows(sid):
+                if fmt == "jsonl":
+                    out.write(json.dumps({"session": sid, "ts": ts, "sender": sender, "text": text}) + "\n")
+                else:
+                    if header:
+                        stamp = time.strftime("%Y-%m-%d %H:%M", time.localtime(ts))
+                        out.write(f"\n## Session {sid[:8]} ({stamp})\n\n")
+                        header = False
+                    out.write(f"**{sender}:** {text}\n\n")
+                count += 1
+        return count
+
+    def _session_rows(self, session_id):
+        cursor = self._connect().execute(
+            "SELECT ts, sender, text FROM messages WHERE session_id = ? ORDER BY id", (session_id,))
+        while True:
+            rows = cursor.fetchmany(EXPORT_CHUNK)
+            if not rows:
+                return
+            yield from rows
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """Return the process-wide conversation store."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ConversationStore()
+        return _store
+
+
+def close_store():
+    """Commit pending writes and stop the writer, if the store was ever opened."""
+    global _store
+    with _store_lock:
+        if _store is not None:
+            _store.close()
+            _store = None
+
+
+def main(argv=None):
+    """Search or export the conversation history from the command line."""
+    parser = argparse.ArgumentParser(prog="python -m core.conversation_store", description=main.__doc__)
+    parser.add_argument("--db", default=HISTORY_FILE, help="history database (default: %(default)s)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    search = commands.add_parser("search", help="full-text search, best matches first")
+    search.add_argument("query")
+    search.add_argument("--limit", type=int, default=20)
+    search.add_argument("--session", help="only this session id")
+    export = commands.add_parser("export", help="stream the history to a file ('-' for stdout)")
+    export.add_argument("output")
+    export.add_argument("--format", choices=("jsonl", "markdown"), default="jsonl")
+    export.add_argument("--session", help="only this session id")
+    args = parser.parse_args(argv)
+
+    store = ConversationStore(args.db)
+    try:
+        if args.command == "search":
+            for hit in store.search(args.query, args.limit, args.session):
+                stamp = time.strftime("%Y-%m-%d %H:%M", time.localtime(hit["ts"]))
+                print(f"{stamp}  {hit['session_id'][:8]}  {hit['sender']}: {hit['snippet']}")
+        elif args.output == "-":
+            count = store.export(sys.stdout, args.format, args.session)
+            print(f"{count} messages exported", file=sys.stderr)
+        else:
+            with open(args.output, "w", encoding="utf-8") as out:
+                count = store.export(out, args.format, args.session)
+            print(f"{count} messages exported to {args.output}", file=sys.stderr)
+    finally:
+        store.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,357 @@
+# core/doc_index.py
+import os, re, json, math, mmap, heapq, struct, threading, multiprocessing
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from core.config import CACHE_DIR
+
+try:
+    from pypdf import PdfReader
+except ImportError:  # PDFs are indexed only once converted to .txt
+    PdfReader = None
+
+INDEX_FILE = os.path.join(CACHE_DIR, "doc_index.bin")
+INDEX_VERSION = 1
+MAGIC = b"NOVAIDX1"
+TEXT_EXTENSIONS = (".md", ".markdown", ".txt", ".rst")
+PASSAGE_CHARS = 1200      # passages are packed from paragraphs up to this size
+MAX_WORKERS = 4
+K1, B = 1.2, 0.75         # BM25 parameters
+
+# Header: magic, version, then (offset, length) of each section
+SECTIONS = 7
+HEADER = struct.Struct("<8sI" + "QQ" * SECTIONS)
+PASSAGE = struct.Struct("<QII")    # text offset, text length, file number
+TERM = struct.Struct("<QIQI")      # term offset, term length, postings start, document frequency
+
+TOKEN_RE = re.compile(r"\w+")
+STOPWORDS = frozenset("""a an and are as at be but by for from has have how i if in is it its of on or
+that the this to was were what when where which who why will with you your""".split())
+
+
+def tokenize(text):
+    return [t for t in TOKEN_RE.findall(text.lower()) if t not in STOPWORDS]
+
+
+def read_document(path):
+    if path.lower().endswith(".pdf"):
+        return "\n\n".join(page.extract_text() or "" for page in PdfReader(path).pages)
+    with open(path, encoding="utf-8", errors="replace") as f:
+        return f.read()
+
+
+def split_passages(text):
+    """Pack paragraphs into passages of about PASSAGE_CHARS characters."""
+    passages, current = [], ""
+    for paragraph in re.split(r"\n\s*\n", text):
+        paragraph = paragraph.strip()
+        while len(paragraph) > PASSAGE_CHARS:
+            cut = paragraph.rfind(" ", 0, PASSAGE_CHARS)
+            cut = cut if cut > PASSAGE_CHARS // 2 else PASSAGE_CHARS
+            if current:
+                passages.append(current)
+                current = ""
+            passages.append(paragraph[:cut].strip())
+            paragraph = paragraph[cut:].strip()
+        if not paragraph:
+            continue
+        if current and len(current) + len(paragraph) + 2 > PASSAGE_CHARS:
+            passages.append(current)
+            current = ""
+        current = f"{current}\n\n{paragraph}" if current else paragraph
+    if current:
+        passages.append(current)
+    return passages
+
+
+def analyze_file(path):
+    """
+    Process-pool worker: [(passage text, {term: frequency}, length in terms)].
+    Returns None when the file cannot be read.
+    """
+    try:
+        text = read_document(path)
+    except Exception as e:
+        print(f"⚠️ Failed to read {path}: {e}")
+        return None
+    result = []
+    for passage in split_passages(text):
+        terms = tokenize(passage)
+        counts = {}
+        for term in terms:
+            counts[term] = counts.get(term, 0) + 1
+        result.append((passage, counts, len(terms)))
+    return result
+
+
+def scan_folder(root):
+    """{relative path: (mtime_ns, size)} of every indexable file below root."""
+    extensions = TEXT_EXTENSIONS + ((".pdf",) if PdfReader is not None else ())
+    files = {}
+    for folder, dirs, names in os.walk(root):
+        dirs[:] = [d for d in dirs if not d.startswith(".")]
+        for name in names:
+            if name.lower().endswith(extensions):
+                path = os.path.join(folder, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue  # broken link, or not readable
+                files[os.path.relpath(path, root)] = (st.st_mtime_ns, st.st_size)
+    return files
+
+
+class DocIndex:
+    """
+    Read-only BM25 index over passages of a document folder, memory-mapped
+    from a single file: opening it reads only the header and the file list,
+    and a query touches just the term table and its postings. close()
+    releases the mapping (Windows cannot replace a mapped file).
+    """
+
+    def __init__(self, path=INDEX_FILE):
+        self.path = path
+        self.lock = threading.Lock()     # close() waits for running searches
+        with open(path, "rb") as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, *sections = HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC or version != INDEX_VERSION:
+            raise ValueError(f"{path} is not a version {INDEX_VERSION} document index")
+        meta, self.passages, self.text, lengths, self.terms, self.term_blob, postings = (
+            (sections[i], sections[i + 1]) for i in range(0, 2 * SECTIONS, 2))
+        self.meta = json.loads(self.map[meta[0]:meta[0] + meta[1]])
+        self.root = self.meta["root"]
+        self.files = self.meta["files"]          # [relative path, mtime_ns, size]
+        self.count = self.passages[1] // PASSAGE.size
+        self.term_count = self.terms[1] // TERM.size
+        self.avg_length = self.meta["avg_length"] or 1.0
+        self.view = memoryview(self.map)
+        self.lengths = self.view[lengths[0]:lengths[0] + lengths[1]].cast("I")     # terms per passage
+        self.postings = self.view[postings[0]:postings[0] + postings[1]].cast("I")  # (passage, tf) pairs
+
+    def close(self):
+        with self.lock:
+            if self.map is None:
+                return
+            for view in (self.lengths, self.postings, self.view):
+                view.release()
+            self.map.close()
+            self.map = None
+
+    def term(self, i):
+        """(term bytes, postings start, document frequency) of term i."""
+        offset, length, start, df = TERM.unpack_from(self.map, self.terms[0] + i * TERM.size)
+        base = self.term_blob[0] + offset
+        return self.map[base:base + length], start, df
+
+    def lookup(self, word):
+        """(postings start, document frequency) for a term, or None."""
+        key = word.encode("utf-8")
+        low, high = 0, self.term_count
+        while low < high:
+            mid = (low + high) // 2
+            term, start, df = self.term(mid)
+            if term < key:
+                low = mid + 1
+            elif term > key:
+                high = mid
+            else:
+                return start, df
+        return None
+
+    def passage_bytes(self, i):
+        """(file number, UTF-8 text) of passage i."""
+        offset, length, file_no = PASSAGE.unpack_from(self.map, self.passages[0] + i * PASSAGE.size)
+        base = self.text[0] + offset
+        return file_no, self.map[base:base + length]
+
+    def passage(self, i):
+        """(relative path, passage text) of passage i."""
+        file_no, text = self.passage_bytes(i)
+        return self.files[file_no][0], text.decode("utf-8")
+
+    def search(self, query, k=5):
+        """Top k passages for query as dicts with path, text and score, best first."""
+        with self.lock:
+            if self.map is None:
+                return []  # closed by a rebuild; get_index() has the new one
+            return self._search(query, k)
+
+    def _search(self, query, k):
+        scores = {}
+        lengths, scale = self.lengths, K1 * B / self.avg_length
+        for word in set(tokenize(query)):
+            found = self.lookup(word)
+            if found is None:
+                continue
+            start, df = found
+            idf = math.log(1 + (self.count - df + 0.5) / (df + 0.5))
+            entries = self.postings[start * 2:(start + df) * 2]
+            for j in range(0, len(entries), 2):
+                doc, tf = entries[j], entries[j + 1]
+                norm = K1 * (1 - B) + scale * lengths[doc]
+                scores[doc] = scores.get(doc, 0.0) + idf * tf * (K1 + 1) / (tf + norm)
+        results = []
+        for doc, score in heapq.nlargest(k, scores.items(), key=lambda item: item[1]):
+            path, text = self.passage(doc)
+            results.append({"path": path, "text": text, "score": score})
+        return results
+
+    def postings_of(self, start, df):
+        entries = self.postings[start * 2:(start + df) * 2]
+        return [(entries[j], entries[j + 1]) for j in range(0, len(entries), 2)]
+
+
+def build_index(root, path=INDEX_FILE, progress=None, workers=MAX_WORKERS):
+    """
+    Index (or update the index of) a folder. Files whose mtime and size are
+    unchanged keep their passages and postings from the existing index;
+    only new and modified files are read, tokenized in a process pool.
+    Returns a dict of counts for the status line.
+    """
+    root = os.path.abspath(root)
+    files = scan_folder(root)
+    old = None
+    if os.path.exists(path):
+        try:
+            old = DocIndex(path)
+        except (ValueError, OSError, struct.error) as e:
+            print(f"⚠️ Rebuilding document index: {e}")
+    if old is not None and old.root != root:
+        old.close()
+        old = None
+    removed = sum(1 for rel, _, _ in old.files if rel not in files) if old is not None else 0
+
+    unchanged = {}
+    if old is not None:
+        for file_no, (rel, mtime, size) in enumerate(old.files):
+            if files.get(rel) == (mtime, size):
+                unchanged[file_no] = rel
+    changed = sorted(rel for rel in files if rel not in unchanged.values())
+    if old is not None and not changed and not removed:
+        old.close()
+        return {"files": len(old.files), "passages": old.count, "terms": old.term_count,
+                "updated": 0, "removed": 0}
+
+    # Passages of unchanged files keep their text and postings, renumbered
+    file_list, texts, lengths, owners = [], [], [], []
+    postings = {}
+    remap = {}
+    if old is not None and unchanged:
+        new_file_no = {}
+        for file_no, rel in unchanged.items():
+            new_file_no[file_no] = len(file_list)
+            file_list.append([rel, *files[rel]])
+        for i in range(old.count):
+            file_no, text = old.passage_bytes(i)
+            if file_no in new_file_no:
+                remap[i] = len(texts)
+                texts.append(text)
+                lengths.append(old.lengths[i])
+                owners.append(new_file_no[file_no])
+        for t in range(old.term_count):
+            term, start, df = old.term(t)
+            kept = [(remap[doc], tf) for doc, tf in old.postings_of(start, df) if doc in remap]
+            if kept:
+                postings[bytes(term)] = kept
+    if old is not None:
+        old.close()  # everything reused was copied out of the mapping
+
+    done = 0
+    if changed:
+        context = multiprocessing.get_context("spawn")
+        paths = [os.path.join(root, rel) for rel in changed]
+        with ProcessPoolExecutor(max_workers=min(workers, len(changed)), mp_context=context) as pool:
+            for rel, analyzed in zip(changed, pool.map(analyze_file, paths, chunksize=8)):
+                done += 1
+                if progress is not None:
+                    progress(done, len(changed))
+                if analyzed is None:
+                    continue
+                file_no = len(file_list)
+                file_list.append([rel, *files[rel]])
+                for passage, counts, terms in analyzed:
+                    doc = len(texts)
+                    texts.append(passage.encode("utf-8"))
+                    lengths.append(terms)
+                    owners.append(file_no)
+                    for term, tf in counts.items():
+                        postings.setdefault(term.encode("utf-8"), []).append((doc, tf))
+
+    _write_index(path, root, file_list, texts, lengths, owners, postings)
+    return {"files": len(file_list), "passages": len(texts), "terms": len(postings),
+            "updated": len(changed), "removed": removed}
+
+
+def _write_index(path, root, file_list, texts, lengths, owners, postings):
+    passage_table = bytearray()
+    offset = 0
+    for text, owner in zip(texts, owners):
+        passage_table += PASSAGE.pack(offset, len(text), owner)
+        offset += len(text)
+
+    term_table, term_blob, flat = bytearray(), bytearray(), array("I")
+    for term in sorted(postings):
+        entries = sorted(postings[term])
+        term_table += TERM.pack(len(term_blob), len(term), len(flat) // 2, len(entries))
+        term_blob += term
+        for doc, tf in entries:
+            flat.append(doc)
+            flat.append(tf)
+
+    meta = json.dumps({"root": root, "files": file_list,
+                       "avg_length": sum(lengths) / len(lengths) if lengths else 0.0}).encode("utf-8")
+    sections = [meta, bytes(passage_table), b"".join(texts), array("I", lengths).tobytes(),
+                bytes(term_table), bytes(term_blob), flat.tobytes()]
+    header, position = [], HEADER.size
+    for section in sections:
+        position += -position % 8  # keep the uint32 arrays aligned
+        header += [position, len(section)]
+        position += len(section)
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(HEADER.pack(MAGIC, INDEX_VERSION, *header))
+        for (start, _), section in zip(zip(header[::2], header[1::2]), sections):
+            f.write(b"\0" * (start - f.tell()))
+            f.write(section)
+        f.flush()
+        os.fsync(f.fileno())
+    _replace(tmp, path)
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_index():
+    """Return the process-wide document index, or None if none was built yet."""
+    global _index
+    with _index_lock:
+        if _index is None and os.path.exists(INDEX_FILE):
+            try:
+                _index = DocIndex(INDEX_FILE)
+            except (ValueError, OSError, struct.error) as e:
+                print(f"⚠️ Failed to open document index: {e}")
+        return _index
+
+
+def _replace(tmp, path):
+    """
+    os.replace(tmp, path), closing the live index first if it maps path
+    (Windows cannot replace a mapped file); reload_index() re-opens it.
+    """
+    global _index
+    with _index_lock:
+        if _index is not None and os.path.abspath(_index.path) == os.path.abspath(path):
+            _index.close()
+            _index = None
+        os.replace(tmp, path)
+
+
+def reload_index():
+    """Re-open the index after build_index() replaced it."""
+    global _index
+    with _index_lock:
+        _index = None
+    return get_index()
@@ -0,0 +1,216 @@
+# core/http_transport.py
+import gzip, json, random, threading, time
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from core.metrics import get_metrics, BYTES_BOUNDS
+
+RETRY_STATUSES = {500, 502, 503, 504}
+GZIP_MIN_BYTES = 1024
+
+DEFAULT_OPTIONS = {
+    "pool_connections": 4,   # number of provider hosts kept pooled
+    "pool_maxsize": 8,       # keep-alive connections per host
+    "retries": 2,
+    "backoff": 0.5,          # base delay in seconds, doubled per attempt
+    "max_backoff": 8.0,
+    "gzip_requests": False,  # compress request bodies above GZIP_MIN_BYTES
+    "http2": False,          # requires the optional httpx[http2] package
+}
+
+
+class TransportStats:
+    """Thread-safe counters describing how well connections are reused."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.connections = 0
+        self.retries = 0
+
+    def incr(self, name, amount=1):
+        with self.lock:
+            setattr(self, name, getattr(self, name) + amount)
+
+    def snapshot(self):
+        with self.lock:
+            reused = max(self.requests - self.connections, 0) if self.connections is not None else None
+            return {
+                "requests": self.requests,
+                "connections": self.connections,
+                "reused": reused,
+                "retries": self.retries,
+            }
+
+
+def _timed_connection(base):
+    class TimedConnection(base):
+        def connect(self):
+            # DNS lookup, TCP handshake and (for HTTPS) the TLS handshake
+            with get_metrics().histogram("http_connect_seconds", "DNS + TCP + TLS connect time",
+                                         host=self.host).time():
+                return super().connect()
+    return TimedConnection
+
+
+def _counting_pool(base, stats):
+    class CountingPool(base):
+        ConnectionCls = _timed_connection(base.ConnectionCls)
+
+        def _new_conn(self):
+            stats.incr("connections")
+            return super()._new_conn()
+    return CountingPool
+
+
+class _CountingAdapter(HTTPAdapter):
+    """HTTPAdapter whose connection pools report each new connection."""
+
+    def __init__(self, stats, **kwargs):
+        self.stats = stats
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _counting_pool(HTTPConnectionPool, self.stats),
+            "https": _counting_pool(HTTPSConnectionPool, self.stats),
+        }
+
+
+class HttpTransport:
+    """
+    One keep-alive HTTP client shared by every Pilot window.
+    Retries 5xx responses and connection resets with jittered exponential
+    backoff. Responses expose status_code, json(), iter_lines() and close()
+    for both the requests and the optional httpx (HTTP/2) backend.
+    """
+
+    def __init__(self, **options):
+        self.options = dict(DEFAULT_OPTIONS)
+        self.options.update({k: v for k, v in options.items() if k in DEFAULT_OPTIONS})
+        self.stats = TransportStats()
+        self.client = None
+
+        if self.options["http2"]:
+            try:
+                import httpx
+                self.client = httpx.Client(http2=True, limits=httpx.Limits(
+                    max_keepalive_connections=self.options["pool_maxsize"]))
+                self.stats.connections = None  # httpx does not expose connection creation
+            except ImportError:
+                print("⚠️ httpx[http2] not installed; using HTTP/1.1 keep-alive transport")
+
+        if self.client is None:
+            self.session = requests.Session()
+            adapter = _CountingAdapter(
+                self.stats,
+                pool_connections=self.options["pool_connections"],
+                pool_maxsize=self.options["pool_maxsize"],
+                max_retries=0,
+            )
+            self.session.mount("https://", adapter)
+            self.session.mount("http://", adapter)
+            self.session.headers["Accept-Encoding"] = "gzip, deflate"
+
+    def post(self, url, json_body=None, headers=None, params=None, stream=False, timeout=None):
+        """POST a JSON body, retrying transient failures. Caller closes the response."""
+        headers = dict(headers or {})
+        headers.setdefault("Content-Type", "application/json")
+        body = json.dumps(json_body).encode("utf-8") if json_body is not None else None
+        if body and self.options["gzip_requests"] and len(body) >= GZIP_MIN_BYTES:
+            body = gzip.compress(body)
+            headers["Content-Encoding"] = "gzip"
+
+        host = urlsplit(url).hostname or ""
+        metrics = get_metrics()
+        metrics.histogram("http_request_bytes", "Request body size", scale=1, bounds=BYTES_BOUNDS,
+                          host=host).observe(len(body or b""))
+
+        attempt = 0
+        while True:
+            self.stats.incr("requests")
+            try:
+                start = time.perf_counter()
+                response = self._send(url, body, headers, params, stream, timeout)
+                # With stream=True this returns as soon as the headers arrive
+                metrics.histogram("http_ttfb_seconds", "Time to response headers",
+                                  host=host).observe(time.perf_counter() - start)
+            except (requests.ConnectionError, ConnectionResetError):
+                if attempt >= self.options["retries"]:
+                    raise
+            else:
+                if response.status_code not in RETRY_STATUSES or attempt >= self.options["retries"]:
+                    return response
+                response.close()
+
+            attempt += 1
+            self.stats.incr("retries")
+            time.sleep(self._backoff(attempt))
+
+    def _send(self, url, body, headers, params, stream, timeout):
+        if self.client is not None:
+            import httpx
+            try:
+                request = self.client.build_request("POST", url, content=body, headers=headers,
+                                                    params=params, timeout=timeout)
+                response = self.client.send(request, stream=stream)
+            except httpx.TransportError as e:
+                raise requests.ConnectionError(str(e)) from e
+            return _HttpxResponse(response)
+        return self.session.post(url, data=body, headers=headers, params=params,
+                                 stream=stream, timeout=timeout)
+
+    def _backoff(self, attempt):
+        """Full-jitter exponential backoff."""
+        cap = min(self.options["max_backoff"], self.options["backoff"] * (2 ** (attempt - 1)))
+        return random.uniform(0, cap)
+
+    def close(self):
+        if self.client is not None:
+            self.client.close()
+        else:
+            self.session.close()
+
+
+class _HttpxResponse:
+    """Adapts an httpx response to the subset of the requests API we use."""
+
+    def __init__(self, response):
+        self.response = response
+        self.status_code = response.status_code
+        self.headers = response.headers
+
+    def json(self):
+        if not self.response.is_closed and not self.response.is_stream_consumed:
+            self.response.read()
+        return self.response.json()
+
+    def iter_lines(self, decode_unicode=False):
+        return self.response.iter_lines()
+
+    def iter_content(self, chunk_size=None):
+        return self.response.iter_bytes(chunk_size)
+
+    def close(self):
+        self.response.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+_transport = None
+_transport_lock = threading.Lock()
+
+
+def get_transport(options=None):
+    """Return the process-wide transport, creating it from options on first use."""
+    global _transport
+    with _transport_lock:
+        if _transport is None:
+            _transport = HttpTransport(**(options or {}))
+        return _transport
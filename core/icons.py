@@ -0,0 +1,190 @@
+# core/icons.py
+import os, hashlib
+from PyQt6.QtCore import Qt
+from PyQt6.QtGui import QColor, QFont, QFontDatabase, QFontInfo, QIcon, QPainter, QPixmap
+from core.config import CACHE_DIR
+
+ICON_CACHE_DIR = os.path.join(CACHE_DIR, "icons")
+ICON_FAMILY = "Material Icons"
+ICON_COLOR = "#ffffff"
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+FONT_PATHS = [
+    # Common installation paths for Material Icons
+    "C:/Windows/Fonts/MaterialIcons-Regular.ttf",
+    os.path.expanduser("~/.fonts/MaterialIcons-Regular.ttf"),
+    os.path.join(ROOT_DIR, "config", "MaterialIcons-Regular.ttf"),
+    os.path.join(ROOT_DIR, "MaterialIcons-Regular.ttf"),
+]
+
+# Material Icons code points per plugin name
+MATERIAL_ICONS = {
+    "Pilot": "\ue8e8",        # Chat icon
+    "Browser": "\ue89e",      # Public icon
+    "Notes": "\ue262",        # Notes icon
+    "Calculator": "\uf1ec",   # Calculate icon
+    "Settings": "\ue8b8",     # Settings icon
+    "Music": "\ue405",        # Music note icon
+    "Files": "\ue2c7",        # Folder icon
+    "Camera": "\ue3af",       # Camera icon
+    "Weather": "\ue63d",      # Weather icon
+    "Calendar": "\ue935",     # Calendar icon
+    "Mail": "\ue158",         # Mail icon
+    "Map": "\ue55f",          # Map icon
+    "Photos": "\ue413",       # Photo library icon
+    "Contacts": "\ue7fd",     # Contacts icon
+}
+DEFAULT_MATERIAL_ICON = "\ue88a"  # Apps icon
+
+# Fallback text icons if Material Icons not available
+FALLBACK_ICONS = {
+    "Pilot": "💬",        # Chat bubble
+    "Browser": "🌐",      # Globe
+    "Notes": "📝",        # Notepad
+    "Calculator": "🧮",   # Calculator
+    "Settings": "⚙️",     # Gear
+    "Music": "🎵",        # Music note
+    "Files": "📁",        # Folder
+    "Camera": "📷",       # Camera
+    "Weather": "☀️",      # Sun
+    "Calendar": "📅",     # Calendar
+    "Mail": "✉️",         # Envelope
+    "Map": "🗺️",          # Map
+    "Photos": "🖼️",       # Picture
+    "Contacts": "👤",     # Person
+}
+DEFAULT_FALLBACK_ICON = "📱"  # Smartphone
+
+
+def _file_hash(path):
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()[:16]
+
+
+class IconService:
+    """
+    Rasterizes sidebar icons once and keeps the pixmaps in memory and in
+    config/cache/icons, keyed by font hash, glyph, size and device pixel
+    ratio. The icon font is located once without enumerating installed
+    families, and is only registered with Qt when a pixmap is not cached.
+    """
+
+    def __init__(self, cache_dir=ICON_CACHE_DIR, font_paths=FONT_PATHS):
+        self.cache_dir = cache_dir
+        self.font_paths = font_paths
+        self.pixmaps = {}
+        self.font_path = None
+        self.font_hash = None   # None = not resolved yet, "" = no icon font
+        self.family = None
+        self.stats = {"memory": 0, "disk": 0, "rendered": 0}
+
+    def resolve(self):
+        """Find the icon font (once). Returns True if Material Icons is usable."""
+        if self.font_hash is None:
+            self.font_hash = ""
+            for path in self.font_paths:
+                if os.path.exists(path):
+                    try:
+                        self.font_hash = _file_hash(path)
+                        self.font_path = path
+                        break
+                    except OSError:
+                        continue
+            else:
+                # Installed system-wide: ask for the one family instead of listing all
+                if QFontInfo(QFont(ICON_FAMILY)).family() == ICON_FAMILY:
+                    self.font_hash = "system"
+                    self.family = ICON_FAMILY
+                else:
+                    print(f"⚠️ {ICON_FAMILY} font not found; using fallback icons")
+        return bool(self.font_hash)
+
+    def _icon_family(self):
+        # Registering the font is deferred until a glyph actually has to be drawn
+        if self.family is None:
+            font_id = QFontDatabase.addApplicationFont(self.font_path)
+            families = QFontDatabase.applicationFontFamilies(font_id) if font_id != -1 else []
+            if not families:
+                print(f"⚠️ Could not load {self.font_path}; using fallback icons")
+                self.font_hash = ""
+                return None
+            self.family = families[0]
+        return self.family
+
+    def pixmap(self, glyph, size, dpr=1.0, color=ICON_COLOR, emoji=False):
+        """Pixmap of a Material Icons glyph, or of text in the default font with emoji=True."""
+        use_font = not emoji and self.resolve()
+        font_key = self.font_hash if use_font else "emoji"
+        key = hashlib.sha1(f"{font_key}|{glyph}|{size}|{dpr:g}|{color}".encode()).hexdigest()
+
+        pixmap = self.pixmaps.get(key)
+        if pixmap is not None:
+            self.stats["memory"] += 1
+            return pixmap
+
+        path = os.path.join(self.cache_dir, key + ".png")
+        pixmap = QPixmap(path) if os.path.exists(path) else QPixmap()
+        if not pixmap.isNull():
+            self.stats["disk"] += 1
+        else:
+            family = self._icon_family() if use_font else None
+            if use_font and family is None:
+                return None  # font failed to load; the caller falls back to emoji
+            pixmap = self._render(glyph, size, dpr, color, family)
+            self.stats["rendered"] += 1
+            try:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                pixmap.save(path, "PNG")
+            except OSError as e:
+                print(f"⚠️ Failed to cache icon: {e}")
+        pixmap.setDevicePixelRatio(dpr)
+        self.pixmaps[key] = pixmap
+        return pixmap
+
+    def _render(self, glyph, size, dpr, color, family):
+        pixels = max(int(round(size * dpr)), 1)
+        pixmap = QPixmap(pixels, pixels)
+        pixmap.fill(Qt.GlobalColor.transparent)
+        font = QFont(family) if family else QFont()
+        # Emoji carry their own padding; glyph fonts fill the em square
+        font.setPixelSize(pixels if family else int(pixels * 0.8))
+        painter = QPainter(pixmap)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.setRenderHint(QPainter.RenderHint.TextAntialiasing)
+        painter.setFont(font)
+        painter.setPen(QColor(color))
+        painter.drawText(pixmap.rect(), Qt.AlignmentFlag.AlignCenter, glyph)
+        painter.end()
+        return pixmap
+
+    def plugin_icon(self, name, meta=None, size=24, dpr=1.0):
+        """
+        QIcon for a plugin button. PLUGIN_ICON may name an .svg file (relative
+        to the project), a Material Icons glyph or an emoji.
+        """
+        spec = (meta or {}).get("PLUGIN_ICON")
+        if isinstance(spec, str) and spec.lower().endswith(".svg"):
+            path = spec if os.path.isabs(spec) else os.path.join(ROOT_DIR, spec)
+            if os.path.exists(path):
+                return QIcon(path)
+            spec = None
+
+        is_glyph = isinstance(spec, str) and len(spec) == 1 and 0xE000 <= ord(spec) <= 0xF8FF
+        pixmap = None
+        if self.resolve() and (spec is None or is_glyph):
+            pixmap = self.pixmap(spec or MATERIAL_ICONS.get(name, DEFAULT_MATERIAL_ICON), size, dpr)
+        if pixmap is None:
+            emoji = spec if isinstance(spec, str) and spec and not is_glyph else FALLBACK_ICONS.get(name, DEFAULT_FALLBACK_ICON)
+            pixmap = self.pixmap(emoji, size, dpr, emoji=True)
+        return QIcon(pixmap)
+
+
+_icons = None
+
+
+def get_icons():
+    """Return the process-wide icon service."""
+    global _icons
+    if _icons is None:
+        _icons = IconService()
+    return _icons
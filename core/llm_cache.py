@@ -0,0 +1,188 @@
+# core/llm_cache.py
+import os, json, time, hashlib, sqlite3, threading
+from collections import OrderedDict
+from core.config import CACHE_DIR
+from core.providers import RequestCancelled
+
+CACHE_FILE = os.path.join(CACHE_DIR, "llm_cache.sqlite3")
+DEFAULT_TTL = 7 * 24 * 3600        # seconds
+DEFAULT_MEMORY_ENTRIES = 256
+DEFAULT_DISK_BYTES = 50 * 1024 * 1024
+WAIT_POLL = 0.1                    # seconds between a waiter's own cancellation checks
+
+
+def cache_key(provider, model, payload):
+    """Content address of a request: sha256 over provider, model and full payload."""
+    blob = json.dumps([provider, model, payload], sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+class _InFlight:
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class ResponseCache:
+    """
+    Two-tier cache for LLM responses: a bounded in-memory LRU in front of a
+    SQLite store with TTL and size-based eviction. Identical requests that
+    are in flight at the same time share a single call.
+    """
+
+    def __init__(self, path=CACHE_FILE, ttl=DEFAULT_TTL,
+                 memory_entries=DEFAULT_MEMORY_ENTRIES, disk_bytes=DEFAULT_DISK_BYTES):
+        self.path = path
+        self.ttl = ttl
+        self.memory_entries = memory_entries
+        self.disk_bytes = disk_bytes
+        self.lock = threading.Lock()
+        self.memory = OrderedDict()  # key -> (value, created)
+        self.in_flight = {}
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0,
+                      "coalesced": 0, "evictions": 0}
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                created REAL NOT NULL,
+                accessed REAL NOT NULL,
+                size INTEGER NOT NULL
+            )
+        """)
+        self.db.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses(accessed)")
+
+    def get(self, key):
+        """Return the cached value for key, or None."""
+        now = time.time()
+        with self.lock:
+            entry = self.memory.get(key)
+            if entry is not None:
+                value, created = entry
+                if now - created <= self.ttl:
+                    self.memory.move_to_end(key)
+                    self.stats["memory_hits"] += 1
+                    return value
+                del self.memory[key]
+
+            row = self.db.execute("SELECT value, created FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                value, created = row
+                if now - created <= self.ttl:
+                    self.db.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+                    self._remember(key, value, created)
+                    self.stats["disk_hits"] += 1
+                    return value
+                self.db.execute("DELETE FROM responses WHERE key = ?", (key,))
+
+            self.stats["misses"] += 1
+            return None
+
+    def put(self, key, value):
+        now = time.time()
+        with self.lock:
+            self._remember(key, value, now)
+            self.db.execute(
+                "INSERT OR REPLACE INTO responses (key, value, created, accessed, size) VALUES (?, ?, ?, ?, ?)",
+                (key, value, now, now, len(value.encode("utf-8"))))
+            self._evict_disk(now)
+
+    def get_or_compute(self, key, compute, cancel_event=None):
+        """
+        Return the cached value for key, or call compute() once and cache its
+        result. Concurrent callers with the same key wait for that one call;
+        if its caller cancels it, a waiter takes over instead of failing too.
+        """
+        while True:
+            value = self.get(key)
+            if value is not None:
+                return value
+
+            with self.lock:
+                flight = self.in_flight.get(key)
+                owner = flight is None
+                if owner:
+                    flight = self.in_flight[key] = _InFlight()
+                else:
+                    self.stats["coalesced"] += 1
+
+            if owner:
+                break
+            while not flight.event.wait(WAIT_POLL):
+                if cancel_event is not None and cancel_event.is_set():
+                    raise RequestCancelled("Request cancelled")
+            if isinstance(flight.error, RequestCancelled):
+                continue  # the owner's caller gave up, not ours
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = compute()
+            if flight.value is not None:
+                self.put(key, flight.value)
+            return flight.value
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self.lock:
+                self.in_flight.pop(key, None)
+            flight.event.set()
+
+    def clear(self):
+        with self.lock:
+            self.memory.clear()
+            self.db.execute("DELETE FROM responses")
+            for name in self.stats:
+                self.stats[name] = 0
+
+    def get_stats(self):
+        with self.lock:
+            stats = dict(self.stats)
+            stats["memory_entries"] = len(self.memory)
+            count, size = self.db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        stats["disk_entries"] = count
+        stats["disk_bytes"] = size
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["memory_hits"] + stats["disk_hits"]) / lookups if lookups else 0.0
+        return stats
+
+    def _remember(self, key, value, created):
+        self.memory[key] = (value, created)
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.memory_entries:
+            self.memory.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def _evict_disk(self, now):
+        deleted = self.db.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl,)).rowcount
+        total = self.db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total > self.disk_bytes:
+            # Drop least recently used rows until we are back under budget
+            excess = total - self.disk_bytes
+            for key, size in self.db.execute("SELECT key, size FROM responses ORDER BY accessed").fetchall():
+                self.db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                deleted += 1
+                excess -= size
+                if excess <= 0:
+                    break
+        self.stats["evictions"] += max(deleted, 0)
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """Return the process-wide response cache."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResponseCache()
+        return _cache
@@ -0,0 +1,197 @@
+# core/llm_router.py
+import threading, time
+from collections import deque, defaultdict
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from core.providers import PROVIDERS, RequestCancelled, create_provider
+from core.usage_store import get_usage_store
+
+STATS_WINDOW = 100         # most recent requests kept per provider
+MIN_SAMPLES = 10           # before percentiles / error rates are trusted
+UNHEALTHY_ERROR_RATE = 0.5
+DEFAULT_HEDGE_DELAY = 3.0  # seconds, until the primary has a usable p95
+
+
+class ProviderStats:
+    """Rolling latency and error-rate window for one provider."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = deque(maxlen=STATS_WINDOW)
+        self.outcomes = deque(maxlen=STATS_WINDOW)  # True = success
+
+    def record(self, latency, ok):
+        with self.lock:
+            self.outcomes.append(ok)
+            if ok:
+                self.latencies.append(latency)
+
+    def percentile(self, p):
+        with self.lock:
+            if len(self.latencies) < MIN_SAMPLES:
+                return None
+            ordered = sorted(self.latencies)
+        return ordered[min(int(len(ordered) * p / 100), len(ordered) - 1)]
+
+    def error_rate(self):
+        with self.lock:
+            if len(self.outcomes) < MIN_SAMPLES:
+                return 0.0
+            return 1 - sum(self.outcomes) / len(self.outcomes)
+
+    def snapshot(self):
+        return {"p50": self.percentile(50), "p95": self.percentile(95),
+                "error_rate": self.error_rate(), "samples": len(self.outcomes)}
+
+
+class _CancelFlag:
+    """Per-attempt cancel flag that is also set when the caller cancels."""
+
+    def __init__(self, parent=None):
+        self.parent = parent
+        self.event = threading.Event()
+
+    def set(self):
+        self.event.set()
+
+    def is_set(self):
+        return self.event.is_set() or (self.parent is not None and self.parent.is_set())
+
+
+class LLMRouter:
+    """
+    Sends requests to the configured provider. With "hedge_requests" on,
+    providers are ordered by health and a request that outlives the
+    primary's p95 latency (p95 time to first chunk when streaming) without
+    a reply is raced against the next provider; the loser is cancelled.
+    """
+
+    def __init__(self):
+        self.stats = defaultdict(ProviderStats)
+        self.first_chunk = defaultdict(ProviderStats)  # time to first streamed chunk
+        self.executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="llm-hedge")
+
+    def candidates(self, cfg):
+        """Providers to use, best first. Only providers with a key are included."""
+        primary = cfg.get("llm", "gemini")
+        names = [primary] + [name for name in PROVIDERS if name != primary]
+        if cfg.get("hedge_requests", False):
+            def health(name):
+                stats = self.stats[name]
+                unhealthy = stats.error_rate() >= UNHEALTHY_ERROR_RATE
+                return (unhealthy, name != primary, stats.percentile(50) or 0.0)
+            names.sort(key=health)
+        else:
+            names = names[:1]
+        providers = [create_provider(cfg, name) for name in names]
+        return [provider for provider in providers if provider is not None]
+
+    def complete(self, cfg, payload, timeout=None, cancel_event=None, on_chunk=None, source=""):
+        """
+        Return the reply text; streams through on_chunk when given. Every
+        attempt is logged to the usage store under source (the asking window).
+        """
+        providers = self.candidates(cfg)
+        if not providers:
+            raise ValueError("API key not configured. Please set it in the settings.")
+        if len(providers) == 1:
+            return self._attempt(providers[0], payload, timeout, cancel_event, on_chunk, source)
+        return self._hedged(providers[0], providers[1], payload, timeout, cancel_event, on_chunk,
+                            cfg.get("hedge_delay", DEFAULT_HEDGE_DELAY), source)
+
+    def _attempt(self, provider, payload, timeout, cancel, on_chunk, source=""):
+        if cancel is not None and cancel.is_set():
+            raise RequestCancelled("Request cancelled")
+        start = time.perf_counter()
+        try:
+            if on_chunk is not None:
+                first = []
+
+                def timed_chunk(text):
+                    if not first:
+                        first.append(True)
+                        self.first_chunk[provider.name].record(time.perf_counter() - start, True)
+                    on_chunk(text)
+
+                result = provider.stream(payload, timed_chunk, timeout, cancel)
+            else:
+                result = provider.complete(payload, timeout, cancel)
+        except RequestCancelled:
+            raise
+        except Exception:
+            self.stats[provider.name].record(time.perf_counter() - start, False)
+            self._record_usage(provider, source, False, (0, 0), time.perf_counter() - start)
+            raise
+        self.stats[provider.name].record(time.perf_counter() - start, True)
+        self._record_usage(provider, source, True, provider.token_usage(payload, result),
+                           time.perf_counter() - start)
+        return result
+
+    @staticmethod
+    def _record_usage(provider, source, ok, tokens, latency):
+        try:
+            get_usage_store().record(provider.name, provider.model, source, ok, tokens[0], tokens[1], latency)
+        except (OSError, ValueError, OverflowError) as e:
+            print(f"⚠️ Could not record usage: {e}")
+
+    def _hedged(self, primary, backup, payload, timeout, cancel_event, on_chunk, fallback_delay, source=""):
+        lock = threading.Lock()
+        flags = {primary.name: _CancelFlag(cancel_event), backup.name: _CancelFlag(cancel_event)}
+        owner = []  # name of the attempt whose chunks reach the caller
+
+        def chunk_forwarder(name):
+            def forward(text):
+                with lock:
+                    if not owner:
+                        # First attempt to produce output wins the stream
+                        owner.append(name)
+                        for other, flag in flags.items():
+                            if other != name:
+                                flag.set()
+                    mine = owner[0] == name
+                if mine:
+                    on_chunk(text)
+            return forward if on_chunk is not None else None
+
+        def submit(provider):
+            return self.executor.submit(self._attempt, provider, payload, timeout,
+                                        flags[provider.name], chunk_forwarder(provider.name), source)
+
+        futures = {submit(primary): primary.name}
+        stats = self.first_chunk if on_chunk is not None else self.stats
+        delay = stats[primary.name].percentile(95) or fallback_delay
+        done, _ = wait(futures, timeout=delay)
+        first = next(iter(done), None)
+        with lock:
+            streaming = bool(owner)
+        if (first is None and not streaming) or (first is not None and first.exception() is not None):
+            # Primary is slower than its p95 (or already failed): race the backup
+            futures[submit(backup)] = backup.name
+
+        error = None
+        while futures:
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                futures.pop(future)
+                if future.exception() is None:
+                    for other in futures.values():
+                        flags[other].set()
+                    return future.result()
+                if error is None or isinstance(error, RequestCancelled):
+                    error = future.exception()
+        raise error
+
+    def snapshot(self):
+        return {name: stats.snapshot() for name, stats in self.stats.items()}
+
+
+_router = None
+_router_lock = threading.Lock()
+
+
+def get_router():
+    """Return the process-wide router (shared latency statistics)."""
+    global _router
+    with _router_lock:
+        if _router is None:
+            _router = LLMRouter()
+        return _router
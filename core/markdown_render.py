@@ -0,0 +1,324 @@
+# core/markdown_render.py
+import re, html, hashlib, threading
+from collections import OrderedDict
+from PyQt6.QtCore import QObject, pyqtSignal
+
+try:
+    from pygments import highlight
+    from pygments.lexers import get_lexer_by_name
+    from pygments.formatters import HtmlFormatter
+    from pygments.util import ClassNotFound
+    _FORMATTER = HtmlFormatter(noclasses=True, nowrap=True, style="default")
+except ImportError:  # code blocks are shown without highlighting
+    highlight = None
+
+HTML_CACHE_ENTRIES = 2000   # rendered messages kept, keyed by content hash
+PARTIAL_ROWS = 64           # streaming rows whose finished prefix is remembered
+LATEST_ROWS = 256           # rows whose newest rendering is kept as a placeholder
+
+FENCE_RE = re.compile(r"^\s{0,3}(`{3,}|~{3,})\s*([\w+#.-]*)")
+HEADING_RE = re.compile(r"^\s{0,3}(#{1,6})\s+(.*?)\s*#*\s*$")
+HR_RE = re.compile(r"^\s{0,3}([-*_])(\s*\1){2,}\s*$")
+LIST_RE = re.compile(r"^(\s*)([-*+]|\d{1,9}[.)])\s+(.*)$")
+QUOTE_RE = re.compile(r"^\s{0,3}>\s?(.*)$")
+TABLE_SEP_RE = re.compile(r"^\s*\|?\s*:?-{3,}:?\s*(\|\s*:?-{3,}:?\s*)*\|?\s*$")
+
+INLINE_CODE_RE = re.compile(r"(`+)(.+?)\1")
+LINK_RE = re.compile(r"\[([^\]]+)\]\((https?://[^)\s]+)\)")
+BOLD_RE = re.compile(r"(\*\*|__)(?=\S)(.+?)(?<=\S)\1")
+ITALIC_RE = re.compile(r"(?<![\w*])([*_])(?=\S)(.+?)(?<=\S)\1(?![\w*])")
+STRIKE_RE = re.compile(r"~~(?=\S)(.+?)(?<=\S)~~")
+
+CODE_STYLE = "font-family: monospace; background-color: #f3f4f6;"
+CODE_BLOCK_BG = "#f6f8fa"
+
+
+def message_key(text):
+    return hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+
+
+def render_plain(text):
+    return html.escape(text).replace("\n", "<br>")
+
+
+def render_inline(text):
+    """Escape text and apply code spans, links, bold, italic and strikethrough."""
+    spans = []
+
+    def stash(fragment):
+        spans.append(fragment)
+        return f"\x00{len(spans) - 1}\x00"
+
+    text = INLINE_CODE_RE.sub(lambda m: stash(f'<span style="{CODE_STYLE}">{html.escape(m.group(2).strip())}</span>'), text)
+    text = LINK_RE.sub(lambda m: stash(f'<a href="{html.escape(m.group(2))}">{html.escape(m.group(1))}</a>'), text)
+    text = html.escape(text, quote=False)
+    text = BOLD_RE.sub(r"<b>\2</b>", text)
+    text = ITALIC_RE.sub(r"<i>\2</i>", text)
+    text = STRIKE_RE.sub(r"<s>\1</s>", text)
+    return re.sub(r"\x00(\d+)\x00", lambda m: spans[int(m.group(1))], text)
+
+
+def render_code(code, language):
+    body = None
+    if highlight is not None and language:
+        try:
+            body = highlight(code, get_lexer_by_name(language), _FORMATTER).rstrip("\n")
+        except ClassNotFound:
+            pass
+    if body is None:
+        body = html.escape(code)
+    return (f'<table width="100%" cellpadding="6" bgcolor="{CODE_BLOCK_BG}"><tr><td>'
+            f'<pre style="font-family: monospace;">{body}</pre></td></tr></table>')
+
+
+def _split_row(line):
+    line = line.strip()
+    if line.startswith("|"):
+        line = line[1:]
+    if line.endswith("|"):
+        line = line[:-1]
+    return [cell.strip() for cell in line.split("|")]
+
+
+def render_table(lines):
+    header = "".join(f"<th>{render_inline(c)}</th>" for c in _split_row(lines[0]))
+    rows = "".join("<tr>" + "".join(f"<td>{render_inline(c)}</td>" for c in _split_row(line)) + "</tr>"
+                   for line in lines[2:])
+    return f'<table border="1" cellspacing="0" cellpadding="4"><tr>{header}</tr>{rows}</table>'
+
+
+def render_list(lines):
+    """Nested ul/ol from list lines; indentation decides the nesting."""
+    out = []
+    stack = []   # (indent, tag)
+    for line in lines:
+        match = LIST_RE.match(line)
+        if match is None:
+            # Continuation of the previous item
+            out.append("<br>" + render_inline(line.strip()))
+            continue
+        indent = len(match.group(1).expandtabs(4))
+        tag = "ul" if match.group(2) in "-*+" else "ol"
+        while stack and indent < stack[-1][0]:
+            out.append(f"</li></{stack.pop()[1]}>")
+        if stack and indent == stack[-1][0] and tag != stack[-1][1]:
+            out.append(f"</li></{stack.pop()[1]}>")  # bullets switched to numbers or back
+        if not stack or indent > stack[-1][0]:
+            stack.append((indent, tag))
+            out.append(f"<{tag}><li>")
+        else:
+            out.append("</li><li>")
+        out.append(render_inline(match.group(3)))
+    while stack:
+        out.append(f"</li></{stack.pop()[1]}>")
+    return "".join(out)
+
+
+def _starts_block(lines, i):
+    line = lines[i]
+    return bool(FENCE_RE.match(line) or HEADING_RE.match(line) or HR_RE.match(line)
+                or LIST_RE.match(line) or QUOTE_RE.match(line)
+                or ("|" in line and i + 1 < len(lines) and TABLE_SEP_RE.match(lines[i + 1])))
+
+
+def render_block(block):
+    """HTML for one block: the text between blank lines (a fence may span blank lines)."""
+    lines = block.split("\n")
+    out = []
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+        fence = FENCE_RE.match(line)
+        if fence:
+            marker = fence.group(1)
+            end = i + 1
+            while end < len(lines) and not lines[end].strip().startswith(marker[0] * len(marker)):
+                end += 1
+            out.append(render_code("\n".join(lines[i + 1:end]), fence.group(2).lower()))
+            i = end + 1
+            continue
+        heading = HEADING_RE.match(line)
+        if heading:
+            level = len(heading.group(1))
+            out.append(f"<h{level}>{render_inline(heading.group(2))}</h{level}>")
+            i += 1
+            continue
+        if HR_RE.match(line):
+            out.append("<hr>")
+            i += 1
+            continue
+        if "|" in line and i + 1 < len(lines) and TABLE_SEP_RE.match(lines[i + 1]):
+            end = i + 2
+            while end < len(lines) and "|" in lines[end]:
+                end += 1
+            out.append(render_table(lines[i:end]))
+            i = end
+            continue
+        if LIST_RE.match(line):
+            end = i + 1
+            while end < len(lines) and (LIST_RE.match(lines[end]) or lines[end].startswith((" ", "\t"))):
+                end += 1
+            out.append(render_list(lines[i:end]))
+            i = end
+            continue
+        if QUOTE_RE.match(line):
+            end = i
+            quoted = []
+            while end < len(lines) and QUOTE_RE.match(lines[end]):
+                quoted.append(QUOTE_RE.match(lines[end]).group(1))
+                end += 1
+            out.append(f"<blockquote>{render_block(chr(10).join(quoted))}</blockquote>")
+            i = end
+            continue
+        end = i + 1
+        while end < len(lines) and not _starts_block(lines, end):
+            end += 1
+        out.append("<p>" + "<br>".join(render_inline(l) for l in lines[i:end]) + "</p>")
+        i = end
+    return "".join(out)
+
+
+def split_blocks(text):
+    """
+    Return (complete, tail_start): the blocks followed by a blank line outside
+    a code fence, and the offset where the still-open last block begins.
+    """
+    blocks = []
+    start = 0
+    pos = 0
+    fence = None
+    for line in text.splitlines(keepends=True):
+        stripped = line.strip()
+        match = FENCE_RE.match(line)
+        if fence is None and match:
+            fence = match.group(1)[0] * len(match.group(1))
+        elif fence is not None and stripped.startswith(fence):
+            fence = None
+        pos += len(line)
+        if fence is None and not stripped and line.endswith("\n"):
+            if text[start:pos].strip():
+                blocks.append(text[start:pos].strip("\n"))
+            start = pos
+    return blocks, start
+
+
+def render_markdown(text):
+    """Render a whole Markdown message to HTML (QTextDocument's subset)."""
+    blocks, tail_start = split_blocks(text)
+    tail = text[tail_start:].strip("\n")
+    return "".join(render_block(b) for b in blocks) + (render_block(tail) if tail else "")
+
+
+class MarkdownRenderer(QObject):
+    """
+    Renders Markdown on a background thread. html_for() answers from a cache
+    keyed by content hash; on a miss it queues the row and returns the last
+    rendering of that row (plus the new text, escaped) or None. Streaming
+    rows are rendered incrementally: finished blocks are remembered and
+    only the text after them is parsed again.
+    """
+
+    rendered = pyqtSignal(int)  # row whose HTML is ready
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.cache = OrderedDict()      # message key -> html
+        self.latest = OrderedDict()     # row -> (text, html) of its newest rendering, LRU
+        self.partials = OrderedDict()   # row -> (finished prefix, its html); worker only
+        self.pending = OrderedDict()    # row -> text waiting for the worker
+        self.generation = 0
+        self.cond = threading.Condition()
+        self.thread = None
+        self.stopped = False
+
+    def html_for(self, row, text):
+        key = message_key(text)
+        with self.cond:
+            cached = self.cache.get(key)
+            if cached is not None:
+                self.cache.move_to_end(key)
+                return cached
+            self.pending[row] = text
+            self.pending.move_to_end(row)
+            latest = self.latest.get(row)
+            if latest is not None:
+                self.latest.move_to_end(row)
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name="markdown-render", daemon=True)
+                self.thread.start()
+            self.cond.notify()
+        if latest is not None and text.startswith(latest[0]):
+            rest = text[len(latest[0]):]
+            return latest[1] + (f"<p>{render_plain(rest)}</p>" if rest.strip() else "")
+        return None
+
+    def reset(self):
+        """Forget per-row state (rows are renumbered); cached HTML stays valid."""
+        with self.cond:
+            self.generation += 1
+            self.pending.clear()
+            self.latest.clear()
+            self.partials.clear()
+
+    def stop(self):
+        """End the worker thread and drop every cached rendering."""
+        with self.cond:
+            self.stopped = True
+            self.generation += 1
+            for state in (self.pending, self.latest, self.partials, self.cache):
+                state.clear()
+            self.cond.notify()
+
+    def memory_usage(self):
+        """Approximate bytes held by cached HTML and per-row state."""
+        with self.cond:
+            return (sum(len(html_text) for html_text in self.cache.values())
+                    + sum(len(text) + len(html_text) for text, html_text in self.latest.values())
+                    + sum(len(prefix) + len(html_text) for prefix, html_text in self.partials.values()))
+
+    def _run(self):
+        while True:
+            with self.cond:
+                while not self.pending and not self.stopped:
+                    self.cond.wait()
+                if self.stopped:
+                    return
+                row, text = self.pending.popitem(last=False)
+                generation = self.generation
+                partial = self.partials.get(row)
+            try:
+                html_text, partial = self._render_incremental(text, partial)
+            except Exception as e:
+                print(f"⚠️ Markdown rendering failed: {e}")
+                html_text, partial = f"<p>{render_plain(text)}</p>", None
+            with self.cond:
+                if generation != self.generation:
+                    continue  # the transcript was cleared meanwhile
+                previous = self.latest.get(row)
+                if previous is not None and text.startswith(previous[0]):
+                    # A streamed row grew: its earlier rendering is never shown again
+                    self.cache.pop(message_key(previous[0]), None)
+                self.cache[message_key(text)] = html_text
+                while len(self.cache) > HTML_CACHE_ENTRIES:
+                    self.cache.popitem(last=False)
+                self.latest[row] = (text, html_text)
+                self.latest.move_to_end(row)
+                while len(self.latest) > LATEST_ROWS:
+                    self.latest.popitem(last=False)
+                if partial is not None:
+                    self.partials[row] = partial
+                    self.partials.move_to_end(row)
+                    while len(self.partials) > PARTIAL_ROWS:
+                        self.partials.popitem(last=False)
+            self.rendered.emit(row)
+
+    @staticmethod
+    def _render_incremental(text, partial):
+        prefix, prefix_html = partial if partial and text.startswith(partial[0]) else ("", "")
+        rest = text[len(prefix):]
+        blocks, tail_start = split_blocks(rest)
+        if blocks:
+            prefix_html += "".join(render_block(b) for b in blocks)
+            prefix += rest[:tail_start]
+        tail = text[len(prefix):].strip("\n")
+        return prefix_html + (render_block(tail) if tail else ""), (prefix, prefix_html)
@@ -0,0 +1,297 @@
+# core/metrics.py
+import os, time, threading
+from core.config import DATA_DIR, write_atomic
+
+METRICS_FILE = os.path.join(DATA_DIR, "metrics.prom")
+SLOT_SECONDS = 5          # resolution of the rolling windows
+KEEP_SECONDS = 15 * 60    # longest rolling window kept
+WINDOWS = {"1m": 60, "5m": 300, "15m": 900}
+
+# Histogram values are recorded as integers in 1/scale units (µs for seconds)
+# in log-linear buckets with 32 sub-buckets per power of two (~3% error).
+SUB_BITS = 5
+SUB_COUNT = 1 << SUB_BITS
+SECONDS_BOUNDS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+BYTES_BOUNDS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+
+def _bucket(value):
+    if value < 2 * SUB_COUNT:
+        return max(value, 0)
+    shift = value.bit_length() - SUB_BITS - 1
+    return SUB_COUNT * shift + (value >> shift)
+
+
+def _bucket_range(index):
+    """[low, high) of the integer values that fall in a bucket."""
+    if index < 2 * SUB_COUNT:
+        return index, index + 1
+    shift = index // SUB_COUNT - 1
+    mantissa = index - SUB_COUNT * shift
+    return mantissa << shift, (mantissa + 1) << shift
+
+
+def _label_key(labels):
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+class _Sharded:
+    """
+    Per-thread shards: each writer thread only ever touches its own shard,
+    so the write path takes no lock. Readers merge shards; dict/list copies
+    happen in C under the GIL and never observe a half-applied write.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._shards = []
+        self._shards_lock = threading.Lock()
+
+    def _shard(self):
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = self._new_shard()
+            with self._shards_lock:
+                self._shards.append(shard)
+        return shard
+
+    def shards(self):
+        with self._shards_lock:
+            return list(self._shards)
+
+
+class Counter(_Sharded):
+    kind = "counter"
+
+    def __init__(self, name, help, labels):
+        super().__init__()
+        self.name, self.help, self.labels = name, help, labels
+
+    def _new_shard(self):
+        return [0]
+
+    def inc(self, amount=1):
+        self._shard()[0] += amount
+
+    def value(self):
+        return sum(shard[0] for shard in self.shards())
+
+
+class Gauge:
+    kind = "gauge"
+
+    def __init__(self, name, help, labels):
+        self.name, self.help, self.labels = name, help, labels
+        self._value = 0
+        self._lock = threading.Lock()
+
+    def set(self, value):
+        self._value = value
+
+    def inc(self, amount=1):
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount=1):
+        self.inc(-amount)
+
+    def value(self):
+        return self._value
+
+
+class _HistogramShard:
+    __slots__ = ("slot", "current", "slots", "total", "count", "sum")
+
+    def __init__(self):
+        self.slot = None
+        self.current = {}   # bucket -> count for the current time slot
+        self.slots = {}     # older slot number -> {bucket: count}
+        self.total = {}     # bucket -> count since start
+        self.count = 0
+        self.sum = 0.0
+
+
+class Histogram(_Sharded):
+    """HDR-style latency/size histogram with rolling time windows."""
+    kind = "histogram"
+
+    def __init__(self, name, help, labels, scale=1e6, bounds=SECONDS_BOUNDS):
+        super().__init__()
+        self.name, self.help, self.labels = name, help, labels
+        self.scale = scale
+        self.bounds = bounds
+
+    def _new_shard(self):
+        return _HistogramShard()
+
+    def observe(self, value):
+        shard = self._shard()
+        slot = int(time.monotonic() // SLOT_SECONDS)
+        if slot != shard.slot:
+            if shard.slot is not None and shard.current:
+                shard.slots[shard.slot] = shard.current
+            shard.current = {}
+            shard.slot = slot
+            oldest = slot - KEEP_SECONDS // SLOT_SECONDS
+            for old in [s for s in shard.slots if s < oldest]:
+                del shard.slots[old]
+        index = _bucket(int(value * self.scale))
+        shard.current[index] = shard.current.get(index, 0) + 1
+        shard.total[index] = shard.total.get(index, 0) + 1
+        shard.count += 1
+        shard.sum += value
+
+    def time(self):
+        """Context manager that observes the elapsed seconds."""
+        return _Timer(self)
+
+    def buckets(self, window=None):
+        """Merged {bucket: count}, over the last `window` seconds or since start."""
+        merged = {}
+        oldest = int(time.monotonic() // SLOT_SECONDS) - (window or 0) // SLOT_SECONDS
+        for shard in self.shards():
+            if window is None:
+                parts = [shard.total.copy()]
+            else:
+                # Older slots first: a slot rolled over meanwhile is counted once
+                slots = list(shard.slots.items())
+                slot, current = shard.slot, shard.current.copy()
+                parts = [counts for s, counts in slots if s >= oldest]
+                if slot is not None and slot >= oldest and slot not in dict(slots):
+                    parts.append(current)
+            for counts in parts:
+                for index, n in counts.items():
+                    merged[index] = merged.get(index, 0) + n
+        return merged
+
+    def percentiles(self, ps=(50, 95, 99), window=None):
+        """{p: value} (None when empty) plus the sample count under "count"."""
+        merged = sorted(self.buckets(window).items())
+        count = sum(n for _, n in merged)
+        result = {"count": count}
+        for p in ps:
+            if not count:
+                result[p] = None
+                continue
+            rank = max(p / 100 * count, 1)
+            seen = 0
+            for index, n in merged:
+                seen += n
+                if seen >= rank:
+                    low, high = _bucket_range(index)
+                    result[p] = (low + high - 1) / 2 / self.scale
+                    break
+        return result
+
+    def totals(self):
+        shards = self.shards()
+        return sum(s.count for s in shards), sum(s.sum for s in shards)
+
+
+class _Timer:
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start)
+
+
+class MetricsRegistry:
+    """
+    Process-wide counters, gauges and histograms, identified by name and
+    labels. Looking up an existing metric takes no lock.
+    """
+
+    def __init__(self):
+        self.metrics = {}   # (name, label key) -> metric
+        self.lock = threading.Lock()
+
+    def _get(self, cls, name, help, labels, **options):
+        key = (name, _label_key(labels))
+        metric = self.metrics.get(key)
+        if metric is None:
+            with self.lock:
+                metric = self.metrics.get(key)
+                if metric is None:
+                    metric = self.metrics[key] = cls(name, help, key[1], **options)
+        return metric
+
+    def counter(self, name, help="", **labels):
+        return self._get(Counter, name, help, labels)
+
+    def gauge(self, name, help="", **labels):
+        return self._get(Gauge, name, help, labels)
+
+    def histogram(self, name, help="", scale=1e6, bounds=SECONDS_BOUNDS, **labels):
+        return self._get(Histogram, name, help, labels, scale=scale, bounds=bounds)
+
+    def collect(self):
+        """All metrics, sorted by name and labels."""
+        with self.lock:
+            return [self.metrics[key] for key in sorted(self.metrics)]
+
+    def export_prometheus(self):
+        """Metrics in the Prometheus text exposition format."""
+        lines = []
+        described = set()
+        for metric in self.collect():
+            if metric.name not in described:
+                described.add(metric.name)
+                if metric.help:
+                    lines.append(f"# HELP {metric.name} {metric.help}")
+                lines.append(f"# TYPE {metric.name} {metric.kind}")
+            if metric.kind != "histogram":
+                lines.append(f"{metric.name}{_format_labels(metric.labels)} {metric.value()}")
+                continue
+            buckets = sorted(metric.buckets().items())
+            count, total = metric.totals()
+            cumulative, i = 0, 0
+            for bound in metric.bounds:
+                limit = bound * metric.scale
+                while i < len(buckets) and _bucket_range(buckets[i][0])[1] <= limit + 1:
+                    cumulative += buckets[i][1]
+                    i += 1
+                lines.append(f"{metric.name}_bucket{_format_labels(metric.labels, [('le', bound)])} {cumulative}")
+            lines.append(f"{metric.name}_bucket{_format_labels(metric.labels, [('le', '+Inf')])} {count}")
+            lines.append(f"{metric.name}_sum{_format_labels(metric.labels)} {total}")
+            lines.append(f"{metric.name}_count{_format_labels(metric.labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path=None):
+        path = path or METRICS_FILE
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        write_atomic(path, self.export_prometheus())
+        return path
+
+    def start_exporter(self, path=None, interval=15.0):
+        """Rewrite the Prometheus file every `interval` seconds on a daemon thread."""
+        def run():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.write_prometheus(path)
+                except OSError as e:
+                    print(f"⚠️ Failed to export metrics: {e}")
+        thread = threading.Thread(target=run, name="metrics-exporter", daemon=True)
+        thread.start()
+        return thread
+
+
+_metrics = MetricsRegistry()
+
+
+def get_metrics():
+    """Return the process-wide metrics registry."""
+    return _metrics
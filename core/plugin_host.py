@@ -0,0 +1,120 @@
+# core/plugin_host.py
+"""
+Worker process for a plugin hosted out of process:
+
+    python -m core.plugin_host plugins.pilot ChatBox Pilot
+
+Runs its own QApplication and WindowManager for the one plugin and talks to
+the sidebar over stdin/stdout with core.plugin_ipc frames. Commands:
+{"cmd": "init", "meta"}, {"cmd": "open"}, {"cmd": "quit"}. Events: ready,
+opened and a stats heartbeat every STATS_MS.
+"""
+import os, sys, time, threading
+
+STARTED = time.perf_counter()
+
+from PyQt6.QtWidgets import QApplication
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+from core.plugin_ipc import Channel
+from core.config import ConfigManager
+from core.plugin_loader import LazyPlugin
+from core.window_manager import WindowManager
+from core.conversation_store import close_store
+
+STATS_MS = 1000
+
+
+def resident_bytes():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    # Peak rather than current RSS; kilobytes on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class _Inbox(QObject):
+    """Delivers messages from the reader thread to the GUI thread."""
+    received = pyqtSignal(object)
+
+
+class PluginHost:
+    def __init__(self, app, channel, module_path, class_name, name):
+        self.app = app
+        self.channel = channel
+        self.name = name
+        self.module_path = module_path
+        self.class_name = class_name
+        self.config = ConfigManager()
+        self.manager = None
+
+        self.inbox = _Inbox()
+        self.inbox.received.connect(self.handle)
+        threading.Thread(target=self._read, name="plugin-ipc", daemon=True).start()
+
+        self.stats_timer = QTimer()
+        self.stats_timer.timeout.connect(self.send_stats)
+        self.stats_timer.start(STATS_MS)
+
+    def _read(self):
+        while True:
+            try:
+                message = self.channel.recv()
+            except (OSError, ValueError):
+                message = None
+            self.inbox.received.emit(message)
+            if message is None:
+                return
+
+    def send(self, message):
+        try:
+            self.channel.send(message)
+        except OSError:
+            self.app.quit()  # the sidebar is gone
+
+    def handle(self, message):
+        if message is None or message.get("cmd") == "quit":
+            self.app.quit()
+        elif message.get("cmd") == "init":
+            plugin = LazyPlugin(self.name, self.module_path, self.class_name, message.get("meta"))
+            plugin.load()
+            self.manager = WindowManager({self.name: plugin}, self.config)
+            self.manager.prewarm()
+            self.send({"event": "ready", "pid": os.getpid(), "startup": time.perf_counter() - STARTED})
+        elif message.get("cmd") == "open" and self.manager is not None:
+            self.manager.open(self.name)
+            self.send({"event": "opened"})
+
+    def send_stats(self):
+        windows = self.manager.windows.get(self.name, []) if self.manager is not None else []
+        self.send({"event": "stats", "cpu": time.process_time(), "rss": resident_bytes(),
+                   "visible": sum(1 for window in windows if window.isVisible())})
+
+
+def main(argv):
+    module_path, class_name, name = argv[1:4]
+    # Frames go to the original stdout; anything the plugin prints goes to stderr
+    writer = os.fdopen(os.dup(sys.stdout.fileno()), "wb")
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+    channel = Channel(sys.stdin.buffer, writer)
+
+    app = QApplication(sys.argv[:1])
+    app.setQuitOnLastWindowClosed(False)
+    host = PluginHost(app, channel, module_path, class_name, name)
+    app.aboutToQuit.connect(close_store)
+    app.aboutToQuit.connect(host.config.flush)
+    code = app.exec()
+    # The reader thread is still blocked on stdin, which would make a normal
+    # interpreter shutdown abort; history and settings are already written
+    sys.stderr.flush()
+    os._exit(code)
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
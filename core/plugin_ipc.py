@@ -0,0 +1,71 @@
+# core/plugin_ipc.py
+import os, json, struct, threading
+
+try:
+    from multiprocessing import shared_memory, resource_tracker
+except ImportError:  # every message is sent inline
+    shared_memory = None
+
+# Frame: payload length, payload kind, payload
+HEADER = struct.Struct("<IB")
+INLINE = 0      # compact JSON
+SHARED = 1      # JSON {"name", "size"} of a shared memory block holding the JSON
+SHM_THRESHOLD = 64 * 1024
+# On Windows a block disappears with its last handle, so the sender could not
+# close it before the receiver attaches; bulk payloads go inline there
+USE_SHARED = shared_memory is not None and os.name == "posix"
+
+
+class Channel:
+    """
+    Framed message channel over a pair of binary pipes. Messages are JSON
+    values; payloads over SHM_THRESHOLD travel through a shared memory block
+    that the receiver unlinks after copying, so the pipe only carries a
+    short reference. send() may be called from any thread.
+    """
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.lock = threading.Lock()
+
+    def send(self, message):
+        data = json.dumps(message, separators=(",", ":")).encode("utf-8")
+        kind = INLINE
+        if USE_SHARED and len(data) > SHM_THRESHOLD:
+            block = shared_memory.SharedMemory(create=True, size=len(data))
+            block.buf[:len(data)] = data
+            # The receiver owns the block from here on
+            resource_tracker.unregister(block._name, "shared_memory")
+            block.close()
+            data = json.dumps({"name": block.name, "size": len(data)}).encode("utf-8")
+            kind = SHARED
+        with self.lock:
+            self.writer.write(HEADER.pack(len(data), kind) + data)
+            self.writer.flush()
+
+    def recv(self):
+        """Next message, or None once the other side has closed the pipe."""
+        header = self.reader.read(HEADER.size)
+        if len(header) < HEADER.size:
+            return None
+        length, kind = HEADER.unpack(header)
+        data = self.reader.read(length)
+        if len(data) < length:
+            return None
+        if kind == SHARED:
+            ref = json.loads(data)
+            block = shared_memory.SharedMemory(name=ref["name"])
+            try:
+                data = bytes(block.buf[:ref["size"]])
+            finally:
+                block.close()
+                block.unlink()
+        return json.loads(data)
+
+    def close(self):
+        for stream in (self.writer, self.reader):
+            try:
+                stream.close()
+            except OSError:
+                pass
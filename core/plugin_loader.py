@@ -1,23 +1,178 @@
-import os, importlib
+import os, ast, json, time, importlib, threading
+from core.config import CACHE_DIR
+from core.metrics import get_metrics
+
+MANIFEST_FILE = os.path.join(CACHE_DIR, "plugin_manifest.json")
+MANIFEST_VERSION = 1
+
+# ✅ enforce fixed order
+DESIRED_ORDER = ["Pilot", "Tools", "Settings", "Reporting", "Academy"]
+
+# Startup timings, filled in by load_plugins and LazyPlugin.load
+startup_timings = {"discovery": 0.0, "manifest": "", "imports": {}}
+
+
+class LazyPlugin:
+    """
+    Stands in for a plugin class until it is first used. Calling it imports
+    the plugin module and constructs the real class.
+    """
+
+    def __init__(self, name, module_path, class_name, meta=None):
+        self.name = name
+        self.module_path = module_path
+        self.class_name = class_name
+        self.meta = meta or {}
+        self._cls = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self):
+        return self._cls is not None
+
+    def load(self):
+        """Import the plugin module (once) and return the plugin class."""
+        with self._lock:
+            if self._cls is None:
+                start = time.perf_counter()
+                module = importlib.import_module(self.module_path)
+                self._cls = getattr(module, self.class_name)
+                elapsed = time.perf_counter() - start
+                startup_timings["imports"][self.name] = elapsed
+                get_metrics().histogram("plugin_import_seconds", "Plugin module import time",
+                                        plugin=self.name).observe(elapsed)
+        return self._cls
+
+    def __call__(self, *args, **kwargs):
+        return self.load()(*args, **kwargs)
+
+    def __repr__(self):
+        state = "loaded" if self.loaded else "lazy"
+        return f"<LazyPlugin {self.name} ({self.module_path}.{self.class_name}, {state})>"
+
+
+def read_plugin_metadata(path):
+    """
+    Read PLUGIN_* assignments from a plugin source file without importing it.
+    Returns None when the file does not declare PLUGIN_NAME and PLUGIN_CLASS
+    as plain literals / class names.
+    """
+    with open(path, "rb") as f:
+        tree = ast.parse(f.read(), filename=path)
+
+    meta = {}
+    for node in tree.body:
+        if not isinstance(node, ast.Assign):
+            continue
+        for target in node.targets:
+            if not isinstance(target, ast.Name) or not target.id.startswith("PLUGIN_"):
+                continue
+            if target.id == "PLUGIN_CLASS" and isinstance(node.value, ast.Name):
+                meta["PLUGIN_CLASS"] = node.value.id
+            else:
+                try:
+                    meta[target.id] = ast.literal_eval(node.value)
+                except ValueError:
+                    pass
+
+    if not isinstance(meta.get("PLUGIN_NAME"), str) or "PLUGIN_CLASS" not in meta:
+        return None
+    return meta
+
+
+def _read_manifest():
+    try:
+        with open(MANIFEST_FILE, "r") as f:
+            manifest = json.load(f)
+        if manifest.get("version") == MANIFEST_VERSION:
+            return manifest.get("plugins", {})
+    except (OSError, ValueError):
+        pass
+    return {}
+
+
+def _write_manifest(entries):
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        tmp = MANIFEST_FILE + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"version": MANIFEST_VERSION, "plugins": entries}, f, indent=2)
+        os.replace(tmp, MANIFEST_FILE)
+    except OSError as e:
+        print(f"⚠️ Could not write plugin manifest: {e}")
+
 
 def load_plugins():
+    """
+    Discover plugins from a cached manifest, re-parsing only files whose
+    mtime or size changed. Returns {name: LazyPlugin}; no plugin module is
+    imported until it is first used or prewarmed.
+    """
+    start = time.perf_counter()
     plugins = {}
     plugin_dir = os.path.join(os.path.dirname(__file__), "..", "plugins")
     plugin_dir = os.path.abspath(plugin_dir)
 
-    for filename in os.listdir(plugin_dir):
+    cached = _read_manifest()
+    entries = {}
+    rebuilt = 0
+
+    for filename in sorted(os.listdir(plugin_dir)):
         if filename.endswith(".py") and not filename.startswith("__"):
             module_name = filename[:-3]
-            module_path = f"plugins.{module_name}"
+            path = os.path.join(plugin_dir, filename)
             try:
-                module = importlib.import_module(module_path)
-                if hasattr(module, "PLUGIN_NAME") and hasattr(module, "PLUGIN_CLASS"):
-                    plugins[module.PLUGIN_NAME] = module.PLUGIN_CLASS
-            except Exception as e:
+                st = os.stat(path)
+                entry = cached.get(filename)
+                if not entry or entry["mtime_ns"] != st.st_mtime_ns or entry["size"] != st.st_size:
+                    entry = {"mtime_ns": st.st_mtime_ns, "size": st.st_size,
+                             "meta": read_plugin_metadata(path)}
+                    rebuilt += 1
+                entries[filename] = entry
+            except (OSError, SyntaxError) as e:
                 print(f"⚠️ Failed to load {module_name}: {e}")
+                continue
+
+            meta = entry["meta"]
+            if meta:
+                plugins[meta["PLUGIN_NAME"]] = LazyPlugin(
+                    meta["PLUGIN_NAME"], f"plugins.{module_name}", meta["PLUGIN_CLASS"], meta)
+
+    if rebuilt or set(entries) != set(cached):
+        _write_manifest(entries)
 
-    # ✅ enforce fixed order
-    desired_order = ["Pilot", "Tools", "Settings", "Reporting", "Academy"]
-    ordered_plugins = {name: plugins[name] for name in desired_order if name in plugins}
+    ordered_plugins = {name: plugins[name] for name in DESIRED_ORDER if name in plugins}
 
+    startup_timings["discovery"] = time.perf_counter() - start
+    startup_timings["manifest"] = f"{rebuilt} of {len(entries)} files re-parsed"
     return ordered_plugins
+
+
+def prewarm_plugins(plugins, on_done=None):
+    """
+    Import plugin modules on a background thread so the first click does
+    not pay for it. Call after the sidebar has painted.
+    """
+    def run():
+        for plugin in plugins.values():
+            try:
+                plugin.load()
+            except Exception as e:
+                print(f"⚠️ Failed to load {plugin.name}: {e}")
+        if on_done:
+            on_done()
+
+    thread = threading.Thread(target=run, name="plugin-prewarm", daemon=True)
+    thread.start()
+    return thread
+
+
+def format_startup_report(time_to_visible=None):
+    """Human-readable summary of plugin discovery and import costs."""
+    lines = [f"Plugin discovery: {startup_timings['discovery'] * 1000:.1f} ms "
+             f"({startup_timings['manifest']})"]
+    for name, seconds in startup_timings["imports"].items():
+        lines.append(f"  import {name}: {seconds * 1000:.1f} ms")
+    if time_to_visible is not None:
+        lines.append(f"Time to sidebar visible: {time_to_visible * 1000:.1f} ms")
+    return "\n".join(lines)
@@ -0,0 +1,208 @@
+# core/plugin_supervisor.py
+import os, sys, time, threading, subprocess
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+from core.base_plugin import HOSTING_IN_PROCESS, HOSTING_PROCESS
+from core.plugin_ipc import Channel
+from core.metrics import get_metrics
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HANG_SECONDS = 5.0         # no heartbeat for this long: killed and restarted like a crash
+STARTUP_SECONDS = 30.0     # allowance before the first "ready" (Qt and plugin imports)
+CHECK_MS = 1000
+MAX_RESTARTS = 3           # crashes allowed within RESTART_WINDOW before giving up
+RESTART_WINDOW = 60.0
+RESTART_BACKOFF_MS = 500   # doubled for each recent crash
+STOP_TIMEOUT = 3.0
+
+
+def hosting(plugin, config_manager):
+    """HOSTING_* mode of a plugin: the "plugin_hosting" config entry, else PLUGIN_HOSTING."""
+    mode = config_manager.get("plugin_hosting", {}).get(plugin.name)
+    if mode is None:
+        mode = getattr(plugin, "meta", {}).get("PLUGIN_HOSTING", HOSTING_IN_PROCESS)
+    return mode if mode in (HOSTING_IN_PROCESS, HOSTING_PROCESS) else HOSTING_IN_PROCESS
+
+
+class PluginProcess(QObject):
+    """
+    One plugin running in a core/plugin_host.py worker. Starts it on demand,
+    restarts it with backoff when it dies or hangs and turns its heartbeat
+    into CPU and RSS figures.
+    """
+
+    # Worker messages arrive on a reader thread; this hops to the GUI thread
+    received = pyqtSignal(object, object)
+    statsChanged = pyqtSignal(str, str)
+
+    def __init__(self, plugin):
+        super().__init__()
+        self.plugin = plugin
+        self.name = plugin.name
+        self.process = None
+        self.channel = None
+        self.stopping = False
+        self.crashes = []          # times of recent unexpected exits
+        self.visible = 0
+        self.last_stats = None     # (monotonic time, cpu seconds)
+        self.last_seen = 0.0
+        self.ready = False
+        self.status = "stopped"
+        self.received.connect(self.on_message)
+
+        self.hang_timer = QTimer(self)
+        self.hang_timer.timeout.connect(self.check_alive)
+
+    @property
+    def running(self):
+        return self.process is not None and self.process.poll() is None
+
+    def start(self):
+        if self.running:
+            return
+        env = dict(os.environ)
+        env["PYTHONPATH"] = os.pathsep.join(filter(None, [ROOT, env.get("PYTHONPATH")]))
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "core.plugin_host", self.plugin.module_path, self.plugin.class_name, self.name],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, env=env)
+        self.channel = Channel(self.process.stdout, self.process.stdin)
+        self.stopping = False
+        self.ready = False
+        self.last_stats = None
+        self.last_seen = time.monotonic()
+        self.set_status("starting")
+        threading.Thread(target=self._read, args=(self.process, self.channel),
+                         name=f"plugin-{self.name}", daemon=True).start()
+        self.send({"cmd": "init", "meta": getattr(self.plugin, "meta", {})})
+        self.hang_timer.start(CHECK_MS)
+
+    def _read(self, process, channel):
+        while True:
+            try:
+                message = channel.recv()
+            except (OSError, ValueError):
+                message = None
+            if message is None:
+                self.received.emit(process, {"event": "exit", "code": process.wait()})
+                return
+            self.received.emit(process, message)
+
+    def send(self, message):
+        try:
+            self.channel.send(message)
+            return True
+        except (OSError, ValueError, AttributeError):
+            return False  # the reader thread reports the exit
+
+    def open(self):
+        """Show the plugin's window, starting the worker first if needed."""
+        self.start()
+        self.send({"cmd": "open"})
+
+    def stop(self):
+        self.stopping = True
+        self.hang_timer.stop()
+        process = self.process
+        if process is None:
+            return
+        self.send({"cmd": "quit"})
+        try:
+            process.wait(STOP_TIMEOUT)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+        self.channel.close()
+
+    def on_message(self, process, message):
+        if process is not self.process:
+            return  # left over from a worker that was replaced
+        self.last_seen = time.monotonic()
+        event = message.get("event")
+        if event == "ready":
+            self.ready = True
+            self.set_status(f"pid {message['pid']}, started in {message['startup'] * 1000:.0f} ms")
+        elif event == "stats":
+            self.on_stats(message)
+        elif event == "exit":
+            self.on_exit(message["code"])
+
+    def on_stats(self, message):
+        now = time.monotonic()
+        self.visible = message["visible"]
+        cpu_percent = 0.0
+        if self.last_stats is not None and now > self.last_stats[0]:
+            cpu_percent = 100.0 * (message["cpu"] - self.last_stats[1]) / (now - self.last_stats[0])
+        self.last_stats = (now, message["cpu"])
+        metrics = get_metrics()
+        metrics.gauge("plugin_cpu_percent", "CPU use of an out-of-process plugin", plugin=self.name).set(cpu_percent)
+        rss = message.get("rss")
+        if rss is not None:
+            metrics.gauge("plugin_rss_bytes", "Resident memory of an out-of-process plugin",
+                          plugin=self.name).set(rss)
+        memory = f"{rss / 2 ** 20:.0f} MB" if rss is not None else "n/a"
+        self.set_status(f"pid {self.process.pid}, CPU {cpu_percent:.0f}%, RSS {memory}")
+
+    def on_exit(self, code):
+        self.hang_timer.stop()
+        self.channel.close()
+        self.process = None
+        if self.stopping:
+            self.set_status("stopped")
+            return
+        now = time.monotonic()
+        self.crashes = [t for t in self.crashes if now - t < RESTART_WINDOW] + [now]
+        get_metrics().counter("plugin_restarts_total", "Out-of-process plugin crashes", plugin=self.name).inc()
+        if len(self.crashes) > MAX_RESTARTS:
+            print(f"⚠️ Plugin {self.name} exited with code {code} {len(self.crashes)} times; not restarting")
+            self.set_status(f"crashed (exit code {code})")
+            return
+        delay = RESTART_BACKOFF_MS * 2 ** (len(self.crashes) - 1)
+        print(f"⚠️ Plugin {self.name} exited with code {code}; restarting in {delay} ms")
+        self.set_status(f"restarting (exit code {code})")
+        reopen = self.visible > 0
+        QTimer.singleShot(delay, lambda: self.open() if reopen else self.start())
+
+    def check_alive(self):
+        """Kill a worker whose heartbeat stopped; its exit goes through the crash path."""
+        limit = HANG_SECONDS if self.ready else STARTUP_SECONDS
+        if not self.running or time.monotonic() - self.last_seen <= limit:
+            return
+        silent = time.monotonic() - self.last_seen
+        print(f"⚠️ Plugin {self.name} has not responded for {silent:.0f} s; killing it")
+        self.set_status(f"not responding for {silent:.0f} s")
+        self.hang_timer.stop()
+        self.process.kill()  # the reader thread sees the pipe close and reports the exit
+
+    def set_status(self, text):
+        if text != self.status:
+            self.status = text
+            self.statsChanged.emit(self.name, text)
+
+
+class PluginSupervisor(QObject):
+    """Owns the worker processes of every plugin hosted out of process."""
+
+    statsChanged = pyqtSignal(str, str)
+
+    def __init__(self, plugins, config_manager):
+        super().__init__()
+        self.processes = {}
+        for name, plugin in plugins.items():
+            if hosting(plugin, config_manager) == HOSTING_PROCESS:
+                process = PluginProcess(plugin)
+                process.statsChanged.connect(self.statsChanged)
+                self.processes[name] = process
+
+    def hosts(self, name):
+        return name in self.processes
+
+    def open(self, name):
+        self.processes[name].open()
+
+    def start_all(self):
+        """Start every worker ahead of the first click."""
+        for process in self.processes.values():
+            process.start()
+
+    def stop_all(self):
+        for process in self.processes.values():
+            process.stop()
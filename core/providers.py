@@ -0,0 +1,277 @@
+# core/providers.py
+import json
+from core.http_transport import get_transport
+from core.metrics import get_metrics, BYTES_BOUNDS
+from core.context_builder import estimate_tokens
+
+# Requests are passed around in Gemini's generateContent shape:
+#   {"contents": [{"role": "user"|"model", "parts": [{"text": ...}]}],
+#    "systemInstruction": {"parts": [{"text": ...}]}}
+# and each adapter converts that to its own API format. Gemini requests may
+# also carry "tools"; function calls in its replies come back on a Reply.
+
+
+class ProviderError(Exception):
+    """An API call failed. status / retry_after are set for HTTP errors."""
+
+    def __init__(self, message, status=None, retry_after=None):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+
+class RequestCancelled(Exception):
+    """The caller cancelled the request (e.g. it lost a hedged race)."""
+
+
+def _retry_after(response):
+    value = response.headers.get("Retry-After")
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def _text_of(parts):
+    return "".join(part.get("text", "") for part in parts)
+
+
+class Reply(str):
+    """Reply text that also carries the function calls the model asked for."""
+    function_calls = ()
+
+    def __new__(cls, text, function_calls=()):
+        reply = super().__new__(cls, text)
+        reply.function_calls = list(function_calls)
+        return reply
+
+
+class Provider:
+    """Base adapter: one LLM API, one model, one key."""
+    name = "base"
+    default_model = ""
+    default_base_url = ""
+
+    def __init__(self, api_key, model=None, base_url=None, transport_options=None):
+        self.api_key = api_key
+        self.model = model or self.default_model
+        self.base_url = (base_url or self.default_base_url).rstrip("/")
+        self.transport = get_transport(transport_options)
+        self.function_calls = []  # collected while a streamed reply is parsed
+        self.usage = None         # (prompt tokens, output tokens) if the API reported them
+
+    # -- adapter interface --------------------------------------------------------
+
+    def request(self, payload, stream):
+        """Return (url, headers, params, body) for a canonical payload."""
+        raise NotImplementedError
+
+    def parse_response(self, body):
+        raise NotImplementedError
+
+    def parse_stream_event(self, data):
+        """Text delta of one SSE data line ('' if none, None at end of stream)."""
+        raise NotImplementedError
+
+    # -- shared request logic -------------------------------------------------------
+
+    def complete(self, payload, timeout=None, cancel_event=None):
+        """Blocking request; returns the full reply text."""
+        url, headers, params, body = self.request(payload, stream=False)
+        # Read the body incrementally so a cancelled request can be abandoned early
+        with self.transport.post(url, json_body=body, headers=headers, params=params,
+                                 stream=True, timeout=timeout) as response:
+            self._check(response)
+            data = bytearray()
+            for chunk in response.iter_content(16384):
+                if cancel_event is not None and cancel_event.is_set():
+                    raise RequestCancelled("Request cancelled")
+                data.extend(chunk)
+        self._record_bytes(len(data))
+        try:
+            return self.parse_response(json.loads(bytes(data)))
+        except ValueError as e:
+            raise ProviderError(f"{self.name}: invalid JSON response") from e
+
+    def stream(self, payload, on_chunk, timeout=None, cancel_event=None):
+        """
+        Streaming request; calls on_chunk(text) per delta and returns the full
+        text. Falls back to complete() if the stream fails before its first
+        chunk on a transport error or a 5xx; client errors (bad key, 429) are
+        raised as they are.
+        """
+        parts = []
+        received = 0
+        try:
+            url, headers, params, body = self.request(payload, stream=True)
+            with self.transport.post(url, json_body=body, headers=headers, params=params,
+                                     stream=True, timeout=timeout) as response:
+                self._check(response)
+                for line in response.iter_lines():
+                    if cancel_event is not None and cancel_event.is_set():
+                        # Never hand back a partial answer as if it were complete
+                        raise RequestCancelled("Request cancelled")
+                    received += len(line) + 1
+                    if isinstance(line, bytes):
+                        line = line.decode("utf-8", "replace")
+                    if not line.startswith("data:"):
+                        continue
+                    text = self.parse_stream_event(line[5:].strip())
+                    if text is None:
+                        break
+                    if text:
+                        parts.append(text)
+                        on_chunk(text)
+        except RequestCancelled:
+            raise
+        except ProviderError as e:
+            if parts or (e.status is not None and e.status < 500):
+                raise
+            return self.complete(payload, timeout, cancel_event)
+        except Exception:
+            if parts:
+                raise
+            return self.complete(payload, timeout, cancel_event)
+        self._record_bytes(received)
+        text = "".join(parts)
+        return Reply(text, self.function_calls) if self.function_calls else text
+
+    def token_usage(self, payload, reply):
+        """(prompt, output) tokens of the last request; estimated if the API did not say."""
+        if self.usage is not None:
+            return self.usage
+        prompt = sum(estimate_tokens(_text_of(content.get("parts", [])))
+                     for content in payload.get("contents", []))
+        return prompt, estimate_tokens(reply) if reply else 0
+
+    def _record_bytes(self, size):
+        get_metrics().histogram("llm_response_bytes", "Response body size", scale=1,
+                                bounds=BYTES_BOUNDS, provider=self.name).observe(size)
+
+    def _check(self, response):
+        if response.status_code == 200:
+            return
+        try:
+            error = response.json().get("error", {})
+            message = error.get("message", "Unknown API error") if isinstance(error, dict) else str(error)
+        except ValueError:
+            message = f"HTTP {response.status_code}"
+        raise ProviderError(f"API error: {message}", response.status_code, _retry_after(response))
+
+
+class GeminiProvider(Provider):
+    name = "gemini"
+    default_model = "gemini-2.0-flash"
+    default_base_url = "https://generativelanguage.googleapis.com/v1beta"
+
+    def request(self, payload, stream):
+        method = "streamGenerateContent" if stream else "generateContent"
+        url = f"{self.base_url}/models/{self.model}:{method}"
+        headers = {"Content-Type": "application/json", "X-goog-api-key": self.api_key}
+        return url, headers, {"alt": "sse"} if stream else None, payload
+
+    def parse_response(self, body):
+        self._read_usage(body)
+        try:
+            parts = body["candidates"][0]["content"]["parts"]
+        except (KeyError, IndexError):
+            # If the response format is unexpected, return the raw JSON for debugging
+            return json.dumps(body, indent=2)
+        calls = [part["functionCall"] for part in parts if "functionCall" in part]
+        return Reply(_text_of(parts), calls) if calls else _text_of(parts)
+
+    def parse_stream_event(self, data):
+        try:
+            event = json.loads(data)
+        except ValueError:
+            return ""
+        self._read_usage(event)  # events carry running totals
+        try:
+            parts = event["candidates"][0]["content"]["parts"]
+        except (KeyError, IndexError, TypeError):
+            return ""
+        self.function_calls += [part["functionCall"] for part in parts if "functionCall" in part]
+        return _text_of(parts)
+
+    def _read_usage(self, body):
+        usage = body.get("usageMetadata") if isinstance(body, dict) else None
+        if usage:
+            self.usage = (usage.get("promptTokenCount", 0), usage.get("candidatesTokenCount", 0))
+
+
+class OpenAIProvider(Provider):
+    """Chat Completions API (also spoken by xAI's Grok)."""
+    name = "chatgpt"
+    default_model = "gpt-4o-mini"
+    default_base_url = "https://api.openai.com/v1"
+
+    def request(self, payload, stream):
+        messages = []
+        system = payload.get("systemInstruction")
+        if system:
+            messages.append({"role": "system", "content": _text_of(system["parts"])})
+        for content in payload.get("contents", []):
+            role = "assistant" if content.get("role") == "model" else "user"
+            messages.append({"role": role, "content": _text_of(content["parts"])})
+
+        url = f"{self.base_url}/chat/completions"
+        headers = {"Content-Type": "application/json", "Authorization": f"Bearer {self.api_key}"}
+        body = {"model": self.model, "messages": messages}
+        if stream:
+            # The last event then carries the token counts
+            body.update(stream=True, stream_options={"include_usage": True})
+        return url, headers, None, body
+
+    def parse_response(self, body):
+        self._read_usage(body)
+        try:
+            return body["choices"][0]["message"]["content"] or ""
+        except (KeyError, IndexError):
+            return json.dumps(body, indent=2)
+
+    def parse_stream_event(self, data):
+        if data == "[DONE]":
+            return None
+        try:
+            event = json.loads(data)
+        except ValueError:
+            return ""
+        self._read_usage(event)
+        try:
+            return event["choices"][0]["delta"].get("content") or ""
+        except (KeyError, IndexError, TypeError, AttributeError):
+            return ""
+
+    def _read_usage(self, body):
+        usage = body.get("usage") if isinstance(body, dict) else None
+        if usage:
+            self.usage = (usage.get("prompt_tokens", 0), usage.get("completion_tokens", 0))
+
+
+class GrokProvider(OpenAIProvider):
+    name = "grok"
+    default_model = "grok-2-latest"
+    default_base_url = "https://api.x.ai/v1"
+
+
+PROVIDERS = {cls.name: cls for cls in (GeminiProvider, OpenAIProvider, GrokProvider)}
+
+
+def provider_key(cfg, name):
+    """API key for a provider: api_keys[name], else api_key for the selected one."""
+    key = cfg.get("api_keys", {}).get(name)
+    if not key and name == cfg.get("llm", "gemini"):
+        key = cfg.get("api_key", "")
+    return key or ""
+
+
+def create_provider(cfg, name):
+    """Build the adapter for name from the config, or None if it has no key."""
+    cls = PROVIDERS.get(name)
+    api_key = provider_key(cfg, name)
+    if cls is None or not api_key:
+        return None
+    return cls(api_key,
+               model=cfg.get("models", {}).get(name),
+               base_url=cfg.get("base_urls", {}).get(name),
+               transport_options=cfg.get("transport"))
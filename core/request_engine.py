@@ -0,0 +1,170 @@
+# core/request_engine.py
+import threading
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, QTimer, pyqtSignal
+
+DEFAULT_TIMEOUT = 60.0
+MAX_WORKERS = 8
+
+
+class RetryLater(Exception):
+    """Raised by a job to ask for it to be re-run after `delay` seconds."""
+
+    def __init__(self, delay, message=""):
+        super().__init__(message or f"Retry in {delay:g}s")
+        self.delay = delay
+
+
+class RequestHandle(QObject):
+    """
+    Handle for a job running on the request engine.
+    Lives on the GUI thread; the public signals are only emitted there and
+    at most one of finished / failed / cancelled fires per handle.
+    retry is not terminal: the job asked to be re-run later (RetryLater).
+    """
+    finished = pyqtSignal(object)
+    failed = pyqtSignal(str)
+    cancelled = pyqtSignal()
+    chunk = pyqtSignal(str)
+    retry = pyqtSignal(float)
+
+    # Internal bridge from the worker thread (delivered as queued calls)
+    _result = pyqtSignal(object)
+    _error = pyqtSignal(str)
+    _chunk = pyqtSignal(str)
+    _retry = pyqtSignal(float)
+
+    def __init__(self, timeout=None):
+        super().__init__()
+        self.timeout = timeout
+        self.cancel_event = threading.Event()
+        self._done = False
+        self._result.connect(self._on_result)
+        self._error.connect(self._on_error)
+        self._chunk.connect(self._on_chunk)
+        self._retry.connect(self._on_retry)
+
+        # Armed when the job actually starts, not while it waits in a queue
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self._on_timeout)
+
+    def arm_timeout(self):
+        if self.timeout:
+            self.timer.start(int(self.timeout * 1000))
+
+    def is_cancelled(self):
+        return self.cancel_event.is_set()
+
+    def is_done(self):
+        return self._done
+
+    def emit_chunk(self, text):
+        """Deliver a partial result from the worker thread (streaming jobs)."""
+        if not self.is_cancelled():
+            self._chunk.emit(text)
+
+    def cancel(self):
+        """Cancel the job. Its result, if it still arrives, is discarded."""
+        if self._done:
+            return
+        self._done = True
+        self.timer.stop()
+        self.cancel_event.set()
+        self.cancelled.emit()
+
+    def _on_result(self, result):
+        if self._done:
+            return
+        self._done = True
+        self.timer.stop()
+        self.finished.emit(result)
+
+    def _on_retry(self, delay):
+        if not self._done:
+            self.timer.stop()
+            self.retry.emit(delay)
+
+    def _on_chunk(self, text):
+        if not self._done:
+            self.chunk.emit(text)
+
+    def _on_error(self, message):
+        if self._done:
+            return
+        self._done = True
+        self.timer.stop()
+        self.failed.emit(message)
+
+    def _on_timeout(self):
+        if self._done:
+            return
+        self._done = True
+        self.cancel_event.set()
+        self.failed.emit(f"Request timed out after {self.timeout:g}s")
+
+
+class _RequestWorker(QRunnable):
+    def __init__(self, job, handle):
+        super().__init__()
+        self.job = job
+        self.handle = handle
+
+    def run(self):
+        if self.handle.is_cancelled():
+            return
+        try:
+            result = self.job(self.handle)
+        except RetryLater as e:
+            if not self.handle.is_cancelled():
+                self.handle._retry.emit(float(e.delay))
+            return
+        except Exception as e:
+            if not self.handle.is_cancelled():
+                self.handle._error.emit(str(e))
+            return
+        if not self.handle.is_cancelled():
+            self.handle._result.emit(result)
+
+
+class RequestEngine:
+    """
+    Runs blocking jobs (network calls) on a dedicated thread pool so the
+    Qt event loop never waits on a provider.
+    """
+
+    def __init__(self, max_workers=MAX_WORKERS):
+        self.pool = QThreadPool()
+        self.pool.setMaxThreadCount(max_workers)
+        self.active = set()
+
+    def submit(self, job, timeout=DEFAULT_TIMEOUT, handle=None):
+        """
+        Run job(handle) on a worker thread and return its RequestHandle.
+        An existing handle can be passed to re-run a job (see RetryLater).
+        Must be called from the GUI thread.
+        """
+        if handle is None:
+            handle = RequestHandle(timeout)
+        if handle not in self.active:
+            self.active.add(handle)
+            for signal in (handle.finished, handle.failed, handle.cancelled):
+                signal.connect(lambda *_, h=handle: self.active.discard(h))
+
+        handle.arm_timeout()
+        self.pool.start(_RequestWorker(job, handle))
+        return handle
+
+    def cancel_all(self):
+        for handle in list(self.active):
+            handle.cancel()
+
+
+_engine = None
+
+
+def get_engine():
+    """Return the process-wide request engine."""
+    global _engine
+    if _engine is None:
+        _engine = RequestEngine()
+    return _engine
@@ -0,0 +1,185 @@
+# core/scheduler.py
+import time, heapq, itertools
+from collections import defaultdict
+from PyQt6.QtCore import QObject, QTimer
+from core.request_engine import RequestHandle, RetryLater, get_engine, DEFAULT_TIMEOUT
+from core.providers import ProviderError
+from core.metrics import get_metrics
+
+PRIORITY_FOREGROUND = 0   # the window the user is typing in
+PRIORITY_BACKGROUND = 10  # other windows and background work
+
+DEFAULT_RATE = 1.0        # requests per second per API key
+DEFAULT_BURST = 4
+DEFAULT_CONCURRENCY = 4   # in-flight requests per provider
+DEFAULT_RETRY_AFTER = 5.0 # seconds to pause a key after a 429 without Retry-After
+MAX_RATE_LIMIT_RETRIES = 3
+
+
+class TokenBucket:
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_take(self, now):
+        self._refill(now)
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    def wait_time(self, now):
+        self._refill(now)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+
+class _Queued:
+    def __init__(self, job, provider, api_key, priority, handle):
+        self.job = job
+        self.provider = provider
+        self.api_key = api_key
+        self.priority = priority
+        self.handle = handle
+        self.not_before = 0.0
+        self.attempts = 0
+        self.running = False
+        self.seq = None
+
+
+class RequestScheduler(QObject):
+    """
+    Process-wide queue in front of the request engine. Requests are started
+    in priority order subject to a token bucket per API key and a
+    concurrency limit per provider; a 429 pauses the key for Retry-After
+    seconds and puts the request back in the queue. Lives on the GUI thread.
+    """
+
+    def __init__(self, config_manager, engine=None):
+        super().__init__()
+        self.config_manager = config_manager
+        self.engine = engine or get_engine()
+        self.queue = []                     # heap of (priority, seq, _Queued)
+        self.seq = itertools.count()
+        self.buckets = {}                   # api key -> TokenBucket
+        self.paused_until = {}              # api key -> monotonic time
+        self.running = defaultdict(int)     # provider -> in-flight requests
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.dispatch)
+
+    def submit(self, job, provider, api_key, priority=PRIORITY_FOREGROUND, timeout=DEFAULT_TIMEOUT):
+        """Queue job(handle) and return its RequestHandle; cancelling it dequeues the job."""
+        handle = RequestHandle(timeout)
+        item = _Queued(job, provider, api_key, priority, handle)
+        handle.finished.connect(lambda *_: self._release(item))
+        handle.failed.connect(lambda *_: self._release(item))
+        handle.cancelled.connect(lambda: self._release(item))
+        handle.retry.connect(lambda delay: self._rate_limited(item, delay))
+        self._push(item)
+        self.dispatch()
+        return handle
+
+    def pending(self, provider=None):
+        """Number of queued (not yet started) requests."""
+        return sum(1 for _, _, item in self.queue
+                   if not item.handle.is_done() and (provider is None or item.provider == provider))
+
+    def _push(self, item):
+        # A re-queued item keeps its original position within its priority
+        if item.seq is None:
+            item.seq = next(self.seq)
+        heapq.heappush(self.queue, (item.priority, item.seq, item))
+
+    def _limits(self, provider):
+        cfg = self.config_manager.snapshot()
+        rate = cfg.get("rate_limits", {}).get(provider, {})
+        return (rate.get("rate", DEFAULT_RATE), rate.get("burst", DEFAULT_BURST),
+                cfg.get("max_concurrency", {}).get(provider, DEFAULT_CONCURRENCY))
+
+    def dispatch(self):
+        """Start every queued request that its key's bucket and provider's limit allow."""
+        now = time.monotonic()
+        deferred = []
+        wake = None
+
+        while self.queue:
+            entry = heapq.heappop(self.queue)
+            item = entry[2]
+            if item.handle.is_done():
+                continue  # cancelled while queued
+
+            rate, burst, concurrency = self._limits(item.provider)
+            bucket = self.buckets.get(item.api_key)
+            if bucket is None:
+                bucket = self.buckets[item.api_key] = TokenBucket(rate, burst)
+            bucket.rate, bucket.burst = rate, burst
+
+            ready_at = max(item.not_before, self.paused_until.get(item.api_key, 0.0))
+            if ready_at > now:
+                wait = ready_at - now
+            elif self.running[item.provider] >= concurrency:
+                wait = None  # a finishing request will dispatch again
+            elif not bucket.try_take(now):
+                wait = bucket.wait_time(now)
+            else:
+                self._start(item)
+                continue
+
+            deferred.append(entry)
+            if wait is not None:
+                wake = wait if wake is None else min(wake, wait)
+
+        for entry in deferred:
+            heapq.heappush(self.queue, entry)
+        get_metrics().gauge("scheduler_queued", "Requests waiting in the scheduler").set(len(self.queue))
+        if wake is not None:
+            self.timer.start(max(int(wake * 1000), 1))
+
+    def _start(self, item):
+        item.running = True
+        self.running[item.provider] += 1
+
+        def run(handle):
+            try:
+                return item.job(handle)
+            except ProviderError as e:
+                if e.status == 429 and item.attempts < MAX_RATE_LIMIT_RETRIES:
+                    raise RetryLater(e.retry_after or DEFAULT_RETRY_AFTER) from e
+                raise
+
+        self.engine.submit(run, item.handle.timeout, handle=item.handle)
+
+    def _release(self, item):
+        if item.running:
+            item.running = False
+            self.running[item.provider] -= 1
+        self.dispatch()
+
+    def _rate_limited(self, item, delay):
+        """A 429: pause the whole key, then retry this request first in its class."""
+        now = time.monotonic()
+        self.paused_until[item.api_key] = max(self.paused_until.get(item.api_key, 0.0), now + delay)
+        item.attempts += 1
+        item.not_before = now + delay
+        if item.running:
+            item.running = False
+            self.running[item.provider] -= 1
+        self._push(item)
+        self.dispatch()
+
+
+_scheduler = None
+
+
+def get_scheduler(config_manager):
+    """Return the process-wide scheduler (created on first use, on the GUI thread)."""
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = RequestScheduler(config_manager)
+    return _scheduler
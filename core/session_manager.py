@@ -0,0 +1,245 @@
+# core/session_manager.py
+import os, json, zlib, time, itertools
+from PyQt6.QtCore import QObject, QEvent, QTimer
+from core.config import CACHE_DIR
+from core.metrics import get_metrics
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+SESSIONS_DIR = os.path.join(CACHE_DIR, "sessions")
+CHECK_MS = 15000
+DEFAULT_IDLE_MINUTES = 10      # "hibernate_idle_minutes"; 0 disables idle hibernation
+DEFAULT_BUDGET_MB = 64         # "session_memory_budget_mb" across all awake sessions; 0 disables
+WAKE_EVENTS = (QEvent.Type.WindowActivate, QEvent.Type.Show)
+RUN_LOCK = "run-{}.lock"       # held by each running process; its session files end in -<pid>.json.z
+
+
+def try_lock(f):
+    """Exclusive lock on an open file without waiting; False if another process holds it."""
+    try:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+        return True
+    except OSError:
+        return False
+
+
+class Session:
+    __slots__ = ("name", "label", "window", "last_active", "path", "stored_bytes")
+
+    def __init__(self, name, label, window):
+        self.name = name
+        self.label = label
+        self.window = window
+        self.last_active = time.monotonic()
+        self.path = None          # set while hibernated
+        self.stored_bytes = 0
+
+
+class SessionManager(QObject):
+    """
+    Hibernates idle plugin windows. A window opts in by defining
+
+        hibernate() -> JSON-able state, or None if it cannot sleep right now
+        restore(state)  rebuild from that state (None: start empty)
+        memory_usage() -> approximate bytes held while awake
+
+    and may emit a wakeRequested signal (e.g. from its placeholder). Windows
+    idle past hibernate_idle_minutes, or the least recently used ones while
+    all sessions together exceed session_memory_budget_mb, have their state
+    written to SESSIONS_DIR (zlib-compressed JSON); activating the window
+    restores it.
+    """
+
+    def __init__(self, config_manager):
+        super().__init__()
+        self.config_manager = config_manager
+        self.sessions = {}    # window -> Session
+        self.numbers = itertools.count(1)
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.check)
+        self.timer.start(CHECK_MS)
+        self.run_lock = self._lock_run()
+        self._remove_stale()
+
+    def track(self, name, window):
+        session = Session(name, f"{name}#{next(self.numbers)}", window)
+        self.sessions[window] = session
+        window.installEventFilter(self)
+        window.destroyed.connect(lambda *_, w=window: self.forget(w))
+        signal = getattr(window, "wakeRequested", None)
+        if signal is not None:
+            signal.connect(lambda w=window: self.wake(w))
+
+    def forget(self, window):
+        session = self.sessions.pop(window, None)
+        if session is not None:
+            self._remove_file(session)
+            self._publish(session, 0)
+            self._count_hibernated()
+
+    def eventFilter(self, obj, event):
+        if event.type() in WAKE_EVENTS and obj in self.sessions:
+            self.wake(obj)
+        return False
+
+    def wake(self, window):
+        """Mark the window active, restoring it first if it is hibernated."""
+        session = self.sessions.get(window)
+        if session is None:
+            return
+        session.last_active = time.monotonic()
+        if session.path is None:
+            return
+        start = time.perf_counter()
+        try:
+            with open(session.path, "rb") as f:
+                state = json.loads(zlib.decompress(f.read()))
+        except (OSError, ValueError, zlib.error) as e:
+            print(f"⚠️ Could not restore {session.label}: {e}")
+            state = None
+        self._remove_file(session)
+        window.restore(state)
+        self._count_hibernated()
+        get_metrics().histogram("session_restore_seconds", "Hibernated window restore time",
+                                plugin=session.name).observe(time.perf_counter() - start)
+
+    def discard(self, window):
+        """Wake the window empty; its hibernated state is thrown away."""
+        session = self.sessions.get(window)
+        if session is not None and session.path is not None:
+            self._remove_file(session)
+            window.restore(None)
+            self._count_hibernated()
+
+    def hibernate(self, window, reason="manual"):
+        session = self.sessions.get(window)
+        if session is None or session.path is not None:
+            return False
+        state = window.hibernate()
+        if state is None:
+            return False
+        blob = zlib.compress(json.dumps(state, separators=(",", ":")).encode("utf-8"))
+        path = os.path.join(SESSIONS_DIR, f"{session.label.replace('#', '-')}-{os.getpid()}.json.z")
+        try:
+            os.makedirs(SESSIONS_DIR, exist_ok=True)
+            with open(path, "wb") as f:
+                f.write(blob)
+        except OSError as e:
+            print(f"⚠️ Could not hibernate {session.label}: {e}")
+            window.restore(state)
+            return False
+        session.path = path
+        session.stored_bytes = len(blob)
+        self._publish(session, 0)
+        self._count_hibernated()
+        get_metrics().counter("session_hibernations_total", "Windows hibernated",
+                              plugin=session.name, reason=reason).inc()
+        return True
+
+    def check(self):
+        """Hibernate idle sessions, then the least recently used ones over the budget."""
+        now = time.monotonic()
+        idle_after = self.config_manager.get("hibernate_idle_minutes", DEFAULT_IDLE_MINUTES) * 60
+        budget = self.config_manager.get("session_memory_budget_mb", DEFAULT_BUDGET_MB) * 2 ** 20
+
+        awake = []
+        for window, session in list(self.sessions.items()):
+            if session.path is not None or not window.isVisible():
+                continue
+            if window.isActiveWindow():
+                session.last_active = now
+            elif idle_after and now - session.last_active > idle_after and self.hibernate(window, "idle"):
+                continue
+            awake.append((session, window.memory_usage()))
+
+        for session, usage in awake:
+            self._publish(session, usage)
+        total = sum(usage for _, usage in awake)
+        if not budget or total <= budget:
+            return
+        for session, usage in sorted(awake, key=lambda item: item[0].last_active):
+            if total <= budget:
+                break
+            if not session.window.isActiveWindow() and self.hibernate(session.window, "budget"):
+                total -= usage
+
+    def report(self):
+        """One dict per tracked window: label, state, idle seconds and bytes in memory / on disk."""
+        now = time.monotonic()
+        rows = []
+        for window, session in self.sessions.items():
+            hibernated = session.path is not None
+            rows.append({"session": session.label, "state": "hibernated" if hibernated else "awake",
+                         "idle": now - session.last_active,
+                         "memory": 0 if hibernated else window.memory_usage(),
+                         "disk": session.stored_bytes if hibernated else 0})
+        return rows
+
+    def _publish(self, session, usage):
+        get_metrics().gauge("session_memory_bytes", "Estimated memory held by a window's session",
+                            session=session.label).set(usage)
+
+    def _count_hibernated(self):
+        get_metrics().gauge("sessions_hibernated", "Windows currently hibernated").set(
+            sum(1 for session in self.sessions.values() if session.path is not None))
+
+    def _lock_run(self):
+        """Hold this process's run lock; the OS drops it when the process exits."""
+        try:
+            os.makedirs(SESSIONS_DIR, exist_ok=True)
+            f = open(os.path.join(SESSIONS_DIR, RUN_LOCK.format(os.getpid())), "a+b")
+        except OSError as e:
+            print(f"⚠️ Could not create the session lock: {e}")
+            return None
+        try_lock(f)
+        return f
+
+    def _remove_stale(self):
+        """
+        Delete sessions hibernated by processes that are gone (e.g. after a
+        crash): those whose run lock is missing or no longer held.
+        """
+        try:
+            names = os.listdir(SESSIONS_DIR)
+        except OSError:
+            return
+        live = {str(os.getpid())}
+        for filename in names:
+            if not (filename.startswith("run-") and filename.endswith(".lock")):
+                continue
+            pid = filename[4:-5]
+            if pid in live:
+                continue
+            path = os.path.join(SESSIONS_DIR, filename)
+            try:
+                with open(path, "a+b") as f:
+                    if not try_lock(f):
+                        live.add(pid)
+                        continue
+                os.remove(path)
+            except OSError:
+                live.add(pid)  # cannot tell: keep its sessions
+        for filename in names:
+            if filename.endswith(".json.z") and filename[:-7].rsplit("-", 1)[-1] not in live:
+                try:
+                    os.remove(os.path.join(SESSIONS_DIR, filename))
+                except OSError:
+                    pass
+
+    def _remove_file(self, session):
+        if session.path is not None:
+            try:
+                os.remove(session.path)
+            except OSError:
+                pass
+            session.path = None
+            session.stored_bytes = 0
@@ -1,130 +1,159 @@
 from PyQt6.QtWidgets import QWidget, QVBoxLayout, QPushButton, QLabel, QSpacerItem, QSizePolicy
-from PyQt6.QtCore import Qt, QRect, QPropertyAnimation, QEasingCurve, QRectF
-from PyQt6.QtGui import QPainter, QPainterPath, QColor, QLinearGradient, QFont, QFontDatabase
+from PyQt6.QtCore import Qt, QRect, QSize, QPropertyAnimation, QEasingCurve, QRectF, pyqtSignal
+from PyQt6.QtGui import QPainter, QPainterPath, QColor, QLinearGradient, QPixmap, QKeySequence, QShortcut
+import time
+from core.window_manager import WindowManager
+from core.plugin_supervisor import PluginSupervisor
+from core.command_palette import CommandPalette
+from core.icons import get_icons
+
+ICON_SIZE = 28  # logical pixels
+FRAME_BUDGET = 1000 / 60  # ms
+DEFAULT_PALETTE_SHORTCUT = "Ctrl+K"
+
+SIDEBAR_STYLE = """
+    QLabel#sidebarTitle {
+        color: #2c3e50;
+        font-weight: bold;
+        font-size: 14px;
+        padding-bottom: 5px;
+        border-bottom: 1px solid #e0e0e0;
+    }
+    QPushButton#pluginButton {
+        background-color: #3498db;
+        border: none;
+        border-radius: 25px;
+        color: white;
+    }
+    QPushButton#pluginButton:hover {
+        background-color: #2980b9;
+        border: 2px solid white;
+    }
+    QPushButton#pluginButton:pressed {
+        background-color: #21618c;
+        padding-top: 2px;
+        padding-left: 2px;
+    }
+    QLabel#pluginLabel {
+        color: #7f8c8d;
+        font-weight: 500;
+        font-size: 9px;
+        margin-top: 2px;
+    }
+    QPushButton#toggleButton {
+        background-color: #bdc3c7;
+        border: none;
+        border-radius: 4px;
+        color: #2c3e50;
+        font-weight: bold;
+    }
+    QPushButton#toggleButton:hover {
+        background-color: #95a5a6;
+    }
+"""
+
+
+class FrameLog:
+    """Animation ticks and sidebar paint times for one collapse/expand"""
+
+    def __init__(self, label):
+        self.label = label
+        self.ticks = []
+        self.paints = []
+
+    def tick(self):
+        self.ticks.append(time.perf_counter())
+
+    def paint(self, start, end):
+        self.paints.append((end - start) * 1000)
+
+    def report(self):
+        intervals = [(b - a) * 1000 for a, b in zip(self.ticks, self.ticks[1:])]
+        # A tick arriving after n frame budgets means n - 1 frames were skipped
+        dropped = sum(max(int(interval / FRAME_BUDGET + 0.5) - 1, 0) for interval in intervals)
+        worst = max(intervals, default=0.0)
+        paint_avg = sum(self.paints) / len(self.paints) if self.paints else 0.0
+        return (f"🎞️ Sidebar {self.label}: {len(self.ticks)} frames, {dropped} dropped "
+                f"(worst {worst:.1f}ms), {len(self.paints)} paints "
+                f"avg {paint_avg:.2f}ms max {max(self.paints, default=0.0):.2f}ms")
+
 
 class FloatingSidebar(QWidget):
+    # Emitted once, after the sidebar has been painted for the first time
+    firstPainted = pyqtSignal()
+
     def __init__(self, plugins, config_manager):
         super().__init__()
         self.plugins = plugins
         self.config_manager = config_manager
-        self.window_refs = []
+        # Plugins hosted out of process are opened through their worker
+        self.supervisor = PluginSupervisor(plugins, config_manager)
+        self.supervisor.statsChanged.connect(self.show_plugin_status)
+        self.window_manager = WindowManager(
+            {name: cls for name, cls in plugins.items() if not self.supervisor.hosts(name)}, config_manager)
         self.is_collapsed = False
         self.animation = None
+        self.has_painted = False
+        self.background = None
+        self.frame_log = None
 
-        # Check if Material Icons font is available
-        self.material_icons_available = "Material Icons" in QFontDatabase.families()
-        
         # Set window properties
         self.setWindowFlags(Qt.WindowType.FramelessWindowHint | 
                            Qt.WindowType.WindowStaysOnTopHint | 
                            Qt.WindowType.Tool)
         self.setAttribute(Qt.WidgetAttribute.WA_TranslucentBackground)
         
-        # Create main layout
+        # Create main layout; everything but the toggle button lives in
+        # one container so collapsing hides a single widget
         layout = QVBoxLayout(self)
         layout.setContentsMargins(10, 15, 10, 15)
         layout.setSpacing(12)
+        self.content = QWidget()
+        content_layout = QVBoxLayout(self.content)
+        content_layout.setContentsMargins(0, 0, 0, 0)
+        content_layout.setSpacing(12)
+        layout.addWidget(self.content)
+        
+        # One stylesheet for the whole sidebar, parsed once
+        self.setStyleSheet(SIDEBAR_STYLE)
         
         # Add title
         title = QLabel("Nova AI")
+        title.setObjectName("sidebarTitle")
         title.setAlignment(Qt.AlignmentFlag.AlignHCenter)
-        title.setStyleSheet("""
-            QLabel {
-                color: #2c3e50;
-                font-weight: bold;
-                font-size: 14px;
-                padding-bottom: 5px;
-                border-bottom: 1px solid #e0e0e0;
-            }
-        """)
-        layout.addWidget(title)
+        content_layout.addWidget(title)
         
-        # Material Icons Unicode mapping
-        material_icons = {
-            "Pilot": "\ue8e8",        # Chat icon
-            "Browser": "\ue89e",      # Public icon
-            "Notes": "\ue262",        # Notes icon
-            "Calculator": "\uf1ec",   # Calculate icon
-            "Settings": "\ue8b8",     # Settings icon
-            "Music": "\ue405",        # Music note icon
-            "Files": "\ue2c7",        # Folder icon
-            "Camera": "\ue3af",       # Camera icon
-            "Weather": "\ue63d",      # Weather icon
-            "Calendar": "\ue935",     # Calendar icon
-            "Mail": "\ue158",         # Mail icon
-            "Map": "\ue55f",          # Map icon
-            "Photos": "\ue413",       # Photo library icon
-            "Contacts": "\ue7fd",     # Contacts icon
-        }
-        
-        # Fallback text icons if Material Icons not available
-        fallback_icons = {
-            "Pilot": "💬",        # Chat bubble
-            "Browser": "🌐",      # Globe
-            "Notes": "📝",        # Notepad
-            "Calculator": "🧮",   # Calculator
-            "Settings": "⚙️",     # Gear
-            "Music": "🎵",        # Music note
-            "Files": "📁",        # Folder
-            "Camera": "📷",       # Camera
-            "Weather": "☀️",      # Sun
-            "Calendar": "📅",     # Calendar
-            "Mail": "✉️",         # Envelope
-            "Map": "🗺️",          # Map
-            "Photos": "🖼️",       # Picture
-            "Contacts": "👤",     # Person
-        }
+        # Command palette, from any window of the app ("palette_shortcut" in the config)
+        self.palette = CommandPalette(self)
+        shortcut = QKeySequence(self.config_manager.get("palette_shortcut", DEFAULT_PALETTE_SHORTCUT))
+        self.palette_shortcut = QShortcut(shortcut, self)
+        self.palette_shortcut.setContext(Qt.ShortcutContext.ApplicationShortcut)
+        self.palette_shortcut.activated.connect(self.palette.toggle)
+        title.setToolTip(f"Command palette: {shortcut.toString(QKeySequence.SequenceFormat.NativeText)}")
         
         # Add plugin buttons
+        icons = get_icons()
+        dpr = self.devicePixelRatioF()
+        self.buttons = {}
         for name, cls in self.plugins.items():
             # Create button
             btn = QPushButton()
+            btn.setObjectName("pluginButton")
             btn.setFixedSize(50, 50)
             btn.setProperty("pluginName", name)
             
-            # Set icon based on availability
-            if self.material_icons_available:
-                btn.setText(material_icons.get(name, "\ue88a"))  # Default: Apps icon
-                icon_font = QFont("Material Icons")
-                icon_font.setPointSize(24)
-                btn.setFont(icon_font)
-            else:
-                btn.setText(fallback_icons.get(name, "📱"))  # Default: Smartphone icon
-                btn.setFont(QFont("Arial", 16))
-            
-            # Style for all buttons
-            btn.setStyleSheet("""
-                QPushButton {
-                    background-color: #3498db;
-                    border: none;
-                    border-radius: 25px;
-                    color: white;
-                }
-                QPushButton:hover {
-                    background-color: #2980b9;
-                    border: 2px solid white;
-                }
-                QPushButton:pressed {
-                    background-color: #21618c;
-                    padding-top: 2px;
-                    padding-left: 2px;
-                }
-            """)
+            # Pre-rendered glyph (Material Icons, SVG or emoji fallback)
+            btn.setIcon(icons.plugin_icon(name, getattr(cls, "meta", None), ICON_SIZE, dpr))
+            btn.setIconSize(QSize(ICON_SIZE, ICON_SIZE))
             
             # Add label
             lbl = QLabel(name)
+            lbl.setObjectName("pluginLabel")
             lbl.setAlignment(Qt.AlignmentFlag.AlignHCenter)
-            lbl.setStyleSheet("""
-                QLabel {
-                    color: #7f8c8d;
-                    font-weight: 500;
-                    font-size: 9px;
-                    margin-top: 2px;
-                }
-            """)
             
-            layout.addWidget(btn, alignment=Qt.AlignmentFlag.AlignHCenter)
-            layout.addWidget(lbl, alignment=Qt.AlignmentFlag.AlignHCenter)
+            content_layout.addWidget(btn, alignment=Qt.AlignmentFlag.AlignHCenter)
+            content_layout.addWidget(lbl, alignment=Qt.AlignmentFlag.AlignHCenter)
+            self.buttons[name] = btn
             
             # Connect button click
             btn.clicked.connect(lambda _, c=cls, n=name: self.open_window(c, n))
@@ -135,28 +164,24 @@ class FloatingSidebar(QWidget):
         
         # Add toggle button
         self.toggle_btn = QPushButton("◀")
+        self.toggle_btn.setObjectName("toggleButton")
         self.toggle_btn.setFixedSize(30, 20)
-        self.toggle_btn.setStyleSheet("""
-            QPushButton {
-                background-color: #bdc3c7;
-                border: none;
-                border-radius: 4px;
-                color: #2c3e50;
-                font-weight: bold;
-            }
-            QPushButton:hover {
-                background-color: #95a5a6;
-            }
-        """)
         self.toggle_btn.clicked.connect(self.toggle_sidebar)
         layout.addWidget(self.toggle_btn, alignment=Qt.AlignmentFlag.AlignHCenter)
         
         # Set initial size
         self.setFixedWidth(90)
 
-    def paintEvent(self, event):
-        """Draw rounded corners and shadow effect"""
-        painter = QPainter(self)
+    def resizeEvent(self, event):
+        self.background = None
+        super().resizeEvent(event)
+
+    def render_background(self, dpr):
+        """Rounded, gradient-filled background at the current size and DPR"""
+        pixmap = QPixmap(int(round(self.width() * dpr)), int(round(self.height() * dpr)))
+        pixmap.setDevicePixelRatio(dpr)
+        pixmap.fill(Qt.GlobalColor.transparent)
+        painter = QPainter(pixmap)
         painter.setRenderHint(QPainter.RenderHint.Antialiasing)
         
         # Create rounded rectangle path
@@ -174,41 +199,60 @@ class FloatingSidebar(QWidget):
         # Draw border
         painter.setPen(QColor(220, 220, 220))
         painter.drawPath(path)
+        painter.end()
+        return pixmap
 
-    def open_window(self, window_cls, plugin_name):
-        """Open a new independent window"""
-        # Create the window with None as parent to make it independent
-        window = window_cls(self.config_manager, None)
+    def paintEvent(self, event):
+        """Blit the cached background; it is re-rendered only on resize or DPI change"""
+        start = time.perf_counter()
+        dpr = self.devicePixelRatioF()
+        if self.background is None or self.background.devicePixelRatio() != dpr:
+            self.background = self.render_background(dpr)
         
-        # Store reference to prevent garbage collection
-        self.window_refs.append(window)
+        painter = QPainter(self)
+        painter.drawPixmap(0, 0, self.background)
+        painter.end()
         
-        # Remove the window from our references when it's closed
-        window.destroyed.connect(lambda: self.window_refs.remove(window))
+        if self.frame_log is not None:
+            self.frame_log.paint(start, time.perf_counter())
         
-        window.show()
-        window.activateWindow()
+        if not self.has_painted:
+            self.has_painted = True
+            self.firstPainted.emit()
+
+    def open_window(self, window_cls, plugin_name):
+        """Open (or re-show) the plugin window according to its window policy"""
+        if self.supervisor.hosts(plugin_name):
+            self.supervisor.open(plugin_name)
+            window = None
+        else:
+            window = self.window_manager.open(plugin_name, window_cls)
         
         # Optional: Add a subtle animation when opening a window
         self.animate_click(plugin_name)
+        return window
+
+    def show_plugin_status(self, plugin_name, text):
+        """Worker process, CPU and RSS of an out-of-process plugin, on its button"""
+        button = self.buttons.get(plugin_name)
+        if button is not None:
+            button.setToolTip(f"{plugin_name} ({text})")
 
     def animate_click(self, plugin_name):
         """Animate button click effect"""
-        for i in range(self.layout().count()):
-            widget = self.layout().itemAt(i).widget()
-            if isinstance(widget, QPushButton) and widget.property("pluginName") == plugin_name:
-                # Create animation
-                animation = QPropertyAnimation(widget, b"geometry")
-                animation.setDuration(150)
-                animation.setEasingCurve(QEasingCurve.Type.OutQuad)
-                
-                start_rect = widget.geometry()
-                animation.setStartValue(start_rect)
-                animation.setKeyValueAt(0.5, start_rect.adjusted(-2, -2, 2, 2))
-                animation.setEndValue(start_rect)
-                
-                animation.start()
-                break
+        widget = self.buttons.get(plugin_name)
+        if widget is not None:
+            # Create animation
+            animation = QPropertyAnimation(widget, b"geometry", self)
+            animation.setDuration(150)
+            animation.setEasingCurve(QEasingCurve.Type.OutQuad)
+            
+            start_rect = widget.geometry()
+            animation.setStartValue(start_rect)
+            animation.setKeyValueAt(0.5, start_rect.adjusted(-2, -2, 2, 2))
+            animation.setEndValue(start_rect)
+            
+            animation.start(QPropertyAnimation.DeletionPolicy.DeleteWhenStopped)
 
     def toggle_sidebar(self):
         """Toggle sidebar collapse/expand"""
@@ -221,30 +265,33 @@ class FloatingSidebar(QWidget):
         self.animation.setDuration(300)
         self.animation.setEasingCurve(QEasingCurve.Type.InOutQuad)
         
+        # Optional frame-time log ("frame_log": true in the config)
+        if self.config_manager.get("frame_log", False):
+            self.frame_log = FrameLog("collapse" if self.is_collapsed else "expand")
+            self.animation.valueChanged.connect(self.frame_log.tick)
+            self.animation.finished.connect(self.report_frames)
+        else:
+            self.frame_log = None
+        
         current_rect = self.geometry()
         if self.is_collapsed:
             self.animation.setStartValue(current_rect)
             self.animation.setEndValue(QRect(current_rect.x() + 70, current_rect.y(), 20, current_rect.height()))
             self.toggle_btn.setText("▶")
-            
-            # Hide all widgets except toggle button
-            for i in range(self.layout().count()):
-                widget = self.layout().itemAt(i).widget()
-                if widget and widget != self.toggle_btn:
-                    widget.hide()
+            self.content.hide()
         else:
             self.animation.setStartValue(current_rect)
             self.animation.setEndValue(QRect(current_rect.x() - 70, current_rect.y(), 90, current_rect.height()))
             self.toggle_btn.setText("◀")
-            
-            # Show all widgets
-            for i in range(self.layout().count()):
-                widget = self.layout().itemAt(i).widget()
-                if widget:
-                    widget.show()
+            self.content.show()
         
         self.animation.start()
 
+    def report_frames(self):
+        if self.frame_log is not None:
+            print(self.frame_log.report())
+            self.frame_log = None
+
     def place_on_right_center(self, app, width=90):
         screen_geometry = app.primaryScreen().geometry()
         height = self.sizeHint().height()
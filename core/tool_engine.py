@@ -0,0 +1,254 @@
+# core/tool_engine.py
+import time, itertools, threading, multiprocessing
+from collections import deque
+from multiprocessing.connection import wait
+from core.metrics import get_metrics
+from core.tool_worker import start_worker
+
+MAX_WORKERS = 4
+DEFAULT_TIMEOUT = 10.0      # seconds per tool call
+DEFAULT_MEMORY_MB = 256     # address space a call may add on top of the idle worker
+HISTORY = 200               # finished calls kept for the Tools window
+
+
+class Tool:
+    """A function the LLM may call. target is 'module:function' so workers can import it."""
+
+    def __init__(self, name, target, description, parameters, required=(),
+                 timeout=DEFAULT_TIMEOUT, memory_mb=DEFAULT_MEMORY_MB):
+        self.name = name
+        self.target = target
+        self.description = description
+        self.parameters = parameters
+        self.required = list(required)
+        self.timeout = timeout
+        self.memory_mb = memory_mb
+
+    def declaration(self):
+        """Gemini functionDeclaration."""
+        return {"name": self.name, "description": self.description,
+                "parameters": {"type": "object", "properties": self.parameters, "required": self.required}}
+
+
+class ToolRegistry:
+    def __init__(self):
+        self.tools = {}
+
+    def register(self, tool):
+        self.tools[tool.name] = tool
+        return tool
+
+    def register_function(self, name, function, description, parameters, required=(), **options):
+        target = f"{function.__module__}:{function.__qualname__}"
+        return self.register(Tool(name, target, description, parameters, required, **options))
+
+    def get(self, name):
+        return self.tools.get(name)
+
+    def declarations(self):
+        """The "tools" entry of a Gemini request."""
+        return [{"functionDeclarations": [tool.declaration() for tool in self.tools.values()]}]
+
+
+class _Worker:
+    def __init__(self, context):
+        self.conn, child = context.Pipe()
+        self.process = start_worker(context, child)
+        child.close()
+
+    def kill(self):
+        self.process.kill()
+        self.process.join(1)
+        self.conn.close()
+
+
+class ToolEngine:
+    """
+    Runs tool calls in a pool of worker processes. All calls of one model
+    turn are dispatched at once, so a turn takes as long as its slowest
+    tool. A call that outlives its timeout has its worker killed and
+    replaced; memory is capped per call with RLIMIT_AS where available.
+    Listeners receive an event dict per call start / end and per turn.
+    """
+
+    def __init__(self, registry=None, max_workers=MAX_WORKERS):
+        self.registry = registry or default_registry()
+        self.max_workers = max_workers
+        self.context = multiprocessing.get_context("spawn")
+        self.idle = []
+        self.live = 0
+        self.cond = threading.Condition()
+        self.listeners = []
+        self.history = deque(maxlen=HISTORY)
+        self.ids = itertools.count(1)
+
+    def add_listener(self, callback):
+        self.listeners.append(callback)
+
+    def remove_listener(self, callback):
+        if callback in self.listeners:
+            self.listeners.remove(callback)
+
+    def _emit(self, event):
+        if event["event"] != "start":
+            self.history.append(event)
+        for callback in list(self.listeners):
+            callback(event)
+
+    def _acquire(self):
+        with self.cond:
+            while not self.idle and self.live >= self.max_workers:
+                self.cond.wait()
+            if self.idle:
+                return self.idle.pop()
+            self.live += 1
+        try:
+            return _Worker(self.context)
+        except Exception:
+            self._release(None)
+            raise
+
+    def _can_start(self):
+        with self.cond:
+            return bool(self.idle) or self.live < self.max_workers
+
+    def _release(self, worker):
+        with self.cond:
+            if worker is None:
+                self.live -= 1
+            else:
+                self.idle.append(worker)
+            self.cond.notify()
+
+    def prewarm(self):
+        """Start the missing workers ahead of the first call (spawning takes a moment)."""
+        with self.cond:
+            missing = self.max_workers - self.live
+            self.live += missing
+
+        def start():
+            for _ in range(missing):
+                try:
+                    self._release(_Worker(self.context))
+                except Exception as e:
+                    print(f"⚠️ Failed to start a tool worker: {e}")
+                    self._release(None)
+        if missing > 0:
+            threading.Thread(target=start, name="tool-prewarm", daemon=True).start()
+
+    def run(self, calls, cancel_event=None):
+        """
+        Execute [(name, args)] concurrently; returns one dict per call, in
+        order: {"result": value} or {"error": message}. Blocks the caller.
+        """
+        turn = next(self.ids)
+        results = [None] * len(calls)
+        pending = deque(enumerate(calls))
+        running = {}   # conn -> (position, call id, name, worker, started, deadline)
+        turn_start = time.perf_counter()
+        busy_total = 0.0
+
+        def finish(position, call_id, name, started, outcome, value):
+            nonlocal busy_total
+            elapsed = time.perf_counter() - started
+            busy_total += elapsed
+            ok = outcome == "ok"
+            results[position] = {"result": value} if ok else {"error": value}
+            metrics = get_metrics()
+            metrics.counter("tool_calls_total", "Tool calls", tool=name, outcome=outcome).inc()
+            metrics.histogram("tool_call_seconds", "Tool call duration", tool=name).observe(elapsed)
+            self._emit({"event": "end", "id": call_id, "turn": turn, "tool": name, "ok": ok,
+                        "elapsed": elapsed, "error": None if ok else value})
+
+        while pending or running:
+            if cancel_event is not None and cancel_event.is_set():
+                # Every call gets its end event, so listeners never keep one "running"
+                for position, call_id, name, worker, started, _ in running.values():
+                    worker.kill()
+                    self._release(None)
+                    finish(position, call_id, name, started, "cancelled", "cancelled")
+                now = time.perf_counter()
+                for position, (name, _) in pending:
+                    finish(position, next(self.ids), name, now, "cancelled", "cancelled")
+                raise RuntimeError("Tool calls cancelled")
+
+            # Start every pending call; more calls than workers wait for a free one
+            while pending and (running == {} or self._can_start()):
+                position, (name, args) = pending.popleft()
+                call_id = next(self.ids)
+                started = time.perf_counter()
+                self._emit({"event": "start", "id": call_id, "turn": turn, "tool": name,
+                            "args": args, "started": time.time()})
+                tool = self.registry.get(name)
+                if tool is None:
+                    finish(position, call_id, name, started, "error", f"unknown tool {name!r}")
+                    continue
+                message = (tool.target, dict(args or {}), tool.memory_mb)
+                worker = self._acquire()
+                try:
+                    worker.conn.send(message)
+                except OSError:
+                    # An idle worker died; replace it once
+                    worker.kill()
+                    self._release(None)
+                    worker = self._acquire()
+                    worker.conn.send(message)
+                running[worker.conn] = (position, call_id, name, worker, started, started + tool.timeout)
+
+            if not running:
+                continue
+            now = time.perf_counter()
+            timeout = min(entry[5] for entry in running.values()) - now
+            for conn in wait(list(running), timeout=min(max(timeout, 0), 0.25)):
+                position, call_id, name, worker, started, _ = running.pop(conn)
+                try:
+                    ok, value = conn.recv()
+                    self._release(worker)
+                    outcome = "ok" if ok else "error"
+                except (EOFError, OSError):
+                    # The worker died (e.g. killed by the OS for memory)
+                    outcome, value = "error", "tool process exited"
+                    worker.kill()
+                    self._release(None)
+                finish(position, call_id, name, started, outcome, value)
+
+            now = time.perf_counter()
+            for conn, (position, call_id, name, worker, started, deadline) in list(running.items()):
+                if now >= deadline:
+                    del running[conn]
+                    worker.kill()
+                    self._release(None)
+                    finish(position, call_id, name, started, "timeout", f"timed out after {self.registry.get(name).timeout:g}s")
+
+        wall = time.perf_counter() - turn_start
+        self._emit({"event": "turn", "turn": turn, "calls": len(calls), "wall": wall, "sum": busy_total})
+        return results
+
+    def shutdown(self):
+        with self.cond:
+            workers, self.idle = self.idle, []
+            self.live -= len(workers)
+        for worker in workers:
+            worker.kill()
+
+
+def default_registry():
+    """Registry with the built-in local tools."""
+    from core.builtin_tools import BUILTIN_TOOLS
+    registry = ToolRegistry()
+    for name, function, description, parameters, required in BUILTIN_TOOLS:
+        registry.register_function(name, function, description, parameters, required)
+    return registry
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_tool_engine():
+    """Return the process-wide tool engine."""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = ToolEngine()
+        return _engine
@@ -0,0 +1,79 @@
+# core/tool_worker.py
+"""
+Tool worker process loop. A spawned child re-imports the parent's __main__
+module as __mp_main__; this module stands in for main.py while a worker
+starts, so workers import only the tools they run, never Qt or the sidebar.
+Keep its imports to the standard library.
+"""
+import sys, importlib, threading
+
+try:
+    import resource
+except ImportError:  # no per-process memory limits on this platform
+    resource = None
+
+_main_lock = threading.Lock()
+
+
+def _limit_memory(megabytes):
+    """Cap the address space at what the worker uses now plus megabytes."""
+    if resource is None or not megabytes:
+        return
+    try:
+        with open("/proc/self/statm") as f:
+            used = int(f.read().split()[0]) * resource.getpagesize()
+    except OSError:
+        used = 0
+    _, hard = resource.getrlimit(resource.RLIMIT_AS)
+    soft = used + megabytes * 1024 * 1024
+    if hard != resource.RLIM_INFINITY:
+        soft = min(soft, hard)
+    resource.setrlimit(resource.RLIMIT_AS, (soft, hard))
+
+
+def _unlimit_memory():
+    if resource is not None:
+        _, hard = resource.getrlimit(resource.RLIMIT_AS)
+        resource.setrlimit(resource.RLIMIT_AS, (hard, hard))
+
+
+def worker_main(conn):
+    """Worker process loop: receive (target, args, memory_mb), reply (ok, value)."""
+    functions = {}
+    while True:
+        try:
+            target, args, memory_mb = conn.recv()
+        except (EOFError, OSError):
+            return
+        try:
+            function = functions.get(target)
+            if function is None:
+                module, _, name = target.partition(":")
+                function = functions[target] = getattr(importlib.import_module(module), name)
+            _limit_memory(memory_mb)
+            try:
+                reply = (True, function(**args))
+            finally:
+                _unlimit_memory()
+        except MemoryError:
+            reply = (False, f"memory limit of {memory_mb} MB exceeded")
+        except Exception as e:
+            reply = (False, f"{type(e).__name__}: {e}")
+        try:
+            conn.send(reply)
+        except (TypeError, ValueError, AttributeError) as e:
+            conn.send((False, f"result cannot be returned: {e}"))
+
+
+def start_worker(context, conn):
+    """Start a worker on conn with this module, not the app's, as its main module."""
+    process = context.Process(target=worker_main, args=(conn,), name="nova-tool-worker", daemon=True)
+    with _main_lock:
+        # Spawn records sys.modules["__main__"] when the process starts
+        main = sys.modules["__main__"]
+        sys.modules["__main__"] = sys.modules[__name__]
+        try:
+            process.start()
+        finally:
+            sys.modules["__main__"] = main
+    return process
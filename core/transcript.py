@@ -0,0 +1,472 @@
+# core/transcript.py
+import json, html, tempfile
+from collections import OrderedDict
+from PyQt6.QtWidgets import (QAbstractScrollArea, QStyledItemDelegate, QStyleOptionViewItem,
+                             QApplication, QMenu)
+from PyQt6.QtCore import Qt, QAbstractListModel, QModelIndex, QRect, QTimer
+from PyQt6.QtGui import QPainter, QTextDocument, QFontMetrics
+from core.markdown_render import MarkdownRenderer, render_plain
+
+PAGE_SIZE = 256        # messages per page
+RESIDENT_PAGES = 8     # pages kept in memory; older ones are spilled to disk
+DOCUMENT_CACHE = 64    # laid out QTextDocuments kept for visible rows
+DOCUMENT_BYTES_PER_CHAR = 64   # measured heap cost of a laid out QTextDocument
+MESSAGE_SPACING = 12
+
+SENDER_COLORS = {
+    "You": "#007acc",
+    "AI": "#4caf50",
+    "System": "#ff5722",
+}
+
+
+class TranscriptModel(QAbstractListModel):
+    """
+    Append-mostly list of chat messages. Messages live in fixed-size pages;
+    only the most recently used pages stay in memory and the rest are
+    spilled to an anonymous temporary file, so memory stays bounded however
+    long the session runs.
+    """
+    SenderRole = Qt.ItemDataRole.UserRole + 1
+    TextRole = Qt.ItemDataRole.UserRole + 2
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._reset_storage()
+
+    def _reset_storage(self):
+        self.count = 0
+        self.pages = OrderedDict()  # page number -> list of [sender, text]
+        self.spilled = {}           # page number -> (offset, length) in spill_file
+        self.dirty = set()          # resident pages changed since they were spilled
+        self.spill_file = None
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.count
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or not 0 <= index.row() < self.count:
+            return None
+        sender, text = self._page(index.row() // PAGE_SIZE)[index.row() % PAGE_SIZE]
+        if role in (Qt.ItemDataRole.DisplayRole, self.TextRole):
+            return text
+        if role == self.SenderRole:
+            return sender
+        return None
+
+    def message(self, row):
+        """Return (sender, text) for row."""
+        sender, text = self._page(row // PAGE_SIZE)[row % PAGE_SIZE]
+        return sender, text
+
+    def messages(self):
+        """Iterate over every (sender, text), one page in memory at a time."""
+        for row in range(self.count):
+            yield self.message(row)
+
+    def append_message(self, sender, text):
+        """Append a message and return its row."""
+        row = self.count
+        self.beginInsertRows(QModelIndex(), row, row)
+        page_no = row // PAGE_SIZE
+        if row % PAGE_SIZE == 0:
+            self.pages[page_no] = []
+        page = self._page(page_no)
+        page.append([sender, text])
+        self.dirty.add(page_no)
+        self.count += 1
+        self.endInsertRows()
+        self._evict()
+        return row
+
+    def append_text(self, row, text):
+        """Extend the text of an existing message (streaming replies)."""
+        page_no = row // PAGE_SIZE
+        self._page(page_no)[row % PAGE_SIZE][1] += text
+        self.dirty.add(page_no)
+        index = self.index(row)
+        self.dataChanged.emit(index, index, [Qt.ItemDataRole.DisplayRole, self.TextRole])
+
+    def replace_all(self, messages):
+        """Replace the transcript with [(sender, text), ...] in one reset."""
+        self.beginResetModel()
+        if self.spill_file is not None:
+            self.spill_file.close()
+        self._reset_storage()
+        for row, (sender, text) in enumerate(messages):
+            page_no = row // PAGE_SIZE
+            if row % PAGE_SIZE == 0:
+                self.pages[page_no] = []
+                self.dirty.add(page_no)
+            self.pages[page_no].append([sender, text])
+            self.count = row + 1
+            if row % PAGE_SIZE == 0:
+                self._evict()  # spills full pages once the new tail page exists
+        self.endResetModel()
+
+    def clear(self):
+        self.beginResetModel()
+        if self.spill_file is not None:
+            self.spill_file.close()
+        self._reset_storage()
+        self.endResetModel()
+
+    def resident_pages(self):
+        return len(self.pages)
+
+    def resident_bytes(self):
+        """Approximate bytes of message text held in memory."""
+        return sum(len(sender) + len(text) for page in self.pages.values() for sender, text in page)
+
+    def _page(self, page_no):
+        page = self.pages.get(page_no)
+        if page is not None:
+            self.pages.move_to_end(page_no)
+            return page
+
+        offset, length = self.spilled[page_no]
+        self.spill_file.seek(offset)
+        page = json.loads(self.spill_file.read(length).decode("utf-8"))
+        self.pages[page_no] = page
+        self._evict(keep=page_no)
+        return page
+
+    def _evict(self, keep=None):
+        tail = (self.count - 1) // PAGE_SIZE if self.count else 0
+        for page_no in list(self.pages):
+            if len(self.pages) <= RESIDENT_PAGES:
+                break
+            if page_no in (tail, keep):
+                continue
+            if page_no in self.dirty or page_no not in self.spilled:
+                self._spill(page_no)
+            del self.pages[page_no]
+
+    def _spill(self, page_no):
+        if self.spill_file is None:
+            self.spill_file = tempfile.TemporaryFile(prefix="nova-transcript-")
+        blob = json.dumps(self.pages[page_no], separators=(",", ":")).encode("utf-8")
+        self.spill_file.seek(0, 2)
+        self.spilled[page_no] = (self.spill_file.tell(), len(blob))
+        self.spill_file.write(blob)
+        self.dirty.discard(page_no)
+
+
+class HeightIndex:
+    """
+    Fenwick tree over row heights: append, update, y-of-row and
+    row-at-y are all O(log n).
+    """
+
+    def __init__(self):
+        self.heights = []
+        self.tree = [0]
+
+    def __len__(self):
+        return len(self.heights)
+
+    def rebuild(self, heights):
+        self.heights = list(heights)
+        n = len(self.heights)
+        self.tree = [0] + self.heights[:]
+        for i in range(1, n + 1):
+            parent = i + (i & -i)
+            if parent <= n:
+                self.tree[parent] += self.tree[i]
+
+    def append(self, height):
+        self.heights.append(height)
+        n = len(self.heights)
+        self.tree.append(height + self.prefix(n - 1) - self.prefix(n - (n & -n)))
+
+    def update(self, row, height):
+        delta = height - self.heights[row]
+        if not delta:
+            return
+        self.heights[row] = height
+        i = row + 1
+        while i < len(self.tree):
+            self.tree[i] += delta
+            i += i & -i
+
+    def prefix(self, count):
+        """Total height of the first count rows (= y of row `count`)."""
+        total = 0
+        while count > 0:
+            total += self.tree[count]
+            count -= count & -count
+        return total
+
+    def total(self):
+        return self.prefix(len(self.heights))
+
+    def row_at(self, y):
+        """Row containing y (clamped to the last row)."""
+        n = len(self.heights)
+        pos = 0
+        step = 1 << n.bit_length()
+        while step:
+            nxt = pos + step
+            if nxt <= n and self.tree[nxt] <= y:
+                pos = nxt
+                y -= self.tree[nxt]
+            step >>= 1
+        return min(pos, n - 1)
+
+
+class MessageDelegate(QStyledItemDelegate):
+    """
+    Renders one message as rich text; caches laid out documents per row.
+    AI replies are Markdown, converted off the GUI thread by the renderer;
+    until a row's HTML is ready its text is shown as plain text.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.documents = OrderedDict()  # row -> (width, QTextDocument)
+        self.renderer = MarkdownRenderer(self)
+
+    def to_html(self, sender, text, row=None):
+        color = SENDER_COLORS.get(sender, "#000000")
+        label = f'<span style="font-weight: 600; color: {color};">{html.escape(sender)}:</span>'
+        if sender == "AI" and row is not None:
+            body = self.renderer.html_for(row, text)
+            if body is not None:
+                return f'{label}<div style="color: #333333;">{body}</div>'
+        return f'{label} <span style="color: #333333;">{render_plain(text)}</span>'
+
+    def document(self, option, index):
+        row = index.row()
+        width = option.rect.width()
+        cached = self.documents.get(row)
+        if cached is not None and cached[0] == width:
+            self.documents.move_to_end(row)
+            return cached[1]
+
+        doc = QTextDocument()
+        doc.setDefaultFont(option.font)
+        doc.setDocumentMargin(4)
+        doc.setHtml(self.to_html(index.data(TranscriptModel.SenderRole), index.data(TranscriptModel.TextRole), row))
+        doc.setTextWidth(width)
+        self.documents[row] = (width, doc)
+        while len(self.documents) > DOCUMENT_CACHE:
+            self.documents.popitem(last=False)
+        return doc
+
+    def memory_usage(self):
+        documents = sum(doc.characterCount() for _, doc in self.documents.values())
+        return documents * DOCUMENT_BYTES_PER_CHAR + self.renderer.memory_usage()
+
+    def invalidate(self, row=None):
+        if row is None:
+            self.documents.clear()
+        else:
+            self.documents.pop(row, None)
+
+    def sizeHint(self, option, index):
+        doc = self.document(option, index)
+        size = doc.size().toSize()
+        size.setHeight(size.height() + MESSAGE_SPACING)
+        return size
+
+    def paint(self, painter, option, index):
+        doc = self.document(option, index)
+        painter.save()
+        painter.translate(option.rect.topLeft())
+        doc.drawContents(painter)
+        painter.restore()
+
+
+class TranscriptView(QAbstractScrollArea):
+    """
+    Virtualized view over a TranscriptModel. Row heights start as cheap
+    estimates and are replaced by exact delegate measurements the first
+    time a row becomes visible; only visible rows are ever laid out.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.model = None
+        self.delegate = MessageDelegate(self)
+        self.heights = HeightIndex()
+        self.measured = bytearray()   # 1 if heights[row] is exact for the current width
+        self.lengths = []             # text length per row, for estimates
+        self.layout_width = 0
+        self.stick_to_bottom = True
+        self.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+        self.verticalScrollBar().setSingleStep(20)
+        self.verticalScrollBar().valueChanged.connect(self._on_scrolled)
+        self.delegate.renderer.rendered.connect(self._on_rendered)
+
+        # Re-measure after a resize once the user stops dragging
+        self.relayout_timer = QTimer(self)
+        self.relayout_timer.setSingleShot(True)
+        self.relayout_timer.setInterval(50)
+        self.relayout_timer.timeout.connect(self.relayout)
+
+    def setModel(self, model):
+        self.model = model
+        model.rowsInserted.connect(self._on_rows_inserted)
+        model.dataChanged.connect(self._on_data_changed)
+        model.modelReset.connect(self._on_reset)
+        self._on_reset()
+
+    def content_width(self):
+        return max(self.viewport().width(), 50)
+
+    def height_estimator(self):
+        """Return a cheap length -> height function for the current font and width."""
+        metrics = QFontMetrics(self.font())
+        chars_per_line = max(self.content_width() // max(metrics.averageCharWidth(), 1), 1)
+        line = metrics.lineSpacing()
+        return lambda length: (1 + length // chars_per_line) * line + 8 + MESSAGE_SPACING
+
+    def _on_reset(self):
+        self.delegate.invalidate()
+        self.delegate.renderer.reset()
+        self.heights = HeightIndex()
+        self.measured = bytearray()
+        self.lengths = []
+        self.stick_to_bottom = True
+        if self.model is not None and self.model.count:
+            self.lengths = [len(text) for _, text in self.model.messages()]
+            self.measured = bytearray(len(self.lengths))
+            self.heights.rebuild(map(self.height_estimator(), self.lengths))
+        self._update_scrollbar()
+        self.viewport().update()
+
+    def _on_rows_inserted(self, parent, first, last):
+        estimate = self.height_estimator()
+        for row in range(first, last + 1):
+            length = len(self.model.data(self.model.index(row), TranscriptModel.TextRole) or "")
+            self.lengths.append(length)
+            self.measured.append(0)
+            self.heights.append(estimate(length))
+        self._update_scrollbar()
+        self.viewport().update()
+
+    def _on_data_changed(self, top_left, bottom_right, roles=()):
+        for row in range(top_left.row(), bottom_right.row() + 1):
+            self.delegate.invalidate(row)
+            self.lengths[row] = len(self.model.data(self.model.index(row), TranscriptModel.TextRole) or "")
+            self.measured[row] = 0
+        self.viewport().update()
+
+    def _on_rendered(self, row):
+        # Markdown for this row is ready: lay it out again on the next paint
+        if row < len(self.lengths):
+            self.delegate.invalidate(row)
+            self.measured[row] = 0
+            self.viewport().update()
+
+    def relayout(self):
+        """Drop exact measurements after a width change and re-estimate every row."""
+        if self.layout_width == self.content_width():
+            return
+        anchor = self.heights.row_at(self.verticalScrollBar().value()) if len(self.heights) else 0
+        self.layout_width = self.content_width()
+        self.delegate.invalidate()
+        self.measured = bytearray(len(self.lengths))
+        self.heights.rebuild(map(self.height_estimator(), self.lengths))
+        self._update_scrollbar()
+        if not self.stick_to_bottom and len(self.heights):
+            self.verticalScrollBar().setValue(self.heights.prefix(anchor))
+        self.viewport().update()
+
+    def _update_scrollbar(self):
+        bar = self.verticalScrollBar()
+        page = self.viewport().height()
+        bar.setPageStep(page)
+        bar.setRange(0, max(self.heights.total() - page, 0))
+        if self.stick_to_bottom:
+            bar.setValue(bar.maximum())
+
+    def _on_scrolled(self, value):
+        bar = self.verticalScrollBar()
+        self.stick_to_bottom = value >= bar.maximum() - 4
+        self.viewport().update()
+
+    def scroll_to_bottom(self):
+        self.stick_to_bottom = True
+        self._update_scrollbar()
+
+    def memory_usage(self):
+        """Approximate bytes of laid out documents, rendered HTML and row geometry."""
+        rows = len(self.lengths)
+        return self.delegate.memory_usage() + rows * (8 + 8 + 1) * 2
+
+    def release(self):
+        """Stop the Markdown worker and drop cached layouts before the view is deleted."""
+        self.delegate.renderer.stop()
+        self.delegate.invalidate()
+
+    def option_for(self, row, y):
+        option = QStyleOptionViewItem()
+        option.initFrom(self.viewport())
+        option.font = self.font()
+        option.rect = QRect(0, y, self.content_width(), self.heights.heights[row])
+        return option
+
+    def paintEvent(self, event):
+        if self.model is None or not len(self.heights):
+            return
+        # While a resize is pending, paint with the old heights and measure nothing
+        stale = self.layout_width != self.content_width()
+        if stale and not self.layout_width:
+            self.relayout()
+            stale = False
+        elif stale:
+            self.relayout_timer.start()
+
+        painter = QPainter(self.viewport())
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        top = self.verticalScrollBar().value()
+        bottom = top + self.viewport().height()
+        row = self.heights.row_at(top)
+        remeasured = False
+
+        while row < len(self.heights):
+            y = self.heights.prefix(row)
+            if y >= bottom:
+                break
+            option = self.option_for(row, y - top)
+            index = self.model.index(row)
+            if not stale and not self.measured[row]:
+                height = self.delegate.sizeHint(option, index).height()
+                self.measured[row] = 1
+                if height != self.heights.heights[row]:
+                    self.heights.update(row, height)
+                    option.rect.setHeight(height)
+                    remeasured = True
+            self.delegate.paint(painter, option, index)
+            row += 1
+        painter.end()
+
+        if remeasured:
+            # Exact heights replaced estimates; fix the scroll range next tick
+            QTimer.singleShot(0, self._after_remeasure)
+
+    def _after_remeasure(self):
+        self._update_scrollbar()
+        self.viewport().update()
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self._update_scrollbar()
+        if self.layout_width and self.layout_width != self.content_width():
+            self.relayout_timer.start()
+
+    def row_at(self, y):
+        if not len(self.heights):
+            return -1
+        row = self.heights.row_at(self.verticalScrollBar().value() + y)
+        return row if self.heights.prefix(row + 1) > self.verticalScrollBar().value() + y else -1
+
+    def contextMenuEvent(self, event):
+        row = self.row_at(event.pos().y())
+        if row < 0:
+            return
+        menu = QMenu(self)
+        copy_action = menu.addAction("Copy message")
+        if menu.exec(event.globalPos()) == copy_action:
+            QApplication.clipboard().setText(self.model.message(row)[1])
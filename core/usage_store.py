@@ -0,0 +1,272 @@
+# core/usage_store.py
+"""
+Append-only columnar log of LLM requests. Every column is its own file of
+fixed-width little-endian values (numpy can map them as they are) and
+strings.txt is the dictionary for provider / model / source names: a
+name's code is its line number. Labels must come from a bounded set, so
+the launch a request belongs to is its own "run" column, not part of the
+source name. Rows are appended with the stdlib array
+module; analytics need numpy and run without per-row Python code.
+"""
+import os, sys, time, array, threading
+from datetime import datetime
+
+try:
+    import numpy as np
+except ImportError:  # usage is still recorded, only the analytics are unavailable
+    np = None
+
+from core.config import DATA_DIR
+
+USAGE_DIR = os.path.join(DATA_DIR, "usage")
+STRINGS_FILE = "strings.txt"
+
+# column -> (array typecode, numpy dtype)
+COLUMNS = {
+    "time": ("d", "<f8"),            # Unix time the request finished
+    "provider": ("H", "<u2"),        # codes into strings.txt
+    "model": ("H", "<u2"),
+    "source": ("H", "<u2"),          # window that sent the request
+    "status": ("B", "u1"),
+    "prompt_tokens": ("I", "<u4"),
+    "output_tokens": ("I", "<u4"),
+    "latency": ("f", "<f4"),         # seconds
+    "run": ("I", "<u4"),             # Unix time the logging process started
+}
+RUN_STARTED = int(time.time())
+STATUS_OK = 0
+STATUS_ERROR = 1
+
+GROUP_KEYS = ("day", "run", "provider", "model", "source")
+PERCENTILES = (50, 95, 99)
+DENSE_GROUPS = 1 << 22   # packed key range counted with bincount instead of np.unique
+
+# USD per million (prompt, output) tokens; "usage_prices" in the config overrides
+DEFAULT_PRICES = {
+    "gemini-2.0-flash": (0.10, 0.40),
+    "gpt-4o-mini": (0.15, 0.60),
+    "grok-2-latest": (2.00, 10.00),
+}
+
+
+class UsageStore:
+    """One row per LLM request; record() may be called from any thread."""
+
+    def __init__(self, path=USAGE_DIR):
+        self.path = path
+        self.lock = threading.Lock()
+        self.files = None      # column -> append handle, opened on first record
+        self.codes = {}        # string -> code
+
+    def _column_path(self, name):
+        return os.path.join(self.path, name + ".col")
+
+    def row_count(self):
+        """
+        Rows present in every column (a crash can leave one column longer).
+        A column missing from an older log does not count; it reads as zeros.
+        """
+        counts = []
+        for name, (typecode, _) in COLUMNS.items():
+            try:
+                counts.append(os.path.getsize(self._column_path(name)) // array.array(typecode).itemsize)
+            except OSError:
+                pass
+        return min(counts, default=0)
+
+    def strings(self):
+        """The string dictionary: code -> name."""
+        try:
+            with open(os.path.join(self.path, STRINGS_FILE), "r", encoding="utf-8") as f:
+                return f.read().split("\n")[:-1]
+        except OSError:
+            return []
+
+    def _open(self):
+        os.makedirs(self.path, exist_ok=True)
+        rows = self.row_count()
+        self.files = {}
+        for name, (typecode, _) in COLUMNS.items():
+            f = open(self._column_path(name), "ab")
+            size = rows * array.array(typecode).itemsize
+            if f.tell() < size:
+                f.write(b"\0" * (size - f.tell()))  # a column added since the log was started
+            elif f.tell() != size:
+                f.truncate(size)  # drop the tail of a row torn by a crash
+            self.files[name] = f
+        strings = self.strings()
+        self.codes = {text: code for code, text in enumerate(strings)}
+        self.strings_file = open(os.path.join(self.path, STRINGS_FILE), "a", encoding="utf-8")
+        # An unterminated last line is a name whose row was never written
+        self.strings_file.truncate(sum(len(s.encode("utf-8")) + 1 for s in strings))
+
+    def code(self, text):
+        text = " ".join(str(text or "").split())
+        code = self.codes.get(text)
+        if code is None:
+            code = self.codes[text] = len(self.codes)
+            # The name is on disk before any row refers to it
+            self.strings_file.write(text + "\n")
+            self.strings_file.flush()
+        return code
+
+    def record(self, provider, model, source, ok, prompt_tokens, output_tokens, latency, when=None):
+        self.append([(when or time.time(), provider, model, source, STATUS_OK if ok else STATUS_ERROR,
+                      prompt_tokens, output_tokens, latency, RUN_STARTED)])
+
+    def append(self, rows):
+        """Append (time, provider, model, source, status, prompt, output, latency, run) tuples."""
+        with self.lock:
+            if self.files is None:
+                self._open()
+            values = list(zip(*rows))
+            for position in (1, 2, 3):
+                values[position] = [self.code(text) for text in values[position]]
+            # Every column is converted (and range-checked) before any is written,
+            # so a bad value cannot leave the columns different lengths
+            columns = [array.array(typecode, column) for (typecode, _), column in zip(COLUMNS.values(), values)]
+            for name, data in zip(COLUMNS, columns):
+                if sys.byteorder == "big":
+                    data.byteswap()
+                data.tofile(self.files[name])
+            for f in self.files.values():
+                f.flush()
+
+    def load(self):
+        """
+        (columns, strings): every column mapped read-only as a numpy array of
+        the same length, and the dictionary covering every code in them.
+        """
+        if np is None:
+            raise RuntimeError("Usage analytics need numpy (pip install numpy)")
+        rows = self.row_count()
+        data = {}
+        for name, (_, dtype) in COLUMNS.items():
+            if rows and os.path.exists(self._column_path(name)):
+                data[name] = np.memmap(self._column_path(name), dtype=dtype, mode="r", shape=(rows,))
+            else:
+                data[name] = np.zeros(rows, dtype)  # none logged yet, or added since
+        # Read after the row count: names are written before the rows using them
+        return data, self.strings()
+
+    def close(self):
+        with self.lock:
+            if self.files is not None:
+                for f in list(self.files.values()) + [self.strings_file]:
+                    f.close()
+                self.files = None
+
+
+def price_table(strings, prices=None):
+    """Per-code arrays of prompt and output prices in USD per token."""
+    table = dict(DEFAULT_PRICES)
+    table.update(prices or {})
+    prompt_price = np.zeros(max(len(strings), 1))
+    output_price = np.zeros(max(len(strings), 1))
+    for code, name in enumerate(strings):
+        if name in table:
+            prompt_price[code], output_price[code] = (value / 1e6 for value in table[name])
+    return prompt_price, output_price
+
+
+def aggregate(data, strings, group_by=("day",), since=None, percentiles=PERCENTILES, prices=None):
+    """
+    Usage totals, cost and latency percentiles per group of GROUP_KEYS, one
+    dict per group ordered by key. The group keys are packed into one int64
+    per row and counted with bincount (np.unique when the packed range is
+    too sparse); percentiles (of successful requests, None for a group
+    without any) come from one latency sort regrouped by a stable sort on
+    the group id.
+    """
+    if since is not None:
+        selected = data["time"] >= since
+        data = {name: column[selected] for name, column in data.items()}
+    rows = len(data["time"])
+    if not rows:
+        return []
+
+    offset = datetime.now().astimezone().utcoffset().total_seconds()
+    packed = np.zeros(rows, np.int64)
+    radix = []  # (low, span) per key
+    for key in group_by:
+        if key == "day":
+            values = ((data["time"] + offset) // 86400).astype(np.int64)
+        else:
+            values = data[key].astype(np.int64)
+        low = int(values.min())
+        span = int(values.max()) - low + 1
+        packed = packed * span + (values - low)
+        radix.append((low, span))
+
+    if int(packed.max()) < DENSE_GROUPS:
+        counts = np.bincount(packed)
+        present = np.flatnonzero(counts)
+        counts = counts[present]
+        remap = np.zeros(int(packed.max()) + 1, np.int64)
+        remap[present] = np.arange(len(present))
+        group = remap[packed]
+    else:
+        present, group, counts = np.unique(packed, return_inverse=True, return_counts=True)
+        group = group.reshape(-1)
+    groups = len(counts)
+
+    def total(weights):
+        return np.bincount(group, weights=weights, minlength=groups)
+
+    prompt = data["prompt_tokens"].astype(np.float64)
+    output = data["output_tokens"].astype(np.float64)
+    prompt_price, output_price = price_table(strings, prices)
+    cost = prompt * prompt_price[data["model"]] + output * output_price[data["model"]]
+    totals = {"errors": total(data["status"] == STATUS_ERROR), "prompt_tokens": total(prompt),
+              "output_tokens": total(output), "cost": total(cost)}
+
+    # Latency percentiles cover successful requests only; failures are in "errors"
+    ok = data["status"] == STATUS_OK
+    ok_group, ok_latency = group[ok], data["latency"][ok]
+    ok_counts = np.bincount(ok_group, minlength=groups)
+    order = np.argsort(ok_latency)
+    by_group = ok_group[order].astype(np.uint16 if groups <= 1 << 16 else np.int64)
+    order = order[np.argsort(by_group, kind="stable")]  # radix sort for small ids
+    latency = ok_latency[order].astype(np.float64)
+    starts = np.cumsum(ok_counts) - ok_counts
+    quantiles = {}
+    for p in percentiles:
+        positions = np.minimum(starts + np.maximum(ok_counts - 1, 0) * p // 100, max(len(latency) - 1, 0))
+        values = latency[positions] if len(latency) else np.zeros(groups)
+        quantiles[p] = np.where(ok_counts > 0, values, np.nan)
+
+    # Unpack each group's key values, last key first
+    labels = []
+    for key, (low, span) in zip(reversed(group_by), reversed(radix)):
+        labels.insert(0, _labels(key, present % span + low, strings))
+        present = present // span
+    result = []
+    for i in range(groups):
+        row = {"group": tuple(column[i] for column in labels), "requests": int(counts[i])}
+        row.update((name, float(values[i])) for name, values in totals.items())
+        row.update((p, None if np.isnan(values[i]) else float(values[i])) for p, values in quantiles.items())
+        result.append(row)
+    return result
+
+
+def _labels(key, values, strings):
+    """Display names for one key column of the group table."""
+    if key == "day":
+        return [time.strftime("%Y-%m-%d", time.gmtime(int(day) * 86400)) for day in values]
+    if key == "run":
+        return [time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(int(run))) if run else "earlier"
+                for run in values]
+    return [strings[code] if code < len(strings) else f"#{code}" for code in values]
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_usage_store():
+    """Return the process-wide usage store."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = UsageStore()
+        return _store
@@ -0,0 +1,135 @@
+# core/watchdog.py
+import os, sys, time, threading, logging
+from collections import Counter
+from logging.handlers import RotatingFileHandler
+from PyQt6.QtCore import QObject, QTimer, Qt
+from core.config import DATA_DIR
+from core.metrics import get_metrics
+
+STALL_LOG = os.path.join(DATA_DIR, "stalls.log")
+HEARTBEAT_MS = 50
+DEFAULT_THRESHOLD = 0.25   # seconds without a heartbeat before we start sampling
+DEFAULT_SAMPLE = 0.005     # seconds between stack samples during a stall
+MAX_SAMPLES = 4000         # per stall, bounds memory for very long freezes
+MAX_DEPTH = 64
+LOG_BYTES = 1024 * 1024
+LOG_BACKUPS = 3
+
+
+def fold_stack(frame):
+    """'outer;...;inner' with one 'function (file:line)' entry per frame."""
+    names = []
+    while frame is not None and len(names) < MAX_DEPTH:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class StallWatchdog(QObject):
+    """
+    Detects event-loop stalls. A QTimer on the GUI thread records a heartbeat;
+    a daemon thread notices when the heartbeat is late and samples the main
+    thread's stack with sys._current_frames() until the loop recovers. Each
+    stall is appended to config/data/stalls.log (rotated) as a '#' header plus
+    folded stacks, so `grep -v '^#' stalls.log | flamegraph.pl` draws it.
+    While the loop is healthy the thread only wakes once per threshold.
+    """
+
+    def __init__(self, threshold=DEFAULT_THRESHOLD, sample_interval=DEFAULT_SAMPLE, path=STALL_LOG):
+        super().__init__()
+        self.threshold = threshold
+        self.sample_interval = sample_interval
+        self.main_id = threading.main_thread().ident
+        self.last_beat = time.monotonic()
+        self.stalls = 0
+        self.running = False
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.log = logging.getLogger("nova.stalls")
+        self.log.propagate = False
+        self.log.setLevel(logging.INFO)
+        if not self.log.handlers:
+            handler = RotatingFileHandler(path, maxBytes=LOG_BYTES, backupCount=LOG_BACKUPS, encoding="utf-8")
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            self.log.addHandler(handler)
+
+        self.timer = QTimer(self)
+        self.timer.setTimerType(Qt.TimerType.CoarseTimer)
+        self.timer.timeout.connect(self.beat)
+
+    def beat(self):
+        self.last_beat = time.monotonic()
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self.beat()
+        self.timer.start(HEARTBEAT_MS)
+        self.thread = threading.Thread(target=self._run, name="stall-watchdog", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        self.timer.stop()
+
+    def _run(self):
+        while self.running:
+            late = time.monotonic() - self.last_beat
+            if late < self.threshold:
+                time.sleep(self.threshold - late + HEARTBEAT_MS / 1000)
+                continue
+            self._sample_stall(self.last_beat)
+
+    def _sample_stall(self, beat):
+        """Sample the main thread until the heartbeat moves again."""
+        samples = Counter()
+        taken = 0
+        while self.running and self.last_beat == beat:
+            frame = sys._current_frames().get(self.main_id)
+            if frame is None:
+                return  # main thread has exited
+            if taken < MAX_SAMPLES:
+                samples[fold_stack(frame)] += 1
+                taken += 1
+            del frame
+            time.sleep(self.sample_interval)
+        if not samples:
+            return
+
+        # The loop was blocked from the last beat (plus one heartbeat) until now
+        duration = max(time.monotonic() - beat - HEARTBEAT_MS / 1000, 0.0)
+        self.stalls += 1
+        get_metrics().counter("event_loop_stalls_total", "Event loop stalls over the threshold").inc()
+        get_metrics().histogram("event_loop_stall_seconds", "Event loop stall duration").observe(duration)
+        self._write(duration, taken, samples)
+
+    def _write(self, duration, taken, samples):
+        # Group by call site: the innermost frame of each sampled stack
+        sites = Counter()
+        for stack, count in samples.items():
+            sites[stack.rsplit(";", 1)[-1]] += count
+        stamp = time.strftime("%Y-%m-%d %H:%M:%S")
+        lines = [f"# stall {stamp} {duration * 1000:.0f}ms {taken} samples"]
+        lines += [f"#   {count * 100 // taken:3d}% {site}" for site, count in sites.most_common(5)]
+        lines += [f"{stack} {count}" for stack, count in samples.most_common()]
+        self.log.info("\n".join(lines))
+        print(f"⚠️ Event loop stalled for {duration * 1000:.0f}ms in {sites.most_common(1)[0][0]}")
+
+
+_watchdog = None
+
+
+def start_watchdog(config_manager):
+    """Start the process-wide watchdog unless "stall_watchdog" is false in the config."""
+    global _watchdog
+    if _watchdog is None and config_manager.get("stall_watchdog", True):
+        _watchdog = StallWatchdog(config_manager.get("stall_threshold", DEFAULT_THRESHOLD))
+        _watchdog.start()
+    return _watchdog
+
+
+def stop_watchdog():
+    if _watchdog is not None:
+        _watchdog.stop()
@@ -0,0 +1,146 @@
+# core/window_manager.py
+import time
+from PyQt6.QtCore import QObject, QEvent, QTimer, Qt
+from core.base_plugin import POLICY_SINGLETON, POLICY_POOLED, POLICY_MULTI
+from core.metrics import get_metrics
+from core.session_manager import SessionManager
+
+DEFAULT_POLICY = POLICY_SINGLETON
+PREWARM_DELAY_MS = 300
+
+
+class WindowManager(QObject):
+    """
+    Owns every plugin window opened from the sidebar. Applies each plugin's
+    PLUGIN_POLICY, keeps hidden pre-built instances for plugins that declare
+    PLUGIN_PREWARM, and calls the optional PluginLifecycle hooks. Windows
+    that can hibernate are handed to a SessionManager.
+    """
+
+    def __init__(self, plugins, config_manager):
+        super().__init__()
+        self.plugins = plugins
+        self.config_manager = config_manager
+        self.windows = {}   # plugin name -> list of live windows (shown or hidden)
+        self.pools = {}     # plugin name -> list of hidden, ready-to-show windows
+        self.owner = {}     # window -> plugin name
+        self.sessions = SessionManager(config_manager)
+
+    def policy(self, name):
+        meta = getattr(self.plugins.get(name), "meta", {})
+        policy = meta.get("PLUGIN_POLICY", DEFAULT_POLICY)
+        return policy if policy in (POLICY_SINGLETON, POLICY_POOLED, POLICY_MULTI) else DEFAULT_POLICY
+
+    def pool_size(self, name):
+        meta = getattr(self.plugins.get(name), "meta", {})
+        return max(int(meta.get("PLUGIN_POOL_SIZE", 1)), int(meta.get("PLUGIN_PREWARM", 0)))
+
+    def open(self, name, window_cls=None):
+        """Show a window for the plugin, reusing a hidden one where the policy allows."""
+        start = time.perf_counter()
+        policy = self.policy(name)
+        window = None
+        source = "new"
+
+        if policy == POLICY_SINGLETON and self.windows.get(name):
+            window = self.windows[name][0]
+            source = "reused"
+        elif policy == POLICY_POOLED and self.pools.get(name):
+            window = self.pools[name].pop()
+            source = "pooled"
+            QTimer.singleShot(PREWARM_DELAY_MS, lambda: self.refill(name))
+
+        if window is None:
+            window = self.create(name, window_cls)
+
+        self.sessions.wake(window)
+        self._call(window, "on_show")
+        if window.isMinimized():
+            window.showNormal()
+        window.show()
+        window.raise_()
+        window.activateWindow()
+        get_metrics().histogram("window_open_seconds", "Sidebar click to window shown",
+                                plugin=name, source=source).observe(time.perf_counter() - start)
+        return window
+
+    def create(self, name, window_cls=None):
+        window_cls = window_cls or self.plugins[name]
+        # Create the window with None as parent to make it independent
+        window = window_cls(self.config_manager, None)
+        if self.policy(name) == POLICY_MULTI:
+            window.setAttribute(Qt.WidgetAttribute.WA_DeleteOnClose)
+
+        self.windows.setdefault(name, []).append(window)
+        self.owner[window] = name
+        window.installEventFilter(self)
+        window.destroyed.connect(lambda *_, w=window: self._forget(w))
+        if callable(getattr(window, "hibernate", None)):
+            self.sessions.track(name, window)
+        return window
+
+    def prewarm(self):
+        """Build hidden instances for every plugin that declares PLUGIN_PREWARM."""
+        for name, plugin in self.plugins.items():
+            if int(getattr(plugin, "meta", {}).get("PLUGIN_PREWARM", 0)) > 0:
+                self.refill(name)
+
+    def schedule_prewarm(self, delay_ms=PREWARM_DELAY_MS):
+        QTimer.singleShot(delay_ms, self.prewarm)
+
+    def refill(self, name):
+        if self.policy(name) != POLICY_POOLED:
+            return
+        meta = getattr(self.plugins.get(name), "meta", {})
+        pool = self.pools.setdefault(name, [])
+        while len(pool) < int(meta.get("PLUGIN_PREWARM", 0)):
+            try:
+                window = self.create(name)
+            except Exception as e:
+                print(f"⚠️ Failed to prewarm {name}: {e}")
+                return
+            self._call(window, "on_prewarm")
+            pool.append(window)
+
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Type.Close and obj in self.owner and event.isAccepted():
+            self._on_close(obj, self.owner[obj])
+        return False
+
+    def _on_close(self, window, name):
+        policy = self.policy(name)
+        pool = self.pools.setdefault(name, [])
+
+        if policy == POLICY_SINGLETON:
+            self.sessions.wake(window)
+            self._call(window, "on_hide")
+        elif policy == POLICY_POOLED and window not in pool and len(pool) < self.pool_size(name):
+            self.sessions.discard(window)  # on_hide resets it anyway
+            self._call(window, "on_hide")
+            pool.append(window)
+        else:
+            # Over budget (or multi-instance): let Qt delete the window
+            self._call(window, "dispose")
+            window.setAttribute(Qt.WidgetAttribute.WA_DeleteOnClose)
+
+    def _forget(self, window):
+        name = self.owner.pop(window, None)
+        if name is None:
+            return
+        for registry in (self.windows, self.pools):
+            if window in registry.get(name, []):
+                registry[name].remove(window)
+
+    def dispose_all(self):
+        for name, windows in list(self.windows.items()):
+            for window in list(windows):
+                self._call(window, "dispose")
+
+    @staticmethod
+    def _call(window, hook):
+        method = getattr(window, hook, None)
+        if callable(method):
+            try:
+                method()
+            except Exception as e:
+                print(f"⚠️ {type(window).__name__}.{hook} failed: {e}")
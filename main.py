@@ -1,50 +1,52 @@
 import sys
-import os
+import time
+
+STARTUP_TIME = time.perf_counter()
+
 from PyQt6.QtWidgets import QApplication
-from PyQt6.QtGui import QFontDatabase
 from core.sidebar import FloatingSidebar
-from core.plugin_loader import load_plugins
+from core.plugin_loader import load_plugins, prewarm_plugins, format_startup_report
 from core.config import ConfigManager
-
-def load_material_icons():
-    """Load Material Icons font from various possible locations"""
-    font_paths = [
-        # Common installation paths for Material Icons
-        "C:/Windows/Fonts/MaterialIcons-Regular.ttf",
-        os.path.expanduser("~/.fonts/MaterialIcons-Regular.ttf"),
-        os.path.join(os.path.dirname(__file__), "config/MaterialIcons-Regular.ttf"),
-        os.path.join(os.path.dirname(__file__), "MaterialIcons-Regular.ttf"),
-        # Add more paths as needed
-    ]
-    
-    # Also try to use the font if it's already installed in the system
-    existing_fonts = QFontDatabase.families()
-    if "Material Icons" in existing_fonts:
-        print("Material Icons font found in system fonts")
-        return True
-    
-    # Try to load from file paths
-    for font_path in font_paths:
-        if os.path.exists(font_path):
-            font_id = QFontDatabase.addApplicationFont(font_path)
-            if font_id != -1:
-                print(f"Material Icons font loaded from: {font_path}")
-                return True
-    
-    print("Warning: Material Icons font could not be loaded. Using fallback icons.")
-    return False
+from core.conversation_store import close_store
+from core.metrics import get_metrics
+from core.watchdog import start_watchdog, stop_watchdog
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
     
-    # Load Material Icons font
-    font_loaded = load_material_icons()
-    
     config = ConfigManager()
+    if config.get("metrics_file"):
+        # Periodic Prometheus text export for scraping
+        get_metrics().start_exporter(config.get("metrics_file"), config.get("metrics_interval", 15.0))
     plugins = load_plugins()
 
     sidebar = FloatingSidebar(plugins, config)
     sidebar.place_on_right_center(app)
+    
+    def on_first_paint():
+        """Report startup cost, then import plugin code in the background"""
+        print(format_startup_report(time.perf_counter() - STARTUP_TIME), flush=True)
+        if "--exit-after-startup" in sys.argv:
+            # Used by benchmarks/startup.py
+            app.quit()
+            return
+        prewarm_plugins(plugins, on_done=lambda: print(format_startup_report()))
+        sidebar.window_manager.schedule_prewarm()
+        sidebar.supervisor.start_all()
+        sidebar.palette.refresh_history()
+    
+    sidebar.firstPainted.connect(on_first_paint)
     sidebar.show()
     
+    # Log event-loop stalls with sampled stacks to config/data/stalls.log
+    start_watchdog(config)
+    app.aboutToQuit.connect(stop_watchdog)
+    app.aboutToQuit.connect(sidebar.supervisor.stop_all)
+    # Let open windows cancel requests and release resources while the stores are still open
+    app.aboutToQuit.connect(sidebar.window_manager.dispose_all)
+    
+    # Commit queued conversation history and settings before exiting
+    app.aboutToQuit.connect(close_store)
+    app.aboutToQuit.connect(config.flush)
+    
     sys.exit(app.exec())
\ No newline at end of file
@@ -1,13 +1,119 @@
-from PyQt6.QtWidgets import QWidget, QVBoxLayout, QLabel
+from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QPushButton,
+                             QListWidget, QListWidgetItem, QFileDialog)
+import os, time
+from core.base_plugin import PluginLifecycle
+from core.doc_index import build_index, get_index, reload_index
+from core.request_engine import get_engine
+from core.metrics import get_metrics
 
-class AcademyWindow(QWidget):
-    def __init__(self, config_manager):
-        super().__init__()
+RESULTS = 10
+SNIPPET_CHARS = 240
+
+class AcademyWindow(QWidget, PluginLifecycle):
+    """Indexes a local folder of guides and searches it (BM25 over passages)"""
+
+    def __init__(self, config_manager, parent=None):
+        super().__init__(parent)
         self.setWindowTitle("Academy")
-        self.resize(400, 300)
+        self.resize(520, 420)
+        self.config_manager = config_manager
+        self.build_handle = None
 
         layout = QVBoxLayout(self)
-        layout.addWidget(QLabel("Academy plugin – tutorials, courses, and guides will appear here."))
+        layout.addWidget(QLabel("Documents folder (Markdown, text, PDFs converted to text):"))
+        folder_row = QHBoxLayout()
+        self.folder_entry = QLineEdit(config_manager.get("academy_folder", ""))
+        folder_row.addWidget(self.folder_entry)
+        browse_btn = QPushButton("Browse…")
+        browse_btn.clicked.connect(self.choose_folder)
+        folder_row.addWidget(browse_btn)
+        self.index_btn = QPushButton("Update index")
+        self.index_btn.clicked.connect(self.update_index)
+        folder_row.addWidget(self.index_btn)
+        layout.addLayout(folder_row)
+
+        self.status = QLabel()
+        layout.addWidget(self.status)
+
+        self.query_entry = QLineEdit()
+        self.query_entry.setPlaceholderText("Search the docs…")
+        self.query_entry.returnPressed.connect(self.search)
+        layout.addWidget(self.query_entry)
+
+        self.results = QListWidget()
+        self.results.setWordWrap(True)
+        layout.addWidget(self.results)
+        self.show_index_status()
+
+    def on_show(self):
+        self.show_index_status()
+
+    def show_index_status(self):
+        index = get_index()
+        if index is None:
+            self.status.setText("No index yet. Choose a folder and click Update index.")
+        else:
+            self.status.setText(f"{len(index.files)} files, {index.count} passages, "
+                                f"{index.term_count} terms in {index.root}")
+
+    def choose_folder(self):
+        folder = QFileDialog.getExistingDirectory(self, "Documents folder", self.folder_entry.text())
+        if folder:
+            self.folder_entry.setText(folder)
+
+    def update_index(self):
+        """Index new and modified files on a worker; tokenizing runs in a process pool"""
+        folder = self.folder_entry.text().strip()
+        if self.build_handle is not None:
+            return
+        if not os.path.isdir(folder):
+            self.status.setText("Folder not found.")
+            return
+        folder = os.path.abspath(folder)
+        self.config_manager.set("academy_folder", folder)
+        self.index_btn.setEnabled(False)
+        self.status.setText("Scanning…")
+        started = time.perf_counter()
+
+        def job(handle):
+            return build_index(folder, progress=lambda done, total: handle.emit_chunk(
+                f"Indexing {done}/{total} files…"))
+
+        handle = get_engine().submit(job, timeout=None)
+        handle.chunk.connect(self.status.setText)
+        handle.finished.connect(lambda stats: self.on_indexed(stats, time.perf_counter() - started))
+        handle.failed.connect(self.on_index_failed)
+        self.build_handle = handle
+
+    def on_indexed(self, stats, elapsed):
+        self.build_handle = None
+        self.index_btn.setEnabled(True)
+        reload_index()
+        self.show_index_status()
+        self.status.setText(self.status.text() + f" ({stats['updated']} updated, "
+                            f"{stats['removed']} removed in {elapsed:.1f}s)")
+
+    def on_index_failed(self, message):
+        self.build_handle = None
+        self.index_btn.setEnabled(True)
+        self.status.setText(f"Indexing failed: {message}")
+
+    def search(self):
+        query = self.query_entry.text().strip()
+        index = get_index()
+        self.results.clear()
+        if not query or index is None:
+            return
+        start = time.perf_counter()
+        hits = index.search(query, RESULTS)
+        elapsed = time.perf_counter() - start
+        get_metrics().histogram("retrieval_seconds", "Document index query time",
+                                source="academy").observe(elapsed)
+        for hit in hits:
+            snippet = " ".join(hit["text"].split())[:SNIPPET_CHARS]
+            self.results.addItem(QListWidgetItem(f"{hit['path']}  ({hit['score']:.2f})\n{snippet}"))
+        self.status.setText(f"{len(hits)} passages in {elapsed * 1000:.1f} ms")
 
 PLUGIN_NAME = "Academy"
 PLUGIN_CLASS = AcademyWindow
+PLUGIN_POLICY = "singleton"
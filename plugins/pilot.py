@@ -1,19 +1,99 @@
-from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QTextEdit, QLineEdit, 
+from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QLineEdit, 
                              QPushButton, QLabel, QApplication, QHBoxLayout,
-                             QSizePolicy)
+                             QSizePolicy, QCheckBox)
 from PyQt6.QtCore import QTimer, Qt, pyqtSignal
 from PyQt6.QtGui import QFont
-import requests, json
+import time, itertools
+from collections import deque
+from core.base_plugin import PluginLifecycle
+from core.transcript import TranscriptModel, TranscriptView
+from core.conversation_store import get_store
+from core.context_builder import ConversationContext, DEFAULT_TOKEN_BUDGET, MODEL
+from core.request_engine import DEFAULT_TIMEOUT
+from core.scheduler import get_scheduler, PRIORITY_FOREGROUND, PRIORITY_BACKGROUND
+from core.llm_cache import get_cache, cache_key
+from core.llm_router import get_router
+from core.providers import PROVIDERS, provider_key
+from core.metrics import get_metrics
+from core.doc_index import get_index
+from core.tool_engine import get_tool_engine
 
-class ChatBox(QWidget):
+DEFAULT_TOP_K = 3
+MAX_TOOL_ROUNDS = 5   # model turns that may ask for tools before we give up
+WINDOW_NUMBERS = itertools.count(1)   # names each window in the usage log
+
+CHAT_STYLE = """
+    QWidget {
+        background-color: #f5f5f7;
+    }
+    TranscriptView {
+        background-color: white;
+        border: 1px solid #e0e0e0;
+        border-radius: 8px;
+        padding: 8px;
+        font-family: 'Segoe UI', Arial, sans-serif;
+    }
+    QLineEdit {
+        border: 1px solid #e0e0e0;
+        border-radius: 8px;
+        padding: 8px;
+        font-family: 'Segoe UI', Arial, sans-serif;
+        background-color: white;
+    }
+    QLineEdit:focus {
+        border: 1px solid #007acc;
+    }
+    QPushButton {
+        background-color: #007acc;
+        color: white;
+        border: none;
+        border-radius: 8px;
+        padding: 8px 16px;
+        font-family: 'Segoe UI', Arial, sans-serif;
+        font-weight: 500;
+    }
+    QPushButton:hover {
+        background-color: #0062a3;
+    }
+    QPushButton:pressed {
+        background-color: #004d80;
+    }
+    QPushButton:disabled {
+        background-color: #cccccc;
+        color: #666666;
+    }
+    QLabel {
+        font-family: 'Segoe UI', Arial, sans-serif;
+        color: #666666;
+    }
+"""
+
+class ChatBox(QWidget, PluginLifecycle):
     # Signal to notify when window state changes
     windowStateChanged = pyqtSignal(bool)
+    # Asks the session manager to restore a hibernated window
+    wakeRequested = pyqtSignal()
     
     def __init__(self, config_manager, parent=None):
         super().__init__(parent, Qt.WindowType.Window)  # Critical fix: Set window flag here
         self.config_manager = config_manager
         self.is_maximized = False
         self.normal_geometry = None
+        self.pending_request = None
+        self.prompt_queue = deque()  # follow-up prompts sent while a reply is pending
+        self.session_id = None
+        # Numbers restart every launch; the usage log tells runs apart by its run column
+        self.source = f"Pilot#{next(WINDOW_NUMBERS)}"
+        cfg = config_manager.snapshot()
+        self.context = ConversationContext(cfg.get("system_prompt", ""),
+                                           cfg.get("context_token_budget", DEFAULT_TOKEN_BUDGET))
+        config_manager.changed.connect(self.on_config_changed)
+        self.stream_buffer = []
+        self.stream_started = False
+        self.stream_row = -1
+        self.request_started_at = 0.0
+        self.first_token_latency = None
+        self.hibernated = False
         
         # Set window properties
         self.setWindowTitle("Nova Chat - Pilot")
@@ -21,65 +101,20 @@ class ChatBox(QWidget):
         self.resize(500, 400)
         
         # Set application style
-        self.setStyleSheet("""
-            QWidget {
-                background-color: #f5f5f7;
-            }
-            QTextEdit {
-                background-color: white;
-                border: 1px solid #e0e0e0;
-                border-radius: 8px;
-                padding: 8px;
-                font-family: 'Segoe UI', Arial, sans-serif;
-            }
-            QLineEdit {
-                border: 1px solid #e0e0e0;
-                border-radius: 8px;
-                padding: 8px;
-                font-family: 'Segoe UI', Arial, sans-serif;
-                background-color: white;
-            }
-            QLineEdit:focus {
-                border: 1px solid #007acc;
-            }
-            QPushButton {
-                background-color: #007acc;
-                color: white;
-                border: none;
-                border-radius: 8px;
-                padding: 8px 16px;
-                font-family: 'Segoe UI', Arial, sans-serif;
-                font-weight: 500;
-            }
-            QPushButton:hover {
-                background-color: #0062a3;
-            }
-            QPushButton:pressed {
-                background-color: #004d80;
-            }
-            QPushButton:disabled {
-                background-color: #cccccc;
-                color: #666666;
-            }
-            QLabel {
-                font-family: 'Segoe UI', Arial, sans-serif;
-                color: #666666;
-            }
-        """)
+        self.setStyleSheet(CHAT_STYLE)
         
         # Create main layout
         layout = QVBoxLayout(self)
         layout.setContentsMargins(12, 12, 12, 12)
         layout.setSpacing(12)
         
-        # Create chat area
-        self.chat_area = QTextEdit()
-        self.chat_area.setReadOnly(True)
-        self.chat_area.setFont(QFont("Segoe UI", 10))
-        layout.addWidget(self.chat_area)
+        # Chat area, typing indicator and timers are built by build_session()
+        self.build_session()
         
         # Create input area with horizontal layout
-        input_layout = QHBoxLayout()
+        self.input_bar = QWidget()
+        input_layout = QHBoxLayout(self.input_bar)
+        input_layout.setContentsMargins(0, 0, 0, 0)
         input_layout.setSpacing(8)
         
         self.user_input = QLineEdit()
@@ -87,25 +122,108 @@ class ChatBox(QWidget):
         self.user_input.returnPressed.connect(self.send_message)
         input_layout.addWidget(self.user_input)
         
+        # Attach the best matching Academy passages to each prompt
+        self.docs_check = QCheckBox("Docs")
+        self.docs_check.setToolTip("Attach relevant passages from the Academy document index")
+        self.docs_check.setChecked(cfg.get("attach_docs", False))
+        input_layout.addWidget(self.docs_check)
+        if cfg.get("tools_enabled", False):
+            get_tool_engine().prewarm()
+        
         self.send_btn = QPushButton("Send")
         self.send_btn.clicked.connect(self.send_message)
         input_layout.addWidget(self.send_btn)
         
-        layout.addLayout(input_layout)
+        layout.addWidget(self.input_bar)
         
         # Create typing indicator
         self.typing_label = QLabel("")
         self.typing_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
         self.typing_label.setVisible(False)
         layout.addWidget(self.typing_label)
+        self.dot_count = 0
+        self.typing_text = "AI is typing"
+        
+        # Placeholder shown while the session manager has the window hibernated
+        self.shell = QPushButton("💤 Conversation hibernated to save memory. Click to restore.")
+        self.shell.setFlat(True)
+        self.shell.clicked.connect(self.wakeRequested.emit)
+        self.shell.setVisible(False)
+        layout.addWidget(self.shell)
+        
+        # Add welcome message
+        QTimer.singleShot(100, self.show_welcome_message)
+        
+    def build_session(self):
+        """Create the transcript view and timers (again after hibernation)"""
+        # Create chat area: a virtualized view over a paged message model
+        self.transcript = TranscriptModel(self)
+        self.chat_area = TranscriptView()
+        self.chat_area.setFont(QFont("Segoe UI", 10))
+        self.chat_area.setModel(self.transcript)
+        self.layout().insertWidget(0, self.chat_area)
         
         # Initialize typing timer
         self.typing_timer = QTimer()
         self.typing_timer.timeout.connect(self.animate_typing)
-        self.dot_count = 0
         
-        # Add welcome message
-        QTimer.singleShot(100, self.show_welcome_message)
+        # Streamed chunks are batched and flushed once per frame
+        self.stream_timer = QTimer()
+        self.stream_timer.setInterval(16)
+        self.stream_timer.timeout.connect(self.flush_stream_buffer)
+        
+    def hibernate(self):
+        """Hand the conversation to the session manager and release the heavy widgets"""
+        if self.hibernated or self.pending_request is not None or self.prompt_queue:
+            return None
+        bar = self.chat_area.verticalScrollBar()
+        state = {"messages": list(self.transcript.messages()),
+                 "turns": [[turn.role, turn.text] for turn in self.context.turns],
+                 "session_id": self.session_id,
+                 "draft": self.user_input.text(),
+                 "scroll": None if self.chat_area.stick_to_bottom else bar.value()}
+        self.context.clear()
+        self.chat_area.release()
+        self.transcript.clear()
+        for obj in (self.chat_area, self.transcript, self.typing_timer, self.stream_timer):
+            obj.deleteLater()
+        self.chat_area = self.transcript = self.typing_timer = self.stream_timer = None
+        
+        self.setStyleSheet("")
+        self.input_bar.setVisible(False)
+        self.shell.setVisible(True)
+        self.hibernated = True
+        return state
+        
+    def restore(self, state):
+        """Rebuild the window from hibernate()'s state; None starts an empty conversation"""
+        if not self.hibernated:
+            return
+        self.hibernated = False
+        self.setStyleSheet(CHAT_STYLE)
+        self.shell.setVisible(False)
+        self.input_bar.setVisible(True)
+        self.build_session()
+        if state is None:
+            return
+        self.transcript.replace_all(state["messages"])
+        for role, text in state["turns"]:
+            if role == MODEL:
+                self.context.add_model(text)
+            else:
+                self.context.add_user(text)
+        self.session_id = state["session_id"]
+        self.user_input.setText(state["draft"])
+        if state["scroll"] is not None:
+            self.chat_area.stick_to_bottom = False
+            self.chat_area.verticalScrollBar().setValue(state["scroll"])
+        
+    def memory_usage(self):
+        """Approximate bytes held by this conversation while awake"""
+        if self.hibernated:
+            return 0
+        return (self.transcript.resident_bytes() + self.chat_area.memory_usage()
+                + sum(len(turn.text) for turn in self.context.turns))
         
     def show_welcome_message(self):
         """Display a welcome message when the chat opens"""
@@ -131,105 +249,251 @@ class ChatBox(QWidget):
         self.windowStateChanged.emit(self.is_maximized)
         
     def send_message(self):
-        """Send user message and get AI response"""
+        """Send user message; it is queued if a reply is still pending"""
         text = self.user_input.text().strip()
         if not text:
             return
             
-        # Disable input while processing
-        self.user_input.setEnabled(False)
-        self.send_btn.setEnabled(False)
-        
         # Display user message
         self.display_message("You", text)
+        self.record_message("You", text)
         self.user_input.clear()
         
+        self.prompt_queue.append(text)
+        if self.pending_request is None:
+            self.start_next_request()
+        else:
+            self.update_typing_text()
+            
+    def start_next_request(self):
+        """Submit the oldest queued prompt to the shared request scheduler"""
+        if self.pending_request is not None or not self.prompt_queue:
+            return
+        text = self.prompt_queue.popleft()
+        
         # Show typing indicator
+        self.update_typing_text()
         self.typing_label.setVisible(True)
         self.dot_count = 0
         self.typing_timer.start(400)
         
-        # Process the message (using a timer to simulate async processing)
-        QTimer.singleShot(100, lambda: self.process_ai_response(text))
+        # Query the LLM on a worker thread; the reply comes back via signals
+        cfg = self.config_manager.snapshot()
+        timeout = cfg.get("request_timeout", DEFAULT_TIMEOUT)
+        self.context.add_user(text)
+        payload = self.context.build_request()
+        top_k = cfg.get("retrieval_top_k", DEFAULT_TOP_K) if self.docs_check.isChecked() else 0
+        if cfg.get("stream", True):
+            job = lambda h: self.query_llm(text, timeout=timeout, payload=payload, handle=h, top_k=top_k)
+        else:
+            job = lambda h: self.query_llm(text, timeout=timeout, payload=payload, top_k=top_k)
         
-    def process_ai_response(self, user_message):
-        """Process the user message and get AI response"""
-        try:
-            response = self.query_llm(user_message)
+        self.stream_buffer = []
+        self.stream_started = False
+        self.first_token_latency = None
+        self.request_started_at = time.perf_counter()
+        
+        # The window the user is working in is served before background windows
+        provider = cfg.get("llm", "gemini")
+        priority = PRIORITY_FOREGROUND if self.isActiveWindow() else PRIORITY_BACKGROUND
+        handle = get_scheduler(self.config_manager).submit(
+            job, provider, provider_key(cfg, provider), priority=priority, timeout=timeout)
+        handle.chunk.connect(self.handle_ai_chunk)
+        handle.finished.connect(self.handle_ai_response)
+        handle.failed.connect(self.handle_ai_error)
+        handle.cancelled.connect(self.finish_request)
+        handle.retry.connect(self.handle_rate_limited)
+        self.pending_request = handle
+        
+    def update_typing_text(self):
+        queued = len(self.prompt_queue)
+        self.typing_text = "AI is typing" + (f" ({queued} queued)" if queued else "")
+        
+    def handle_rate_limited(self, delay):
+        """The provider answered 429; the scheduler retries after Retry-After"""
+        self.typing_text = f"Rate limited, retrying in {delay:.0f}s"
+        
+    def handle_ai_chunk(self, text):
+        """Queue a streamed chunk; it is drawn on the next frame flush"""
+        if self.first_token_latency is None:
+            self.first_token_latency = time.perf_counter() - self.request_started_at
             self.typing_timer.stop()
             self.typing_label.setVisible(False)
+        self.stream_buffer.append(text)
+        if not self.stream_timer.isActive():
+            self.stream_timer.start()
+            
+    def flush_stream_buffer(self):
+        """Append all chunks received since the last frame in one edit"""
+        self.stream_timer.stop()
+        if not self.stream_buffer:
+            return
+        text = "".join(self.stream_buffer)
+        self.stream_buffer = []
+        
+        if not self.stream_started:
+            self.stream_row = self.transcript.append_message("AI", text)
+            self.stream_started = True
+        else:
+            self.transcript.append_text(self.stream_row, text)
+        
+    def handle_ai_response(self, response):
+        """Display the AI response delivered by the request engine"""
+        streamed = self.stream_started or bool(self.stream_buffer)
+        self.flush_stream_buffer()
+        self.finish_request()
+        if not streamed:
             self.display_message("AI", response)
-        except Exception as e:
-            self.typing_timer.stop()
-            self.typing_label.setVisible(False)
-            self.display_message("System", f"Error: {str(e)}")
-        finally:
-            # Re-enable input
-            self.user_input.setEnabled(True)
-            self.send_btn.setEnabled(True)
-            self.user_input.setFocus()
+        self.context.add_model(response)
+        self.record_message("AI", response)
+        self.start_next_request()
+        
+    def handle_ai_error(self, message):
+        """Display a failed or timed out request"""
+        self.finish_request()
+        self.display_message("System", f"Error: {message}")
+        self.start_next_request()
+        
+    def finish_request(self):
+        """Stop the typing indicator"""
+        self.pending_request = None
+        self.stream_timer.stop()
+        self.stream_buffer = []
+        self.stream_started = False
+        self.typing_timer.stop()
+        self.typing_label.setVisible(False)
+        
+    def on_config_changed(self, keys):
+        """Apply edited settings to the open conversation"""
+        cfg = self.config_manager.snapshot()
+        if "system_prompt" in keys:
+            self.context.system_prompt = cfg.get("system_prompt", "")
+        if "context_token_budget" in keys:
+            self.context.budget = cfg.get("context_token_budget", DEFAULT_TOKEN_BUDGET)
+            
+    def closeEvent(self, event):
+        """Cancel queued and in-flight requests when the window closes"""
+        self.prompt_queue.clear()
+        if self.pending_request is not None:
+            self.pending_request.cancel()
+        super().closeEvent(event)
+        
+    def on_hide(self):
+        """Reset the window before it goes back to the window pool"""
+        self.prompt_queue.clear()
+        # Runs before closeEvent: cancel here so a late reply cannot reach the next conversation
+        if self.pending_request is not None:
+            self.pending_request.cancel()
+        self.finish_request()
+        self.transcript.clear()
+        self.user_input.clear()
+        self.session_id = None
+        self.context.clear()
+        self.show_welcome_message()
         
     def animate_typing(self):
         """Animate the typing indicator"""
         self.dot_count = (self.dot_count + 1) % 4
-        self.typing_label.setText("AI is typing" + "." * self.dot_count)
+        self.typing_label.setText(self.typing_text + "." * self.dot_count)
         
     def display_message(self, sender, message, is_welcome=False):
-        """Display a message in the chat area with appropriate styling"""
-        # Different colors for different senders
-        colors = {
-            "You": "#007acc",
-            "AI": "#4caf50", 
-            "System": "#ff5722"
-        }
-        
-        color = colors.get(sender, "#000000")
-        
-        # Format the message with HTML
-        formatted_message = f"""
-        <div style="margin-bottom: 12px;">
-            <span style="font-weight: 600; color: {color};">{sender}:</span>
-            <span style="color: #333333;">{message}</span>
-        </div>
-        """
+        """Append a message to the transcript; the view lays out only visible rows"""
+        self.transcript.append_message(sender, message)
         
-        # Insert the message
-        self.chat_area.append(formatted_message)
+        # Always follow the conversation after the user sends something
+        if sender == "You":
+            self.chat_area.scroll_to_bottom()
         
-        # Scroll to bottom
-        scrollbar = self.chat_area.verticalScrollBar()
-        scrollbar.setValue(scrollbar.maximum())
+    def record_message(self, sender, text):
+        """Append the message to the persistent history (written in the background)"""
+        store = get_store()
+        if self.session_id is None:
+            self.session_id = store.new_session(title=text[:80])
+        store.record(self.session_id, sender, text)
         
-    def query_llm(self, prompt):
-        """Query the LLM API"""
-        cfg = self.config_manager.config
-        model = cfg.get("llm", "gemini")
-        api_key = cfg.get("api_key", "")
+    def retrieve_context(self, prompt, top_k):
+        """The top_k index passages for prompt as one text part, or None"""
+        index = get_index()
+        if index is None:
+            return None
+        with get_metrics().histogram("retrieval_seconds", "Document index query time", source="pilot").time():
+            hits = index.search(prompt, top_k)
+        if not hits:
+            return None
+        passages = [f"[{i}] {hit['path']}\n{hit['text']}" for i, hit in enumerate(hits, 1)]
+        return "\n\n".join(["Relevant passages from local documents:"] + passages)
         
-        if not api_key:
+    def query_llm(self, prompt, timeout=DEFAULT_TIMEOUT, payload=None, handle=None, top_k=0):
+        """
+        Query the LLM API (blocking; runs on a request engine worker).
+        payload is a prebuilt multi-turn request; without it only prompt is sent.
+        With a handle the reply is streamed through handle.emit_chunk.
+        With top_k the best matching document passages are sent along with
+        the prompt; retrieval is timed separately from the LLM request.
+        With "tools_enabled" (Gemini only) the local tools are offered; the
+        calls of a model turn run in parallel and their results are sent
+        back until the model answers with text.
+        """
+        cfg = self.config_manager.snapshot()
+        provider = cfg.get("llm", "gemini")
+        
+        if not provider_key(cfg, provider):
             raise ValueError("API key not configured. Please set it in the settings.")
             
-        if model == "gemini":
-            url = "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent"
-            headers = {"Content-Type": "application/json", "X-goog-api-key": api_key}
-            data = {"contents": [{"parts": [{"text": prompt}]}]}
-            
-            response = requests.post(url, headers=headers, json=data)
-            
-            if response.status_code != 200:
-                error_msg = response.json().get('error', {}).get('message', 'Unknown API error')
-                raise Exception(f"API error: {error_msg}")
-                
-            resp = response.json()
-            
-            try:
-                return resp["candidates"][0]["content"]["parts"][0]["text"]
-            except (KeyError, IndexError):
-                # If the response format is unexpected, return the raw JSON for debugging
-                return json.dumps(resp, indent=2)
-                
-        return "Selected model is not implemented yet."
+        data = payload or {"contents": [{"role": "user", "parts": [{"text": prompt}]}]}
+        context = self.retrieve_context(prompt, top_k) if top_k else None
+        if context:
+            # Only this request carries the passages, the conversation history does not
+            last = data["contents"][-1]
+            data = dict(data, contents=data["contents"][:-1] + [
+                {"role": last["role"], "parts": [{"text": context}] + last["parts"]}])
+        on_chunk = handle.emit_chunk if handle is not None else None
+        cancel_event = handle.cancel_event if handle is not None else None
+        
+        tools = get_tool_engine() if cfg.get("tools_enabled", False) and provider == "gemini" else None
+        if tools is None:
+            return self.fetch_reply(cfg, data, timeout, cancel_event, on_chunk)
+        data = dict(data, tools=tools.registry.declarations())
+        for _ in range(MAX_TOOL_ROUNDS):
+            reply = self.fetch_reply(cfg, data, timeout, cancel_event, on_chunk, use_cache=False)
+            calls = getattr(reply, "function_calls", ())
+            if not calls:
+                return reply
+            # Every call of this turn runs at once; the turn lasts as long as the slowest tool
+            results = tools.run([(call.get("name"), call.get("args") or {}) for call in calls], cancel_event)
+            model_parts = ([{"text": str(reply)}] if reply else []) + [{"functionCall": call} for call in calls]
+            data = dict(data, contents=data["contents"] + [
+                {"role": "model", "parts": model_parts},
+                {"role": "user", "parts": [{"functionResponse": {"name": call.get("name"), "response": result}}
+                                           for call, result in zip(calls, results)]}])
+        raise ValueError(f"The model kept calling tools after {MAX_TOOL_ROUNDS} rounds")
+        
+    def fetch_reply(self, cfg, data, timeout, cancel_event, on_chunk, use_cache=True):
+        """One LLM request through the router, timed and (optionally) cached"""
+        provider = cfg.get("llm", "gemini")
+        fetch = lambda: get_router().complete(cfg, data, timeout, cancel_event, on_chunk, self.source)
+        
+        start = time.perf_counter()
+        outcome = "error"
+        try:
+            # Serve identical requests from the response cache unless it is disabled;
+            # tool turns are never cached since tool results can change
+            if not use_cache or not cfg.get("cache_enabled", True):
+                reply = fetch()
+            else:
+                model = cfg.get("models", {}).get(provider) or PROVIDERS[provider].default_model
+                reply = get_cache().get_or_compute(cache_key(provider, model, data), fetch, cancel_event)
+            outcome = "ok"
+            return reply
+        finally:
+            metrics = get_metrics()
+            metrics.counter("llm_requests_total", "Pilot LLM queries", provider=provider,
+                            outcome=outcome).inc()
+            metrics.histogram("llm_request_seconds", "Pilot query latency (incl. cache)",
+                              provider=provider).observe(time.perf_counter() - start)
 
 
 PLUGIN_NAME = "Pilot"
-PLUGIN_CLASS = ChatBox
\ No newline at end of file
+PLUGIN_CLASS = ChatBox
+PLUGIN_POLICY = "pooled"
+PLUGIN_PREWARM = 1
\ No newline at end of file
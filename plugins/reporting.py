@@ -1,13 +1,202 @@
-from PyQt6.QtWidgets import QWidget, QVBoxLayout, QLabel
+from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QComboBox, QPushButton,
+                             QTableWidget, QTableWidgetItem, QHeaderView, QMessageBox, QTabWidget)
+from PyQt6.QtCore import QTimer, Qt
+import time
+from core.base_plugin import PluginLifecycle
+from core.metrics import get_metrics, WINDOWS
+from core.request_engine import get_engine
+from core.usage_store import get_usage_store, aggregate, PERCENTILES
 
-class ReportingWindow(QWidget):
-    def __init__(self, config_manager):
-        super().__init__()
+REFRESH_MS = 1000
+COLUMNS = ["Metric", "Labels", "Count", "p50", "p95", "p99"]
+USAGE_COLUMNS = ["Group", "Requests", "Errors", "Prompt tokens", "Output tokens", "Cost (USD)",
+                 "p50", "p95", "p99"]
+USAGE_RANGES = {"Last 24 hours": 86400, "Last 7 days": 7 * 86400, "Last 30 days": 30 * 86400,
+                "All time": None}
+USAGE_GROUPS = {"Day": ("day",), "Provider": ("provider",), "Model": ("model",), "Window": ("run", "source"),
+                "Day + provider": ("day", "provider"), "Provider + model": ("provider", "model")}
+
+
+def format_value(value, scale):
+    """Seconds as ms/s, sizes as B/KB/MB"""
+    if value is None:
+        return "–"
+    if scale == 1:
+        for unit in ("B", "KB", "MB"):
+            if value < 1024 or unit == "MB":
+                return f"{value:.0f} {unit}" if unit == "B" else f"{value:.1f} {unit}"
+            value /= 1024
+    return f"{value * 1000:.1f} ms" if value < 1 else f"{value:.2f} s"
+
+
+class ReportingWindow(QWidget, PluginLifecycle):
+    """Live view of the metrics registry, and token usage / cost history from the usage log"""
+
+    def __init__(self, config_manager, parent=None):
+        super().__init__(parent)
         self.setWindowTitle("Reporting")
-        self.resize(400, 300)
+        self.resize(640, 400)
+        self.config_manager = config_manager
+        self.rows = {}  # metric key -> table row
+        self.usage_query = None
+
+        self.tabs = QTabWidget()
+        QVBoxLayout(self).addWidget(self.tabs)
+        metrics_tab = QWidget()
+        self.tabs.addTab(metrics_tab, "Live metrics")
+        self.tabs.addTab(self.build_usage_tab(), "Usage")
+        self.tabs.currentChanged.connect(self.on_tab_changed)
+
+        layout = QVBoxLayout(metrics_tab)
+        top = QHBoxLayout()
+        top.addWidget(QLabel("Window:"))
+        self.window_menu = QComboBox()
+        self.window_menu.addItems(list(WINDOWS) + ["all"])
+        self.window_menu.currentTextChanged.connect(self.refresh)
+        top.addWidget(self.window_menu)
+        top.addStretch()
+        export_btn = QPushButton("Export (Prometheus)")
+        export_btn.clicked.connect(self.export)
+        top.addWidget(export_btn)
+        layout.addLayout(top)
+
+        self.table = QTableWidget(0, len(COLUMNS))
+        self.table.setHorizontalHeaderLabels(COLUMNS)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.ResizeToContents)
+        self.table.horizontalHeader().setSectionResizeMode(1, QHeaderView.ResizeMode.Stretch)
+        layout.addWidget(self.table)
+
+        # Refreshed only while the window is visible
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+
+    def build_usage_tab(self):
+        tab = QWidget()
+        layout = QVBoxLayout(tab)
+        top = QHBoxLayout()
+        top.addWidget(QLabel("Range:"))
+        self.range_menu = QComboBox()
+        self.range_menu.addItems(list(USAGE_RANGES))
+        self.range_menu.setCurrentText("Last 7 days")
+        top.addWidget(self.range_menu)
+        top.addWidget(QLabel("Group by:"))
+        self.group_menu = QComboBox()
+        self.group_menu.addItems(list(USAGE_GROUPS))
+        top.addWidget(self.group_menu)
+        top.addStretch()
+        refresh_btn = QPushButton("Refresh")
+        top.addWidget(refresh_btn)
+        layout.addLayout(top)
+        for trigger in (self.range_menu.currentTextChanged, self.group_menu.currentTextChanged,
+                        refresh_btn.clicked):
+            trigger.connect(self.query_usage)
+
+        self.usage_table = QTableWidget(0, len(USAGE_COLUMNS))
+        self.usage_table.setHorizontalHeaderLabels(USAGE_COLUMNS)
+        self.usage_table.verticalHeader().setVisible(False)
+        self.usage_table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.usage_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        layout.addWidget(self.usage_table)
+        self.usage_status = QLabel("")
+        layout.addWidget(self.usage_status)
+        return tab
+
+    def showEvent(self, event):
+        self.on_tab_changed(self.tabs.currentIndex())
+        super().showEvent(event)
+
+    def on_tab_changed(self, index):
+        # Live metrics tick every second; usage history is queried on demand
+        if index == 0:
+            self.refresh()
+            self.timer.start(REFRESH_MS)
+        else:
+            self.timer.stop()
+            self.query_usage()
+
+    def query_usage(self):
+        """Aggregate the usage log on a worker thread; only the newest query is shown"""
+        span = USAGE_RANGES[self.range_menu.currentText()]
+        since = time.time() - span if span else None
+        group_by = USAGE_GROUPS[self.group_menu.currentText()]
+        prices = self.config_manager.get("usage_prices", {})
+
+        def job(handle):
+            start = time.perf_counter()
+            data, strings = get_usage_store().load()
+            rows = aggregate(data, strings, group_by, since, prices=prices)
+            return rows, len(data["time"]), time.perf_counter() - start
+
+        self.usage_status.setText("Aggregating…")
+        handle = self.usage_query = get_engine().submit(job, timeout=None)
+        handle.finished.connect(lambda result, h=handle: self.show_usage(h, *result))
+        handle.failed.connect(lambda message, h=handle: self.show_usage_error(h, message))
+
+    def show_usage(self, handle, rows, scanned, elapsed):
+        if handle is not self.usage_query:
+            return
+        self.usage_table.setRowCount(len(rows))
+        for row, group in enumerate(rows):
+            values = [" / ".join(group["group"]), str(group["requests"]), f"{group['errors']:.0f}",
+                      f"{group['prompt_tokens']:,.0f}", f"{group['output_tokens']:,.0f}",
+                      f"{group['cost']:.4f}"] + [format_value(group[p], 1e6) for p in PERCENTILES]
+            for column, text in enumerate(values):
+                item = QTableWidgetItem(text)
+                if column >= 1:
+                    item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+                self.usage_table.setItem(row, column, item)
+        requests = sum(group["requests"] for group in rows)
+        self.usage_status.setText(f"{requests:,} requests in range ({scanned:,} logged), "
+                                  f"aggregated in {elapsed * 1000:.0f} ms")
+
+    def show_usage_error(self, handle, message):
+        if handle is self.usage_query:
+            self.usage_status.setText(f"Usage unavailable: {message}")
+
+    def hideEvent(self, event):
+        self.timer.stop()
+        super().hideEvent(event)
+
+    def refresh(self):
+        """Update cells in place; rows are only added for new metrics"""
+        window = WINDOWS.get(self.window_menu.currentText())
+        for metric in get_metrics().collect():
+            key = (metric.name, metric.labels)
+            row = self.rows.get(key)
+            if row is None:
+                row = self.rows[key] = self.table.rowCount()
+                self.table.insertRow(row)
+                self.set_cell(row, 0, metric.name)
+                self.set_cell(row, 1, ", ".join(f"{k}={v}" for k, v in metric.labels))
+
+            if metric.kind == "histogram":
+                stats = metric.percentiles((50, 95, 99), window)
+                values = [str(stats["count"])] + [format_value(stats[p], metric.scale) for p in (50, 95, 99)]
+            else:
+                values = [str(metric.value()), "", "", ""]
+            for column, text in enumerate(values, start=2):
+                self.set_cell(row, column, text)
+
+    def set_cell(self, row, column, text):
+        item = self.table.item(row, column)
+        if item is None:
+            item = QTableWidgetItem(text)
+            if column >= 2:
+                item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+            self.table.setItem(row, column, item)
+        elif item.text() != text:
+            item.setText(text)
 
-        layout = QVBoxLayout(self)
-        layout.addWidget(QLabel("Reporting plugin – future reports can be shown here."))
+    def export(self):
+        try:
+            path = get_metrics().write_prometheus(self.config_manager.get("metrics_file") or None)
+        except OSError as e:
+            QMessageBox.warning(self, "Reporting", f"Export failed: {e}")
+            return
+        QMessageBox.information(self, "Reporting", f"Metrics written to {path}")
 
 PLUGIN_NAME = "Reporting"
 PLUGIN_CLASS = ReportingWindow
+PLUGIN_POLICY = "singleton"
@@ -1,35 +1,99 @@
-from PyQt6.QtWidgets import QWidget, QVBoxLayout, QLabel, QComboBox, QLineEdit, QPushButton, QMessageBox
+from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QComboBox, QLineEdit,
+                             QPushButton, QMessageBox, QCheckBox)
+from core.base_plugin import PluginLifecycle
+from core.llm_cache import get_cache
+from core.providers import PROVIDERS, provider_key
 
-class SettingsWindow(QWidget):
-    def __init__(self, config_manager):
-        super().__init__()
+class SettingsWindow(QWidget, PluginLifecycle):
+    def __init__(self, config_manager, parent=None):
+        super().__init__(parent)
         self.setWindowTitle("Settings")
-        self.resize(350, 180)
+        self.resize(350, 340)
         self.config_manager = config_manager
 
         layout = QVBoxLayout(self)
         layout.addWidget(QLabel("Select LLM:"))
         self.llm_menu = QComboBox()
-        self.llm_menu.addItems(["gemini", "chatgpt", "grok"])
-        self.llm_menu.setCurrentText(config_manager.config.get("llm", "gemini"))
+        self.llm_menu.addItems(list(PROVIDERS))
+        self.llm_menu.currentTextChanged.connect(self.switch_provider)
         layout.addWidget(self.llm_menu)
 
         layout.addWidget(QLabel("API Key:"))
         self.api_entry = QLineEdit()
         self.api_entry.setEchoMode(QLineEdit.EchoMode.Password)
-        self.api_entry.setText(config_manager.config.get("api_key", ""))
         layout.addWidget(self.api_entry)
 
+        layout.addWidget(QLabel("Endpoint (optional):"))
+        self.url_entry = QLineEdit()
+        layout.addWidget(self.url_entry)
+
+        self.hedge_check = QCheckBox("Hedge slow requests with another provider")
+        layout.addWidget(self.hedge_check)
+
+        self.cache_check = QCheckBox("Cache identical requests")
+        layout.addWidget(self.cache_check)
+
+        cache_row = QHBoxLayout()
+        self.cache_stats = QLabel()
+        cache_row.addWidget(self.cache_stats)
+        clear_btn = QPushButton("Clear cache")
+        clear_btn.clicked.connect(self.clear_cache)
+        cache_row.addWidget(clear_btn)
+        layout.addLayout(cache_row)
+        self.load_fields()
+
         save_btn = QPushButton("Save")
         save_btn.clicked.connect(self.save_config)
         layout.addWidget(save_btn)
 
+    def load_fields(self):
+        cfg = self.config_manager.config
+        # API keys are kept per provider; the entry shows the selected one
+        self.api_keys = {name: provider_key(cfg, name) for name in PROVIDERS}
+        self.base_urls = dict(cfg.get("base_urls", {}))
+        self.current_llm = None
+        self.llm_menu.setCurrentText(cfg.get("llm", "gemini"))
+        self.switch_provider(self.llm_menu.currentText())
+        self.hedge_check.setChecked(cfg.get("hedge_requests", False))
+        self.cache_check.setChecked(cfg.get("cache_enabled", True))
+        self.update_cache_stats()
+
+    def switch_provider(self, name):
+        if self.current_llm is not None:
+            self.api_keys[self.current_llm] = self.api_entry.text().strip()
+            self.base_urls[self.current_llm] = self.url_entry.text().strip()
+        self.current_llm = name
+        self.api_entry.setText(self.api_keys.get(name, ""))
+        self.url_entry.setText(self.base_urls.get(name, ""))
+        self.url_entry.setPlaceholderText(PROVIDERS[name].default_base_url)
+
+    def on_show(self):
+        """Re-read the config each time the (singleton) window is shown"""
+        self.load_fields()
+
     def save_config(self):
-        self.config_manager.config["llm"] = self.llm_menu.currentText()
-        self.config_manager.config["api_key"] = self.api_entry.text().strip()
+        self.switch_provider(self.llm_menu.currentText())
+        self.config_manager.config["llm"] = self.current_llm
+        self.config_manager.config["api_key"] = self.api_keys[self.current_llm]
+        self.config_manager.config["api_keys"] = {name: key for name, key in self.api_keys.items() if key}
+        self.config_manager.config["base_urls"] = {name: url for name, url in self.base_urls.items() if url}
+        self.config_manager.config["hedge_requests"] = self.hedge_check.isChecked()
+        self.config_manager.config["cache_enabled"] = self.cache_check.isChecked()
         self.config_manager.save()
         QMessageBox.information(self, "Settings", "Configuration saved successfully.")
         self.close()
 
+    def clear_cache(self):
+        get_cache().clear()
+        self.update_cache_stats()
+
+    def update_cache_stats(self):
+        stats = get_cache().get_stats()
+        hits = stats["memory_hits"] + stats["disk_hits"]
+        self.cache_stats.setText(
+            f"{stats['disk_entries']} cached, {hits} hits / {stats['misses']} misses "
+            f"({stats['hit_rate']:.0%})")
+
 PLUGIN_NAME = "Settings"
 PLUGIN_CLASS = SettingsWindow
+PLUGIN_POLICY = "singleton"
@@ -1,13 +1,102 @@
-from PyQt6.QtWidgets import QWidget, QVBoxLayout, QLabel
+from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QLabel, QCheckBox, QTableWidget,
+                             QTableWidgetItem, QHeaderView)
+from PyQt6.QtCore import QTimer, pyqtSignal
+import json, time
+from core.base_plugin import PluginLifecycle
+from core.tool_engine import get_tool_engine
 
-class ToolsWindow(QWidget):
-    def __init__(self, config_manager):
-        super().__init__()
+REFRESH_MS = 100
+MAX_ROWS = 200
+COLUMNS = ["Turn", "Tool", "Arguments", "Status", "Time"]
+
+class ToolsWindow(QWidget, PluginLifecycle):
+    """Local tools offered to Pilot, and live timings of every tool call"""
+
+    # Tool engine events arrive on request workers; this hops to the GUI thread
+    toolEvent = pyqtSignal(object)
+
+    def __init__(self, config_manager, parent=None):
+        super().__init__(parent)
         self.setWindowTitle("Tools")
-        self.resize(300, 200)
+        self.resize(620, 380)
+        self.config_manager = config_manager
+        self.engine = get_tool_engine()
+        self.rows = {}      # call id -> table row
+        self.running = {}   # call id -> perf_counter start
 
         layout = QVBoxLayout(self)
-        layout.addWidget(QLabel("This is the Tools plugin window."))
+        self.enabled_check = QCheckBox("Offer tools to Pilot (Gemini function calling)")
+        self.enabled_check.setChecked(config_manager.get("tools_enabled", False))
+        self.enabled_check.toggled.connect(self.set_enabled)
+        layout.addWidget(self.enabled_check)
+        tools = ", ".join(self.engine.registry.tools)
+        layout.addWidget(QLabel(f"Available: {tools}"))
+
+        self.summary = QLabel("No tool calls yet.")
+        layout.addWidget(self.summary)
+
+        self.table = QTableWidget(0, len(COLUMNS))
+        self.table.setHorizontalHeaderLabels(COLUMNS)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.table.horizontalHeader().setSectionResizeMode(2, QHeaderView.ResizeMode.Stretch)
+        layout.addWidget(self.table)
+
+        # Running calls tick while the window is visible
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.update_running)
+
+        self.toolEvent.connect(self.on_tool_event)
+        self.listener = self.toolEvent.emit
+        self.engine.add_listener(self.listener)
+
+    def set_enabled(self, enabled):
+        self.config_manager.set("tools_enabled", enabled)
+        if enabled:
+            self.engine.prewarm()
+
+    def dispose(self):
+        self.engine.remove_listener(self.listener)
+
+    def showEvent(self, event):
+        self.timer.start(REFRESH_MS)
+        super().showEvent(event)
+
+    def hideEvent(self, event):
+        self.timer.stop()
+        super().hideEvent(event)
+
+    def on_tool_event(self, event):
+        if event["event"] == "turn":
+            self.summary.setText(
+                f"Last turn: {event['calls']} calls in {event['wall'] * 1000:.0f} ms "
+                f"(tools ran {event['sum'] * 1000:.0f} ms in total)")
+            return
+        call_id = event["id"]
+        if event["event"] == "start":
+            if self.table.rowCount() >= MAX_ROWS:
+                self.table.removeRow(self.table.rowCount() - 1)
+            self.table.insertRow(0)
+            self.rows = {cid: row + 1 for cid, row in self.rows.items() if row + 1 < MAX_ROWS}
+            self.rows[call_id] = 0
+            self.running[call_id] = time.perf_counter()
+            arguments = json.dumps(event["args"], ensure_ascii=False)
+            for column, text in enumerate([str(event["turn"]), event["tool"], arguments[:200], "running", ""]):
+                self.table.setItem(0, column, QTableWidgetItem(text))
+            return
+        self.running.pop(call_id, None)
+        row = self.rows.pop(call_id, None)
+        if row is not None:
+            self.table.item(row, 3).setText("ok" if event["ok"] else event["error"])
+            self.table.item(row, 4).setText(f"{event['elapsed'] * 1000:.0f} ms")
+
+    def update_running(self):
+        now = time.perf_counter()
+        for call_id, started in self.running.items():
+            row = self.rows.get(call_id)
+            if row is not None:
+                self.table.item(row, 4).setText(f"{(now - started) * 1000:.0f} ms")
 
 PLUGIN_NAME = "Tools"
 PLUGIN_CLASS = ToolsWindow
+PLUGIN_POLICY = "singleton"
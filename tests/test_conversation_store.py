@@ -0,0 +1,76 @@
+import io, json
+import pytest
+import core.conversation_store as conversation_store
+from core.conversation_store import ConversationStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ConversationStore(str(tmp_path / "history.sqlite3"))
+    yield store
+    store.close()
+
+
+def fill(store):
+    first = store.new_session("first")
+    store.record(first, "You", "how do I parse json in python")
+    store.record(first, "AI", "Use the json module")
+    second = store.new_session("second")
+    store.record(second, "You", "explain sqlite full text search")
+    store.record(second, "AI", "FTS5 builds an inverted index")
+    store.flush()
+    return first, second
+
+
+def test_search_finds_messages_across_sessions(store):
+    first, second = fill(store)
+    hits = store.search("json")
+    assert {hit["session_id"] for hit in hits} == {first}
+    assert all("[json]" in hit["snippet"].lower() for hit in hits if store.has_fts)
+    assert [hit["text"] for hit in store.search("index")] == ["FTS5 builds an inverted index"]
+    assert store.search("   ") == []
+
+
+def test_session_filter_looks_past_the_newest_matches_of_other_sessions(store, monkeypatch):
+    monkeypatch.setattr(conversation_store, "SEARCH_WINDOW", 5)
+    old = store.new_session("old")
+    store.record(old, "You", "needle in the old session")
+    busy = store.new_session("busy")
+    for i in range(20):
+        store.record(busy, "You", f"needle number {i}")
+    store.flush()
+    hits = store.search("needle", session_id=old)
+    assert [hit["text"] for hit in hits] == ["needle in the old session"]
+
+
+def test_export_streams_sessions_in_creation_order(store):
+    first, second = fill(store)
+    out = io.StringIO()
+    assert store.export(out, "jsonl") == 4
+    rows = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert [row["session"] for row in rows] == [first, first, second, second]
+    assert rows[1] == {"session": first, "ts": rows[1]["ts"], "sender": "AI", "text": "Use the json module"}
+
+    out = io.StringIO()
+    assert store.export(out, "markdown", session_id=second) == 2
+    text = out.getvalue()
+    assert text.count("## Session") == 1 and "**AI:** FTS5 builds an inverted index" in text
+
+
+def test_export_includes_messages_without_a_session_row(store):
+    store.record("orphan", "You", "written before its session")
+    first, _ = fill(store)
+    out = io.StringIO()
+    assert store.export(out) == 5
+    assert json.loads(out.getvalue().splitlines()[0])["session"] == "orphan"
+
+
+def test_command_line_search_and_export(store, tmp_path, capsys):
+    fill(store)
+    store.close()
+    db = store.path
+    assert conversation_store.main(["--db", db, "search", "sqlite"]) == 0
+    assert "explain sqlite full text search" in capsys.readouterr().out.replace("[", "").replace("]", "")
+    target = tmp_path / "history.md"
+    assert conversation_store.main(["--db", db, "export", str(target), "--format", "markdown"]) == 0
+    assert target.read_text(encoding="utf-8").count("## Session") == 2
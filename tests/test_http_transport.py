@@ -0,0 +1,127 @@
+import time
+from types import SimpleNamespace
+import pytest
+import requests
+import core.http_transport as http_transport
+from core.http_transport import HttpTransport
+from core.providers import GeminiProvider, ProviderError
+from core.request_engine import RequestHandle, RetryLater
+from core.scheduler import RequestScheduler, _Queued
+from benchmarks.mock_gemini import MockGeminiServer, MockOptions
+
+PAYLOAD = {"contents": [{"role": "user", "parts": [{"text": "hello"}]}]}
+
+
+@pytest.fixture
+def serve():
+    servers = []
+
+    def serve(**options):
+        server = MockGeminiServer(MockOptions(size="fixed:50", seed=1, **options)).start()
+        servers.append(server)
+        return server
+
+    yield serve
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture
+def transport():
+    transport = HttpTransport(retries=2, backoff=0.5, max_backoff=8.0)
+    yield transport
+    transport.close()
+
+
+def generate(transport, server, **kwargs):
+    return transport.post(f"{server.base_url}/models/mock:generateContent", json_body=PAYLOAD,
+                          headers={"X-goog-api-key": "test"}, **kwargs)
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Record backoff delays instead of sleeping, and the jitter caps they were drawn from."""
+    recorded = {"delays": [], "caps": []}
+
+    def uniform(low, high):
+        recorded["caps"].append(high)
+        return high / 2
+
+    # Patch the module's references only: the mock server sleeps for its latency
+    monkeypatch.setattr(http_transport, "random", SimpleNamespace(uniform=uniform))
+    monkeypatch.setattr(http_transport, "time", SimpleNamespace(sleep=recorded["delays"].append,
+                                                                perf_counter=time.perf_counter))
+    return recorded
+
+
+def test_keep_alive_connection_is_reused(serve, transport):
+    server = serve()
+    for _ in range(5):
+        response = generate(transport, server)
+        assert response.status_code == 200
+        response.json()
+    stats = transport.stats.snapshot()
+    assert server.stats["completed"] == 5
+    assert stats["requests"] == 5
+    assert stats["connections"] == 1
+    assert stats["reused"] == 4
+
+
+def test_5xx_is_retried_with_jittered_exponential_backoff(serve, transport, sleeps):
+    server = serve(error_rate=1.0)
+    response = generate(transport, server)
+    assert response.status_code == 500
+    response.close()
+    assert server.stats["errors"] == 3
+    assert transport.stats.snapshot()["retries"] == 2
+    # Full jitter: each delay is drawn from [0, backoff * 2 ** (attempt - 1)]
+    assert sleeps["caps"] == [0.5, 1.0]
+    assert sleeps["delays"] == [0.25, 0.5]
+
+
+def test_backoff_is_capped(transport):
+    transport.options["max_backoff"] = 1.0
+    assert all(0 <= transport._backoff(attempt) <= 1.0 for attempt in range(1, 10))
+
+
+def test_429_is_left_to_the_scheduler(serve, transport, sleeps):
+    server = serve(rate_429=1.0, retry_after=3)
+    response = generate(transport, server)
+    assert response.status_code == 429
+    response.close()
+    assert server.stats["rate_limited"] == 1
+    assert sleeps["delays"] == []
+
+    provider = GeminiProvider("test", base_url=server.base_url)
+    provider.transport = transport
+    with pytest.raises(ProviderError) as raised:
+        provider.complete(PAYLOAD)
+    assert (raised.value.status, raised.value.retry_after) == (429, 3.0)
+
+
+def test_scheduler_turns_429_into_a_delayed_retry():
+    class Engine:
+        def submit(self, job, timeout, handle=None):
+            self.job, self.handle = job, handle
+
+    def job(handle):
+        raise ProviderError("API error: Resource has been exhausted", 429, 2.5)
+
+    engine = Engine()
+    scheduler = RequestScheduler(config_manager=None, engine=engine)
+    item = _Queued(job, "gemini", "test", 0, RequestHandle(None))
+    scheduler._start(item)
+    with pytest.raises(RetryLater) as raised:
+        engine.job(engine.handle)
+    assert raised.value.delay == 2.5
+
+
+def test_read_timeout_is_raised_without_retrying(serve, transport, sleeps):
+    server = serve(latency="fixed:1000")
+    start = time.perf_counter()
+    with pytest.raises(requests.Timeout):
+        generate(transport, server, timeout=0.2)
+    assert time.perf_counter() - start < 0.9
+    assert transport.stats.snapshot()["retries"] == 0
+    assert sleeps["delays"] == []
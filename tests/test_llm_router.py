@@ -0,0 +1,102 @@
+import time, threading
+import pytest
+import core.llm_router as llm_router
+from core.llm_router import LLMRouter
+from core.providers import GeminiProvider, RequestCancelled
+from benchmarks.mock_gemini import MockGeminiServer, MockOptions
+
+PAYLOAD = {"contents": [{"role": "user", "parts": [{"text": "hello"}]}]}
+HEDGE_DELAY = 0.3
+
+
+class SpyProvider(GeminiProvider):
+    """Gemini adapter that remembers its cancel flag and how its attempt ended."""
+
+    def __init__(self, name, server):
+        super().__init__("test", base_url=server.base_url)
+        self.name = name
+        self.cancel_event = None
+        self.outcome = None
+        self.ended = threading.Event()
+
+    def _run(self, call, cancel_event):
+        self.cancel_event = cancel_event
+        try:
+            result = call()
+            self.outcome = "ok"
+            return result
+        except RequestCancelled:
+            self.outcome = "cancelled"
+            raise
+        finally:
+            self.ended.set()
+
+    def complete(self, payload, timeout=None, cancel_event=None):
+        return self._run(lambda: super(SpyProvider, self).complete(payload, timeout, cancel_event), cancel_event)
+
+    def stream(self, payload, on_chunk, timeout=None, cancel_event=None):
+        return self._run(lambda: super(SpyProvider, self).stream(payload, on_chunk, timeout, cancel_event),
+                         cancel_event)
+
+
+@pytest.fixture
+def serve():
+    servers = []
+
+    def serve(**options):
+        server = MockGeminiServer(MockOptions(seed=1, **options)).start()
+        servers.append(server)
+        return server
+
+    yield serve
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture
+def router(monkeypatch):
+    recorded = []
+    store = type("Store", (), {"record": lambda self, *row: recorded.append(row)})()
+    monkeypatch.setattr(llm_router, "get_usage_store", lambda: store)
+    router = LLMRouter()
+    router.recorded = recorded
+    yield router
+    router.executor.shutdown(wait=False, cancel_futures=True)
+
+
+@pytest.mark.parametrize("streaming", [False, True])
+def test_slow_primary_is_hedged_and_the_loser_cancelled(serve, router, streaming):
+    slow = serve(latency="fixed:1000", size="fixed:200", throughput=2000)
+    fast = serve(size="fixed:200", throughput=2000)
+    primary, backup = SpyProvider("primary", slow), SpyProvider("backup", fast)
+    chunks = []
+
+    start = time.perf_counter()
+    reply = router._hedged(primary, backup, PAYLOAD, 5, None, chunks.append if streaming else None, HEDGE_DELAY)
+    elapsed = time.perf_counter() - start
+
+    assert HEDGE_DELAY <= elapsed < 0.9
+    assert backup.outcome == "ok" and fast.stats["requests"] == 1
+    if streaming:
+        assert "".join(chunks) == reply
+    # The primary is told to stop and abandons its reply once the headers arrive
+    assert primary.cancel_event.is_set()
+    assert primary.ended.wait(3)
+    assert primary.outcome == "cancelled"
+    assert [row[0] for row in router.recorded] == ["backup"]
+
+
+def test_no_hedge_once_the_primary_is_streaming(serve, router):
+    # First chunk after 0.1s, last after 1s: well past the hedge delay
+    streaming = serve(size="fixed:400", chunk_chars=40, throughput=400)
+    idle = serve()
+    primary, backup = SpyProvider("primary", streaming), SpyProvider("backup", idle)
+    chunks = []
+
+    reply = router._hedged(primary, backup, PAYLOAD, 5, None, chunks.append, HEDGE_DELAY)
+
+    assert len(chunks) == 10 and "".join(chunks) == reply
+    assert primary.outcome == "ok"
+    assert backup.cancel_event is None and idle.stats["requests"] == 0
+
@@ -0,0 +1,63 @@
+import sys, time, threading, subprocess
+import pytest
+from PyQt6.QtCore import QCoreApplication
+import core.plugin_supervisor as plugin_supervisor
+from core.plugin_ipc import Channel
+from core.plugin_supervisor import PluginProcess, HANG_SECONDS
+
+# Stands in for a plugin host whose event loop is stuck
+HUNG = "import time; time.sleep(60)"
+
+
+class Plugin:
+    name = "Hung"
+    module_path = "plugins.hung"
+    class_name = "Hung"
+
+
+@pytest.fixture
+def app():
+    return QCoreApplication.instance() or QCoreApplication(sys.argv[:1])
+
+
+@pytest.fixture
+def worker(app, monkeypatch):
+    restarts = []
+    worker = PluginProcess(Plugin())
+    monkeypatch.setattr(plugin_supervisor, "QTimer",
+                        type("QTimer", (), {"singleShot": staticmethod(lambda delay, f: restarts.append(delay))}))
+    worker.restarts = restarts
+    worker.process = subprocess.Popen([sys.executable, "-c", HUNG], stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+    worker.channel = Channel(worker.process.stdout, worker.process.stdin)
+    threading.Thread(target=worker._read, args=(worker.process, worker.channel), daemon=True).start()
+    yield worker
+    if worker.process is not None:
+        worker.process.kill()
+        worker.process.wait()
+
+
+def wait_for(app, condition, seconds=5):
+    deadline = time.monotonic() + seconds
+    while not condition() and time.monotonic() < deadline:
+        app.processEvents()
+        time.sleep(0.01)
+    return condition()
+
+
+def test_hung_worker_is_killed_and_restarted_through_the_crash_path(app, worker):
+    process = worker.process
+    worker.ready = True
+    worker.last_seen = time.monotonic() - HANG_SECONDS - 1
+    worker.check_alive()
+
+    assert process.wait(5) != 0
+    assert wait_for(app, lambda: worker.process is None)
+    assert worker.status.startswith("restarting")
+    assert len(worker.crashes) == 1
+    assert worker.restarts == [plugin_supervisor.RESTART_BACKOFF_MS]
+
+
+def test_worker_is_left_alone_while_it_starts_up(app, worker):
+    worker.last_seen = time.monotonic() - HANG_SECONDS - 1
+    worker.check_alive()
+    assert worker.running and worker.crashes == []
@@ -0,0 +1,60 @@
+import os, sys, time, subprocess
+import pytest
+from core.tool_engine import Tool, ToolEngine, default_registry
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+APP = """
+import sys
+with open(sys.argv[1], "a") as f:
+    f.write("imported\\n")
+
+if __name__ == "__main__":
+    from core.tool_engine import ToolEngine
+    engine = ToolEngine(max_workers=1)
+    print(engine.run([("calculator", {"expression": "6 * 7"})]))
+    engine.shutdown()
+"""
+
+
+def slow(seconds):
+    time.sleep(seconds)
+    return seconds
+
+
+@pytest.fixture
+def engine():
+    registry = default_registry()
+    registry.register(Tool("slow", f"{__name__}:slow", "Sleep", {}, timeout=1.0))
+    engine = ToolEngine(registry, max_workers=2)
+    yield engine
+    engine.shutdown()
+
+
+def test_calls_run_concurrently_and_keep_their_order(engine):
+    # Start both workers and import this module in each: that takes longer than the calls
+    engine.run([("slow", {"seconds": 0})] * 2)
+    start = time.perf_counter()
+    results = engine.run([("slow", {"seconds": 0.3}), ("calculator", {"expression": "2 ** 10"}),
+                          ("slow", {"seconds": 0.3}), ("missing", {})])
+    assert [result.get("result") for result in results[:3]] == [0.3, 1024, 0.3]
+    assert "unknown tool" in results[3]["error"]
+    assert time.perf_counter() - start < 0.55
+
+
+def test_timed_out_call_kills_its_worker_and_the_pool_recovers(engine):
+    results = engine.run([("slow", {"seconds": 5}), ("calculator", {"expression": "1 + 1"})])
+    assert results[0]["error"] == "timed out after 1s"
+    assert results[1] == {"result": 2}
+    assert engine.run([("slow", {"seconds": 0})]) == [{"result": 0}]
+    assert engine.live <= engine.max_workers
+
+
+def test_workers_do_not_import_the_app_main_module(tmp_path):
+    app, marker = tmp_path / "app.py", tmp_path / "imports.log"
+    app.write_text(APP)
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [ROOT, os.environ.get("PYTHONPATH")])))
+    output = subprocess.run([sys.executable, str(app), str(marker)], capture_output=True, text=True,
+                            env=env, cwd=ROOT, timeout=60, check=True).stdout
+    assert "{'result': 42}" in output
+    assert marker.read_text() == "imported\n"